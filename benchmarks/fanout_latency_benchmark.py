@@ -0,0 +1,96 @@
+# benchmarks/fanout_latency_benchmark.py
+"""
+Measures fan-out latency of the Unix-socket bus across worker processes.
+
+Starts --workers processes that each join the same UnixSocketBus, as hypercorn
+workers would. Worker 0 publishes --messages tally payloads stamped with a monotonic
+clock reading; every worker records how long each one took to arrive. Latencies are
+reported per worker and across all workers.
+
+Run from the repository root:
+    python benchmarks/fanout_latency_benchmark.py --workers 4 --messages 2000
+"""
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.websockets.fanout_bus import UnixSocketBus
+import argparse
+import asyncio
+import multiprocessing
+import statistics
+import tempfile
+import time
+
+
+async def run_worker(index: int, path: str, args, ready, go, results):
+    latencies = []
+    done = asyncio.Event()
+
+    async def handler(poll_id, payload):
+        latencies.append(time.monotonic_ns() - payload["sent_ns"])
+        if len(latencies) == args.messages:
+            done.set()
+
+    bus = UnixSocketBus(path)
+    await bus.start(handler)
+    ready.put(index)
+    await asyncio.get_running_loop().run_in_executor(None, go.wait)
+
+    if index == 0:
+        for number in range(args.messages):
+            await bus.publish("poll-a", {"votes": {"Apple": number}, "sent_ns": time.monotonic_ns()})
+            if args.rate:
+                await asyncio.sleep(1 / args.rate)
+
+    await asyncio.wait_for(done.wait(), timeout=60)
+    results.put((index, latencies))
+    # Keep the broker alive until every worker has reported
+    await asyncio.get_running_loop().run_in_executor(None, go.wait)
+    await asyncio.sleep(0.5)
+    await bus.stop()
+
+
+def worker_main(index, path, args, ready, go, results):
+    asyncio.run(run_worker(index, path, args, ready, go, results))
+
+
+def describe(latencies_ns):
+    latencies_ms = sorted(latency / 1_000_000 for latency in latencies_ns)
+    p99 = latencies_ms[int(len(latencies_ms) * 0.99) - 1]
+    return f"p50 {statistics.median(latencies_ms):.3f} ms, p99 {p99:.3f} ms, max {latencies_ms[-1]:.3f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=1000, help="messages per second, 0 for as fast as possible")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="pickify-bench-"), "fanout.sock")
+    context = multiprocessing.get_context("spawn")
+    ready, results, go = context.Queue(), context.Queue(), context.Event()
+    workers = [
+        context.Process(target=worker_main, args=(index, path, args, ready, go, results))
+        for index in range(args.workers)
+    ]
+    for worker in workers:
+        worker.start()
+    for _ in workers:
+        ready.get(timeout=30)
+    go.set()
+
+    collected = dict(results.get(timeout=120) for _ in workers)
+    for worker in workers:
+        worker.join()
+
+    print(f"{args.workers} workers, {args.messages} messages at {args.rate or 'max'} msg/s")
+    for index in sorted(collected):
+        print(f"  worker {index}: {describe(collected[index])}")
+    print(f"  all workers: {describe([latency for values in collected.values() for latency in values])}")
+
+
+if __name__ == "__main__":
+    main()
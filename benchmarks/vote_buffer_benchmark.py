@@ -0,0 +1,117 @@
+# benchmarks/vote_buffer_benchmark.py
+"""
+Compares tally write throughput with and without the write-behind vote buffer.
+
+MongoDB serializes writes to a single document, so the polls collection is simulated
+with one lock per poll document that is held for --write-latency milliseconds per
+update. Both modes pay --ballot-latency milliseconds per vote for the ballot insert,
+which runs in parallel across documents. Every vote in the direct mode is then its
+own `$inc`; in buffered mode the votes are coalesced by VoteBuffer and flushed as one
+update per poll.
+
+Nothing connects to MongoDB, but the vote buffer module reads the app's configuration
+when it is imported, so runs need the same environment as the app (MONGODB_URI...).
+
+Run from the repository root:
+    python benchmarks/vote_buffer_benchmark.py --votes 5000 --concurrency 200
+"""
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from collections import defaultdict
+from bson import ObjectId
+import argparse
+import asyncio
+import random
+import time
+
+
+class SimulatedPollsCollection:
+    """Stands in for the polls collection, serializing writes per document."""
+
+    def __init__(self, write_latency: float):
+        self.write_latency = write_latency
+        self.locks = defaultdict(asyncio.Lock)
+        self.votes = defaultdict(lambda: defaultdict(int))
+        self.writes = 0
+
+    async def _apply(self, poll_id, increments):
+        async with self.locks[poll_id]:
+            await asyncio.sleep(self.write_latency)
+            for field, count in increments.items():
+                if field.startswith("votes."):
+                    self.votes[poll_id][field[len("votes."):]] += count
+            self.writes += 1
+
+    async def update_one(self, filter, update):
+        await self._apply(filter["_id"], update["$inc"])
+
+    async def bulk_write(self, requests, ordered=True):
+        """Takes (filter, update) pairs, see `create_buffer`."""
+        await asyncio.gather(*(self._apply(filter["_id"], update["$inc"]) for filter, update in requests))
+
+
+def create_buffer(collection: SimulatedPollsCollection, args):
+    """Returns a VoteBuffer flushing its updates as the plain (filter, update) pairs UpdateOne keeps private."""
+    # Imported here so that --help works without the app's configuration
+    from src.voting.vote_buffer import VoteBuffer
+
+    class InspectableVoteBuffer(VoteBuffer):
+        def build_update(self, poll_id, options, flushed_at):
+            return self.update_for(poll_id, options, flushed_at)
+
+    return InspectableVoteBuffer(collection, args.flush_ms, args.max_pending)
+
+
+async def run(mode: str, votes: int, concurrency: int, polls: list, options: list, args) -> dict:
+    collection = SimulatedPollsCollection(args.write_latency / 1000)
+    buffer = create_buffer(collection, args)
+    if mode == "buffered":
+        buffer.start()
+    queue = asyncio.Queue()
+    for _ in range(votes):
+        queue.put_nowait((random.choice(polls), random.choice(options)))
+
+    async def voter():
+        while not queue.empty():
+            poll_id, option = queue.get_nowait()
+            await asyncio.sleep(args.ballot_latency / 1000)
+            if mode == "buffered":
+                buffer.add(poll_id, option)
+            else:
+                await collection.update_one({"_id": ObjectId(poll_id)}, {"$inc": {f"votes.{option}": 1}})
+
+    start = time.perf_counter()
+    await asyncio.gather(*(voter() for _ in range(concurrency)))
+    await buffer.stop()
+    elapsed = time.perf_counter() - start
+
+    recorded = sum(sum(tally.values()) for tally in collection.votes.values())
+    assert recorded == votes, f"{mode}: expected {votes} votes, recorded {recorded}"
+    return {"mode": mode, "seconds": elapsed, "votes_per_second": votes / elapsed, "writes": collection.writes}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--votes", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--polls", type=int, default=1, help="number of hot polls receiving the votes")
+    parser.add_argument("--options", type=int, default=4)
+    parser.add_argument("--write-latency", type=float, default=0.5, help="ms each document update holds the lock")
+    parser.add_argument("--ballot-latency", type=float, default=2.0, help="ms for each ballot insert")
+    parser.add_argument("--flush-ms", type=int, default=200)
+    parser.add_argument("--max-pending", type=int, default=500)
+    args = parser.parse_args()
+
+    polls = [str(ObjectId()) for _ in range(args.polls)]
+    options = [f"option_{i}" for i in range(args.options)]
+    for mode in ("direct", "buffered"):
+        result = await run(mode, args.votes, args.concurrency, polls, options, args)
+        print(f"{result['mode']:>8}: {result['votes_per_second']:10.0f} votes/s "
+              f"({result['seconds']:.2f} s, {result['writes']} document writes)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -5,28 +5,38 @@ from starlette.staticfiles import StaticFiles
 from jose import JWTError, jwt
 from fastapi.middleware.cors import CORSMiddleware
 from pathlib import Path
-from bson import ObjectId
 import logging
 
 # Import application configuration from centralized file
-from src.config import SECRET_KEY, ALGORITHM, MONGODB_URI, firebase_json_path
+from src.config import SECRET_KEY, ALGORITHM, MONGODB_URI, firebase_json_path, VOTE_BUFFER_ENABLED
 from src.authentication.auth_controller import router as auth_router, get_current_user
 from src.analytics.analytics_controller import router as analytics_router
 from src.notifications.fcm_controller import router as fcm_router
 from src.polls.poll_controller import router as poll_router
 from src.feedback.feedback_controller import router as feedback_router
 from src.voting.voting_controller import router as voting_router
-from src.shared import templates, polls_collection
-from src.websockets.connection_manager import ConnectionManager
+from src.voting.vote_buffer import vote_buffer
+from src.voting.vote_counters import resolve_counts
+from src.shared import templates, stream_template
+from src.polls.listing import all_polls
+from src.polls.repository import poll_repository
+from src.polls.expiry import expiry_scheduler
+from src.notifications.email_outbox import email_outbox
+from src.analytics.charts import chart_renderer
+from src.analytics.timeline import timeline_recorder
+from src.websockets.connection_manager import manager
+from src.websockets.tally_publisher import tally_publisher
+from src.websockets.tally_frames import negotiate_encoding, is_resync_request, is_pong
 from src.authentication.utils import initialize_firebase
-from src.database import test_connection, feedback_collection
+from src.authentication.password_hasher import password_hasher
+from src.database import test_connection
+from src.indexes import ensure_indexes
 
 # Initialize Firebase Admin SDK
 initialize_firebase()
 
 # Create an instance of FastAPI
 app = FastAPI()
-manager = ConnectionManager()
 
 # Configure logging
 logging.basicConfig(
@@ -92,25 +102,61 @@ async def read_root(request: Request):
 @app.on_event("startup")
 async def startup_event():
     await test_connection()
-    await feedback_collection.create_index("poll_id")
+    await ensure_indexes()
+    if VOTE_BUFFER_ENABLED:
+        vote_buffer.start()
+    timeline_recorder.start()
+    await manager.start()
+    await tally_publisher.start()
+    await expiry_scheduler.start()
+    email_outbox.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await email_outbox.stop()
+    await expiry_scheduler.stop()
+    # Write out buffered vote increments before the process exits
+    await vote_buffer.stop()
+    await timeline_recorder.stop()
+    await tally_publisher.stop()
+    await manager.shutdown()
+    password_hasher.shutdown()
+    chart_renderer.shutdown()
 
 
 # WebSocket endpoint for poll updates
 @app.websocket("/ws/polls/{poll_id}")
 async def websocket_endpoint(websocket: WebSocket, poll_id: str):
-    await manager.connect(websocket)
-    logging.info(f"Client connected to poll {poll_id}")
+    encoding = negotiate_encoding(websocket.query_params.get("encoding"))
+    await manager.connect(websocket, poll_id, encoding)
+    logging.info(f"Client connected to poll {poll_id} ({encoding} frames)")
     try:
+        await tally_publisher.send_snapshot(websocket, poll_id)
         while True:
-            data = await websocket.receive_text()
+            # Tallies are pushed by the vote path; clients only answer pings and ask for a resync
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            # Text or binary, e.g. from a client that also speaks MessagePack
+            data = message["text"] if message.get("text") is not None else message.get("bytes")
+            manager.touch(websocket, poll_id)
+            if is_pong(data):
+                continue
             logging.debug(f"Received data: {data}")
-            await manager.broadcast(f"Poll {poll_id} update: {data}")
+            if is_resync_request(data):
+                await tally_publisher.send_snapshot(websocket, poll_id)
     except WebSocketDisconnect:
         logging.info(f"Client disconnected from poll {poll_id}")
     except Exception as e:
         logging.error(f"Unexpected error: {e}")
     finally:
-        manager.disconnect(websocket)
+        manager.disconnect(websocket, poll_id)
+        tally_publisher.release(poll_id)
+
+@app.get("/ws/stats")
+async def websocket_stats():
+    """Reports live and reaped WebSocket connections, their memory, fan-out drop/eviction counters and tally coalescing."""
+    return {**manager.stats(), "tally_broadcasts": tally_publisher.scheduler.stats()}
 
 # Other endpoints for serving HTML pages
 @app.get("/login", response_class=HTMLResponse)
@@ -122,17 +168,10 @@ async def read_register(request: Request):
     return templates.TemplateResponse("register.html", {"request": request})
 
 @app.get("/polls", response_class=HTMLResponse)
-async def read_polls(request: Request, current_user: dict = Depends(get_current_user)):
+async def read_polls(request: Request, after: str = None, current_user: dict = Depends(get_current_user)):
     logging.debug(f"Current user: {current_user}")
-    try:
-        polls_cursor = polls_collection.find({})
-        polls = await polls_cursor.to_list(length=100)
-        logging.debug(f"Polls retrieved: {polls}")
-    except Exception as e:
-        logging.error(f"Error fetching polls: {e}")
-        raise HTTPException(status_code=500, detail="Unable to fetch polls at this time")
-
-    return templates.TemplateResponse("polls.html", {"request": request, "polls": polls, "current_user": current_user})
+    polls = await all_polls(after).load()
+    return stream_template("polls.html", {"request": request, "polls": polls, "current_user": current_user})
 
 @app.get("/feedback", response_class=HTMLResponse)
 async def read_feedback(request: Request):
@@ -140,9 +179,10 @@ async def read_feedback(request: Request):
 
 @app.get("/analytics/{poll_id}", response_class=HTMLResponse)
 async def analytics_dashboard(request: Request, poll_id: str, current_user: dict = Depends(get_current_user)):
-    poll = await polls_collection.find_one({"_id": ObjectId(poll_id)})
+    poll = await poll_repository.get_poll(poll_id)
     if not poll:
         raise HTTPException(status_code=404, detail="Poll not found")
+    poll = await resolve_counts(poll)
 
     return templates.TemplateResponse("dashboard.html", {
         "request": request,
@@ -1,50 +1,115 @@
-import matplotlib.pyplot as plt
 from fastapi import APIRouter, HTTPException, Request, Depends
-from fastapi.responses import FileResponse, HTMLResponse
+from fastapi.responses import HTMLResponse, Response
 from bson import ObjectId
-from src.database import database
+from src.database import feedback_collection, polls_collection
+from src.polls.repository import poll_repository
 from src.authentication.auth_controller import get_current_user
+from src.voting.vote_engine import has_voted
+from src.voting.vote_counters import resolve_counts
 from src.shared import templates
-import os
+from src.analytics.charts import chart_renderer, chart_version
+from src.analytics.summary import get_summary, summarize
+from src.analytics.timeline import BUCKET_UNITS, get_timeline
+from src.analytics.creator import creator_analytics
+from src.analytics.export import (
+    EXPORT_FORMATS, EXPORT_PROJECTION, export_creator_records, export_poll_records, export_response,
+)
+from datetime import datetime
 import logging
 router = APIRouter()
 logging.basicConfig(level=logging.DEBUG)
-# MongoDB Collection
-polls_collection = database.get_collection("polls")
-
-feedback_collection = database.get_collection("feedback")
-
 @router.get("/report/{poll_id}")
-async def poll_report(poll_id: str):
+async def poll_report(poll_id: str, request: Request):
     # Find the poll by its ID
-    poll = await polls_collection.find_one({"_id": ObjectId(poll_id)})
+    poll = await poll_repository.get_poll(poll_id)
+    if not poll:
+        raise HTTPException(status_code=404, detail="Poll not found")
+    poll = await resolve_counts(poll)
+
+    # The client's copy is current if its ETag matches this version of the chart
+    title, votes = poll["activity_title"], poll["votes"]
+    etag = f'"{chart_version(title, votes)}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    # Generate the bar chart of poll results, or reuse the cached one
+    png = await chart_renderer.render(poll_id, title, votes)
+    headers["Content-Disposition"] = f'attachment; filename="{poll_id}_report.png"'
+    return Response(content=png, media_type="image/png", headers=headers)
+
+
+@router.get("/summary/{poll_id}")
+async def poll_summary(poll_id: str):
+    """Returns a poll's maintained totals: votes, voters, participation rate, questions and answers."""
+    if not ObjectId.is_valid(poll_id):
+        raise HTTPException(status_code=400, detail="Invalid poll ID format")
+    summary = await get_summary(poll_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Poll not found")
+    return summary
+
+
+@router.get("/timeline/{poll_id}")
+async def poll_timeline(poll_id: str, bucket: str = "minute", size: int = 1, start: datetime = None, end: datetime = None):
+    """
+    Returns the votes per option in time buckets, e.g. ?bucket=second&size=10 for ten-second buckets.
+    :param start: Only count votes cast at or after this time.
+    :param end: Only count votes cast before this time.
+    """
+    if not ObjectId.is_valid(poll_id):
+        raise HTTPException(status_code=400, detail="Invalid poll ID format")
+    if bucket not in BUCKET_UNITS or size < 1:
+        raise HTTPException(status_code=400, detail=f"bucket must be one of {', '.join(BUCKET_UNITS)} and size at least 1")
+    poll = await poll_repository.get_metadata(poll_id)
     if not poll:
         raise HTTPException(status_code=404, detail="Poll not found")
 
-    # Extract options and votes from the poll
-    options = list(poll["votes"].keys())
-    votes = list(poll["votes"].values())
-
-    # Generate the bar chart of poll results
-    plt.figure(figsize=(10, 6))  # Set the figure size for the chart
-    plt.bar(options, votes, color='blue', alpha=0.7)
-    plt.xlabel('Options')
-    plt.ylabel('Votes')
-    plt.title(f"Results for Poll: {poll['activity_title']}")
-    plt.xticks(rotation=45, ha="right")  # Rotate the x-axis labels if needed
-
-    # Define the file path for saving the report
-    report_filename = f"{poll_id}_report.png"
-    plt.tight_layout()  # Adjust the layout for better spacing
-    plt.savefig(report_filename)
-    plt.close()  # Close the plot to release memory
-
-    # Return the report as a downloadable file and clean up after sending
-    try:
-        return FileResponse(path=report_filename, media_type="image/png", filename=report_filename)
-    finally:
-        if os.path.exists(report_filename):
-            os.remove(report_filename)
+    buckets = await get_timeline(poll_id, bucket, size, start, end)
+    return {"poll_id": poll_id, "bucket": bucket, "size": size, "options": poll.get("options", []), "buckets": buckets}
+
+
+@router.get("/creator/me")
+async def my_creator_analytics(after: str = None, current_user: dict = Depends(get_current_user)):
+    """
+    Returns totals, top options and the weekly trend across the current user's polls,
+    with one page of per-poll figures; pass `next` back as `after` for the following page.
+    """
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    return await creator_analytics.get(current_user["username"], after)
+
+
+@router.get("/export")
+async def export_creator_polls(creator: str, format: str = "csv", gzip: bool = False,
+                               current_user: dict = Depends(get_current_user)):
+    """Streams the results, voters and feedback of all of the current user's polls (?creator=me)."""
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    if creator != "me":
+        raise HTTPException(status_code=400, detail="Only creator=me can be exported")
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    username = current_user["username"]
+    return export_response(export_creator_records(username), format, f"{username}_polls", gzip)
+
+
+@router.get("/export/{poll_id}")
+async def export_poll(poll_id: str, format: str = "csv", gzip: bool = False,
+                      current_user: dict = Depends(get_current_user)):
+    """Streams a poll's results, voters and feedback; only its creator may export it."""
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    if not ObjectId.is_valid(poll_id):
+        raise HTTPException(status_code=400, detail="Invalid poll ID format")
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    poll = await polls_collection.find_one({"_id": ObjectId(poll_id)}, {**EXPORT_PROJECTION, "creator": 1})
+    if not poll:
+        raise HTTPException(status_code=404, detail="Poll not found")
+    if poll["creator"] != current_user["username"]:
+        raise HTTPException(status_code=403, detail="Not authorized to export this poll")
+    return export_response(export_poll_records(poll), format, f"{poll_id}_export", gzip)
 
 
 @router.get("/dashboard/{poll_id}", response_class=HTMLResponse)
@@ -58,10 +123,11 @@ async def view_dashboard(poll_id: str, request: Request, current_user: dict = De
 
 
         # Retrieve the poll
-        poll = await polls_collection.find_one({"_id": ObjectId(poll_id)})
+        poll = await poll_repository.get_poll(poll_id)
         if not poll:
             logging.error(f"Poll {poll_id} not found")
             raise HTTPException(status_code=404, detail="Poll not found")
+        poll = await resolve_counts(poll)
 
         # Determine the user (authenticated or guest)
         guest_email = request.query_params.get("email")
@@ -69,41 +135,30 @@ async def view_dashboard(poll_id: str, request: Request, current_user: dict = De
 
         # Authorization checks
         is_creator = current_user and current_user.get("username") == poll["creator"]
-        is_voter = user_id in poll.get("voters", [])
         is_participant = user_id in poll.get("participants", [])
         is_public = poll.get("is_public", True)
+        authorized = is_creator or is_participant or is_public or await has_voted(poll_id, user_id)
 
-        if not (is_creator or is_voter or is_participant or is_public):
+        if not authorized:
             logging.warning(f"Unauthorized access to dashboard for poll ID: {poll_id}")
             raise HTTPException(status_code=403, detail="Not authorized to view this dashboard")
-        if is_voter and user_id not in poll.get("voters", []):
-            await polls_collection.update_one(
-                {"_id": ObjectId(poll_id)},
-                {"$addToSet": {"voters": user_id}}
-            )
 
-                # Calculate analytics
+        # Totals come from the poll's maintained summary
+        summary = await summarize(poll)
         if poll["type"] == "q_and_a":
-            total_questions = len(poll.get("questions", []))
-            total_answers = sum(len(q.get("answers", [])) for q in poll.get("questions", []))
             analytics_data = {
-                "total_questions": total_questions,
-                "total_answers": total_answers,
+                "total_questions": summary["question_count"],
+                "total_answers": summary["answer_count"],
                 "questions": poll.get("questions", [])
             }
         else:
-            total_votes = sum(poll.get("votes", {}).values())
             analytics_data = {
-                "total_votes": total_votes,
+                "total_votes": summary["total_votes"],
                 "option_votes": poll.get("votes", {}),
             }
 
-        participation_rate = (
-            (len(poll.get("voters", [])) / len(poll.get("participants", []))) * 100
-            if poll.get("participants")
-            else 0
-        )
-        voted_users = poll.get("voters", [])
+        voter_count = summary["voter_count"]
+        participation_rate = summary["participation_rate"]
         
         # Fetch feedback for the poll
         feedback = await feedback_collection.find({"poll_id": str(poll_id)}).to_list(length=100)
@@ -123,10 +178,9 @@ async def view_dashboard(poll_id: str, request: Request, current_user: dict = De
                 "total_answers": analytics_data.get("total_answers", 0),
                 "participation_rate": participation_rate,
                 "option_votes": analytics_data.get("option_votes", {}),
-                "voted_users": voted_users,
+                "voter_count": voter_count,
                 "questions": analytics_data.get("questions", []),
                 "feedback": feedback,
-                "voters": poll.get("voters", []),
                 "poll_creator": poll.get("creator"),  # Add this line
                 "current_user": current_user
             },
@@ -0,0 +1,97 @@
+# src/analytics/charts.py
+"""
+Poll result charts for /analytics/report.
+
+Drawing a chart takes matplotlib hundreds of milliseconds of CPU, so charts are
+rendered in a small pool of worker processes, never on the event loop. The workers use
+the object-oriented Figure API with the Agg canvas rather than pyplot's global state,
+and return the PNG as bytes without touching the disk.
+
+Rendered charts are cached per (poll_id, version). The version is a digest of
+everything the chart shows, so it doubles as the ETag: a client that already has the
+current chart gets a 304, and any vote or title change produces a new version.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+from matplotlib.figure import Figure
+from src.cache import TTLCache
+from src.config import CHART_RENDER_WORKERS, CHART_CACHE_MAX_ENTRIES
+import asyncio
+import hashlib
+import io
+import json
+import multiprocessing
+
+
+def render_bar_chart(title: str, votes: Dict[str, int]) -> bytes:
+    """Draws the votes per option as a PNG bar chart. Runs in a worker process."""
+    figure = Figure(figsize=(10, 6))
+    axes = figure.subplots()
+    axes.bar(list(votes.keys()), list(votes.values()), color="blue", alpha=0.7)
+    axes.set_xlabel("Options")
+    axes.set_ylabel("Votes")
+    axes.set_title(f"Results for Poll: {title}")
+    for label in axes.get_xticklabels():  # Rotate the x-axis labels if needed
+        label.set_rotation(45)
+        label.set_horizontalalignment("right")
+    figure.tight_layout()
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format="png")
+    return buffer.getvalue()
+
+
+def chart_version(title: str, votes: Dict[str, int]) -> str:
+    """Digest of the chart's contents; equal versions render identical charts."""
+    content = json.dumps([title, list(votes.items())], separators=(",", ":"))
+    return hashlib.sha1(content.encode()).hexdigest()[:20]
+
+
+class ChartRenderer:
+    def __init__(self, workers: int, cache: TTLCache):
+        """
+        :param workers: Processes rendering charts; started on the first render.
+        :param cache: Holds PNG bytes keyed by (poll_id, version).
+        """
+        self.workers = workers
+        self.cache = cache
+        self.executor: Optional[ProcessPoolExecutor] = None
+        # Renders in progress, shared by concurrent requests for the same chart
+        self.pending: Dict[tuple, asyncio.Future] = {}
+        self.rendered = 0
+
+    async def render(self, poll_id: str, title: str, votes: Dict[str, int]) -> bytes:
+        """Returns the chart's PNG, rendering it only if this version is not cached."""
+        key = (poll_id, chart_version(title, votes))
+        png = self.cache.get(key)
+        if png is not None:
+            return png
+
+        future = self.pending.get(key)
+        if future is None:
+            if self.executor is None:
+                # Spawned rather than forked, as the parent runs an event loop and threads
+                self.executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            loop = asyncio.get_running_loop()
+            future = asyncio.ensure_future(loop.run_in_executor(self.executor, render_bar_chart, title, votes))
+            self.pending[key] = future
+            future.add_done_callback(lambda done: self._finish(key, done))
+        # A client going away must not cancel the render for the others waiting on it
+        return await asyncio.shield(future)
+
+    def _finish(self, key: tuple, future: asyncio.Future):
+        del self.pending[key]
+        if not future.cancelled() and future.exception() is None:
+            self.rendered += 1
+            self.cache.set(key, future.result())
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def stats(self) -> dict:
+        return {"rendered": self.rendered, "in_progress": len(self.pending), "cache": self.cache.stats()}
+
+
+# Entries never go stale (a new tally is a new key); old versions age out of the LRU
+chart_renderer = ChartRenderer(CHART_RENDER_WORKERS, TTLCache(CHART_CACHE_MAX_ENTRIES, float("inf")))
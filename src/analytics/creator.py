@@ -0,0 +1,167 @@
+# src/analytics/creator.py
+"""
+Analytics across all polls of one creator, computed by two aggregations.
+
+Both pipelines select the creator's polls through the (creator, _id) index and
+reduce each poll to a few numbers (its `votes` map is turned into an array with
+`$objectToArray` to total it and pick its leading option). The overview pipeline
+reads every poll of the creator once and splits into a `$facet`:
+- totals: polls, votes, voters and average participation over every poll,
+- top_options: the options with the most votes across all polls,
+- trend: polls created and votes received per week.
+The polls pipeline reads only one page of per-poll figures, newest first, paged by
+`_id` like the poll listings (see src/polls/listing.py).
+Closed polls are counted from their frozen results. Polls with sharded counters are
+counted from their embedded tally only, which leaves out votes still held in shards.
+
+The overview is cached per creator and each page per (creator, page) for
+CREATOR_ANALYTICS_CACHE_TTL_SECONDS, so paging through the polls does not rerun the
+overview and a creator reloading the page runs neither pipeline.
+"""
+from typing import Optional
+from src.cache import TTLCache
+from src.config import POLLS_PAGE_SIZE, CREATOR_ANALYTICS_CACHE_MAX_ENTRIES, CREATOR_ANALYTICS_CACHE_TTL_SECONDS
+from src.database import polls_collection
+from src.polls.listing import parse_page_token
+
+TOP_OPTIONS = 10
+
+
+def poll_figures() -> list:
+    """Stages reducing each poll to a few numbers."""
+    return [
+        {"$project": {
+            "activity_title": 1,
+            "type": 1,
+            "status": 1,
+            "created_at": {"$ifNull": ["$created_at", {"$toDate": "$_id"}]},
+            "options": {"$objectToArray": {"$ifNull": ["$results.votes", {"$ifNull": ["$votes", {}]}]}},
+            "voter_count": {"$ifNull": ["$results.voter_count", {"$ifNull": ["$voter_count", 0]}]},
+            "participant_count": {"$size": {"$ifNull": ["$participants", []]}},
+        }},
+        {"$addFields": {
+            "total_votes": {"$sum": "$options.v"},
+            "top_votes": {"$max": "$options.v"},
+            "participation_rate": {"$cond": [
+                {"$gt": ["$participant_count", 0]},
+                {"$multiply": [{"$divide": ["$voter_count", "$participant_count"]}, 100]},
+                None,
+            ]},
+        }},
+        {"$addFields": {
+            "top_option": {"$arrayElemAt": [
+                {"$filter": {"input": "$options", "as": "option", "cond": {"$eq": ["$$option.v", "$top_votes"]}}},
+                0,
+            ]},
+        }},
+    ]
+
+
+def overview_pipeline(creator: str) -> list:
+    """Totals, top options and weekly trend over all of a creator's polls."""
+    return [
+        {"$match": {"creator": creator}},
+        *poll_figures(),
+        {"$facet": {
+            "totals": [
+                {"$group": {
+                    "_id": None,
+                    "polls": {"$sum": 1},
+                    "total_votes": {"$sum": "$total_votes"},
+                    "voter_count": {"$sum": "$voter_count"},
+                    "average_participation_rate": {"$avg": "$participation_rate"},
+                }},
+                {"$project": {"_id": 0}},
+            ],
+            "top_options": [
+                {"$unwind": "$options"},
+                {"$group": {"_id": "$options.k", "votes": {"$sum": "$options.v"}, "polls": {"$sum": 1}}},
+                {"$sort": {"votes": -1, "_id": 1}},
+                {"$limit": TOP_OPTIONS},
+                {"$project": {"_id": 0, "option": "$_id", "votes": 1, "polls": 1}},
+            ],
+            "trend": [
+                {"$group": {
+                    "_id": {"$dateTrunc": {"date": "$created_at", "unit": "week"}},
+                    "polls": {"$sum": 1},
+                    "total_votes": {"$sum": "$total_votes"},
+                }},
+                {"$sort": {"_id": 1}},
+                {"$project": {"_id": 0, "week": "$_id", "polls": 1, "total_votes": 1}},
+            ],
+        }},
+    ]
+
+
+def polls_pipeline(creator: str, after=None, page_size: int = POLLS_PAGE_SIZE) -> list:
+    """One page of per-poll figures, newest first, starting below the `after` poll id."""
+    match = {"creator": creator}
+    if after is not None:
+        match["_id"] = {"$lt": after}
+    return [
+        {"$match": match},
+        # Newest first straight from the (creator, _id) index, reading only the page
+        {"$sort": {"_id": -1}},
+        # One extra poll tells whether there is a following page
+        {"$limit": page_size + 1},
+        *poll_figures(),
+        {"$project": {
+            "_id": 0,
+            "poll_id": {"$toString": "$_id"},
+            "activity_title": 1,
+            "type": 1,
+            "status": 1,
+            "created_at": 1,
+            "total_votes": 1,
+            "voter_count": 1,
+            "participation_rate": 1,
+            "top_option": {"option": "$top_option.k", "votes": "$top_option.v"},
+        }},
+    ]
+
+
+class CreatorAnalytics:
+    def __init__(self, collection, cache: TTLCache, page_size: int = POLLS_PAGE_SIZE):
+        self.collection = collection
+        self.cache = cache
+        self.page_size = page_size
+
+    async def get(self, creator: str, after: Optional[str] = None) -> dict:
+        """
+        Returns a creator's totals, top options and weekly trend, with one page of their polls.
+        :param after: `next` token of the previous page, None for the first page.
+        """
+        overview = self.cache.get(creator)
+        if overview is None:
+            result = (await self.collection.aggregate(overview_pipeline(creator)).to_list(length=1))[0]
+            overview = {
+                "totals": result["totals"][0] if result["totals"] else {
+                    "polls": 0, "total_votes": 0, "voter_count": 0, "average_participation_rate": None,
+                },
+                "top_options": result["top_options"],
+                "trend": result["trend"],
+            }
+            self.cache.set(creator, overview)
+
+        key = (creator, after)
+        page = self.cache.get(key)
+        if page is None:
+            pipeline = polls_pipeline(creator, parse_page_token(after), self.page_size)
+            polls = await self.collection.aggregate(pipeline).to_list(length=None)
+            next_token = None
+            if len(polls) > self.page_size:
+                polls = polls[:self.page_size]
+                next_token = polls[-1]["poll_id"]
+            page = {"polls": polls, "next": next_token}
+            self.cache.set(key, page)
+
+        return {"creator": creator, **overview, **page}
+
+    def stats(self) -> dict:
+        return self.cache.stats()
+
+
+creator_analytics = CreatorAnalytics(
+    polls_collection,
+    TTLCache(CREATOR_ANALYTICS_CACHE_MAX_ENTRIES, CREATOR_ANALYTICS_CACHE_TTL_SECONDS),
+)
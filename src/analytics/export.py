@@ -0,0 +1,145 @@
+# src/analytics/export.py
+"""
+Streaming export of poll results, voters and feedback as CSV or NDJSON.
+
+Records are read from MongoDB cursors one batch at a time, encoded, optionally
+gzipped on the fly and handed to a StreamingResponse in chunks of about
+EXPORT_CHUNK_BYTES. Nothing is collected in memory, so an export of a poll with a
+million ballots needs no more memory than one with ten.
+
+Every record has a "record" field telling what it is:
+- result:   one per option, with its vote count (frozen results for closed polls),
+- voter:    one per ballot, with the option and time of the vote,
+- feedback: one per comment.
+CSV exports use the union of all fields as columns and leave the others empty. Text
+that a spreadsheet would run as a formula (poll titles, options, comments and voter
+ids are all user input) is prefixed with a quote in CSV cells.
+"""
+from datetime import datetime
+from typing import AsyncIterator
+from bson import ObjectId
+from fastapi.responses import StreamingResponse
+from src.config import EXPORT_BATCH_SIZE
+from src.database import polls_collection, ballots_collection, feedback_collection
+from src.voting.vote_counters import resolve_counts
+import csv
+import io
+import json
+import zlib
+
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+EXPORT_FIELDS = [
+    "record", "poll_id", "activity_title", "option", "votes",
+    "voter_id", "voted_at", "commenter", "comment", "created_at",
+]
+EXPORT_CHUNK_BYTES = 64 * 1024
+# Leading characters that make spreadsheets treat a cell as a formula
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+# Everything export_poll_records needs from a poll document
+EXPORT_PROJECTION = {
+    "activity_title": 1, "votes": 1, "voter_count": 1, "results": 1, "counter_layout": 1, "counter_shards": 1,
+}
+
+
+def plain(value):
+    """Turns BSON values into text or JSON-native values."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    return value
+
+
+def csv_cell(value):
+    """Neutralises text a spreadsheet would evaluate as a formula."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+async def export_poll_records(poll: dict) -> AsyncIterator[dict]:
+    """Yields the result, voter and feedback records of one poll."""
+    poll_id = str(poll["_id"])
+    title = poll.get("activity_title")
+    counts = await resolve_counts(poll)
+    for option, votes in (counts.get("votes") or {}).items():
+        yield {"record": "result", "poll_id": poll_id, "activity_title": title, "option": option, "votes": votes}
+
+    ballots = (
+        ballots_collection.find({"poll_id": poll_id}, {"_id": 0, "voter_id": 1, "option": 1, "voted_at": 1})
+        .sort("voted_at", 1)
+        .batch_size(EXPORT_BATCH_SIZE)
+    )
+    async for ballot in ballots:
+        yield {"record": "voter", "poll_id": poll_id, "option": ballot.get("option"),
+               "voter_id": ballot["voter_id"], "voted_at": plain(ballot.get("voted_at"))}
+
+    feedback = feedback_collection.find(
+        {"poll_id": poll_id}, {"_id": 0, "commenter": 1, "comment": 1, "created_at": 1}
+    ).batch_size(EXPORT_BATCH_SIZE)
+    async for comment in feedback:
+        yield {"record": "feedback", "poll_id": poll_id, "commenter": comment.get("commenter"),
+               "comment": comment.get("comment"), "created_at": plain(comment.get("created_at"))}
+
+
+async def export_creator_records(creator: str) -> AsyncIterator[dict]:
+    """Yields the records of every poll of a creator, newest poll first."""
+    polls = (
+        polls_collection.find({"creator": creator}, EXPORT_PROJECTION)
+        .sort("_id", -1)
+        .batch_size(EXPORT_BATCH_SIZE)
+    )
+    async for poll in polls:
+        async for record in export_poll_records(poll):
+            yield record
+
+
+async def encode_records(records: AsyncIterator[dict], export_format: str) -> AsyncIterator[bytes]:
+    """Encodes records as CSV (with a header row) or NDJSON, in chunks of about EXPORT_CHUNK_BYTES."""
+    buffer = io.StringIO()
+    if export_format == "csv":
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+
+        def write(record: dict):
+            writer.writerow({field: csv_cell(value) for field, value in record.items()})
+    else:
+        def write(record: dict):
+            buffer.write(json.dumps(record, default=plain, separators=(",", ":")))
+            buffer.write("\n")
+
+    async for record in records:
+        write(record)
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Compresses a byte stream into a gzip file as it passes through."""
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_response(records: AsyncIterator[dict], export_format: str, filename: str, gzip: bool = False) -> StreamingResponse:
+    """Streams records as a downloadable CSV or NDJSON file, gzipped if asked to."""
+    body = encode_records(records, export_format)
+    filename = f"{filename}.{export_format}"
+    media_type = EXPORT_FORMATS[export_format]
+    if gzip:
+        body = gzip_chunks(body)
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
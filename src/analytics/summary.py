@@ -0,0 +1,157 @@
+# src/analytics/summary.py
+"""
+Materialized analytics summary of each poll.
+
+Every poll document carries a small `summary` subdocument:
+    {"total_votes", "voter_count", "participant_count", "question_count",
+     "answer_count", "last_vote_at", "built_at"}
+(`last_vote_at` only appears with the first vote.)
+It is maintained by the same update that records a vote, question or answer, so it is
+always consistent with the poll without a transaction, and dashboards read it instead
+of summing tallies and answer lists on every page load: pages that already loaded the
+poll pass it to `summarize`, others call `get_summary`. The participation rate is
+derived from the summary when read.
+
+Votes on polls with sharded counters go to the vote_counters shards instead of the poll
+document (see src/voting/vote_counters.py); their counts are added from the shards
+when the summary is read.
+
+Polls created before summaries existed have none and get one built on first read.
+To recompute summaries from the polls, ballots and vote counters, run:
+    python -m src.analytics.summary [poll_id ...]
+Like the voter migration, run it while voting is paused: a vote landing between the
+recount and the write would be missing from the summary.
+"""
+from datetime import datetime, timezone
+from typing import List, Optional
+from bson import ObjectId
+from pymongo import DESCENDING
+from src.database import polls_collection, ballots_collection, vote_counters_collection, test_connection
+from src.voting.vote_counters import is_sharded
+import asyncio
+import logging
+import sys
+
+SUMMARY_FIELDS = {"summary": 1, "counter_layout": 1}
+
+
+def initial_summary(participants: List[str]) -> dict:
+    """Summary of a newly created poll."""
+    return {
+        "total_votes": 0,
+        "voter_count": 0,
+        "participant_count": len(participants),
+        "question_count": 0,
+        "answer_count": 0,
+        "built_at": datetime.now(timezone.utc),
+    }
+
+
+def vote_increments(count: int) -> dict:
+    """`$inc` fields recording `count` votes, one per voter."""
+    return {"summary.total_votes": count, "summary.voter_count": count}
+
+
+def last_vote(at: datetime) -> dict:
+    """`$max` field recording the time of the latest vote."""
+    return {"summary.last_vote_at": at}
+
+
+async def get_summary(poll_id: str) -> Optional[dict]:
+    """
+    Reads a poll's summary, with the participation rate in percent.
+    :return: The summary, or None if the poll does not exist.
+    """
+    poll = await polls_collection.find_one({"_id": ObjectId(poll_id)}, SUMMARY_FIELDS)
+    if not poll:
+        return None
+    summary = poll.get("summary")
+    if not summary or "built_at" not in summary:
+        summary = await rebuild_summary(poll_id)
+    if is_sharded(poll):
+        summary = await add_shard_counts(poll_id, summary)
+    return with_participation_rate(summary)
+
+
+async def summarize(poll: dict) -> dict:
+    """
+    Summary of a poll document already read and passed through `resolve_counts`, with
+    the participation rate in percent. Reads nothing unless the poll has no summary yet.
+    Sharded polls take their totals from the resolved tally; their `last_vote_at` leaves
+    out votes still held in shards (`get_summary` includes them).
+    """
+    summary = poll.get("summary")
+    if not summary or "built_at" not in summary:
+        summary = await rebuild_summary(str(poll["_id"]))
+    if is_sharded(poll):
+        summary = {**summary, "total_votes": sum(poll.get("votes", {}).values()), "voter_count": poll.get("voter_count", 0)}
+    return with_participation_rate(summary)
+
+
+def with_participation_rate(summary: dict) -> dict:
+    summary = {key: value for key, value in summary.items() if key != "built_at"}
+    summary.setdefault("last_vote_at", None)
+    participants = summary["participant_count"]
+    summary["participation_rate"] = summary["voter_count"] / participants * 100 if participants else 0
+    return summary
+
+
+async def add_shard_counts(poll_id: str, summary: dict) -> dict:
+    """Adds the votes recorded in the poll's counter shards to its summary."""
+    summary = dict(summary)
+    async for shards in vote_counters_collection.aggregate([
+        {"$match": {"poll_id": poll_id}},
+        {"$group": {"_id": None, "voter_count": {"$sum": "$voter_count"}, "last_vote_at": {"$max": "$last_vote_at"}}},
+    ]):
+        summary["total_votes"] += shards["voter_count"]
+        summary["voter_count"] += shards["voter_count"]
+        latest = max(filter(None, [summary.get("last_vote_at"), shards["last_vote_at"]]), default=None)
+        if latest:
+            summary["last_vote_at"] = latest
+    return summary
+
+
+async def rebuild_summary(poll_id: str) -> Optional[dict]:
+    """
+    Recomputes a poll's summary from its tally, ballots and questions and stores it.
+    Like the stored summary, the result leaves out votes held in counter shards.
+    :return: The summary, or None if the poll does not exist.
+    """
+    poll = await polls_collection.find_one(
+        {"_id": ObjectId(poll_id)},
+        {"votes": 1, "voter_count": 1, "participants": 1, "questions": 1},
+    )
+    if not poll:
+        return None
+
+    questions = poll.get("questions") or []
+    latest = await ballots_collection.find_one(
+        {"poll_id": poll_id, "voted_at": {"$ne": None}}, {"voted_at": 1}, sort=[("voted_at", DESCENDING)]
+    )
+    summary = {
+        "total_votes": sum((poll.get("votes") or {}).values()),
+        "voter_count": poll.get("voter_count", 0),
+        "participant_count": len(poll.get("participants") or []),
+        "question_count": len(questions),
+        "answer_count": sum(len(question.get("answers", [])) for question in questions),
+        "built_at": datetime.now(timezone.utc),
+    }
+    if latest:
+        summary["last_vote_at"] = latest["voted_at"]
+    await polls_collection.update_one({"_id": poll["_id"]}, {"$set": {"summary": summary}})
+    return summary
+
+
+async def rebuild_summaries(poll_ids: List[str] = None):
+    """Rebuilds the summaries of the given polls, or of every poll."""
+    await test_connection()
+    query = {"_id": {"$in": [ObjectId(poll_id) for poll_id in poll_ids]}} if poll_ids else {}
+    rebuilt = 0
+    async for poll in polls_collection.find(query, {"_id": 1}):
+        await rebuild_summary(str(poll["_id"]))
+        rebuilt += 1
+    logging.info(f"Summary rebuild finished: {rebuilt} polls rebuilt")
+
+
+if __name__ == "__main__":
+    asyncio.run(rebuild_summaries(sys.argv[1:]))
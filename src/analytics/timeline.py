@@ -0,0 +1,138 @@
+# src/analytics/timeline.py
+"""
+Vote timelines: how many votes each option received per time bucket.
+
+Every ballot already records its option and `voted_at`, so the ballots collection is
+the raw, per-vote event log; the (poll_id, voted_at) index makes a time range of one
+poll's ballots a contiguous index scan. Second-level timelines are bucketed from the
+ballots with `$dateTrunc` inside an aggregation pipeline.
+
+Coarser timelines read the vote_timeline rollups instead: one document per poll and
+minute, {"poll_id", "minute", "counts": {option: n}, "total": n}. A poll open for a
+week has at most about 10,000 of them however many votes it got, so minute, hour and
+day timelines stay cheap. The TimelineRecorder coalesces rollup increments in memory
+and writes them every TIMELINE_FLUSH_MS as one upsert per poll and minute. Increments
+lost in a crash are still in the ballots, and the rollups can be rebuilt from there:
+    python -m src.analytics.timeline [poll_id ...]
+Votes recorded by a running worker while a poll is rebuilt may be counted twice or
+not at all, so rebuild polls that are closed or while voting is paused.
+"""
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from pymongo import UpdateOne
+from src.config import TIMELINE_FLUSH_MS, TIMELINE_MAX_BUCKETS
+from src.database import ballots_collection, polls_collection, vote_timeline_collection, test_connection
+from src.write_behind import WriteBehindBuffer
+import asyncio
+import logging
+import sys
+
+BUCKET_UNITS = ("second", "minute", "hour", "day")
+
+
+def bucket_pipeline(match: dict, unit: str, size: int, count_stages: List[dict]) -> List[dict]:
+    """
+    Groups per-option counts into time buckets.
+    :param count_stages: Stages producing one {"t", "option", "n"} document per time and option.
+    """
+    return [
+        {"$match": match},
+        *count_stages,
+        {"$group": {
+            "_id": {"t": {"$dateTrunc": {"date": "$t", "unit": unit, "binSize": size}}, "option": "$option"},
+            "n": {"$sum": "$n"},
+        }},
+        {"$group": {
+            "_id": "$_id.t",
+            "counts": {"$push": {"k": "$_id.option", "v": "$n"}},
+            "total": {"$sum": "$n"},
+        }},
+        {"$sort": {"_id": 1}},
+        {"$limit": TIMELINE_MAX_BUCKETS},
+        {"$project": {"_id": 0, "t": "$_id", "counts": {"$arrayToObject": "$counts"}, "total": 1}},
+    ]
+
+
+async def get_timeline(poll_id: str, unit: str = "minute", size: int = 1,
+                       start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[dict]:
+    """
+    Returns a poll's votes per option and time bucket, oldest first, without empty buckets.
+    Second buckets are counted from the ballots, coarser ones from the minute rollups.
+    """
+    time_field = "voted_at" if unit == "second" else "minute"
+    window = {"$type": "date"}
+    if start:
+        window["$gte"] = start
+    if end:
+        window["$lt"] = end
+    match = {"poll_id": poll_id, time_field: window}
+
+    if unit == "second":
+        collection = ballots_collection
+        count_stages = [{"$project": {"t": "$voted_at", "option": 1, "n": {"$literal": 1}}}]
+    else:
+        collection = vote_timeline_collection
+        count_stages = [
+            {"$project": {"t": "$minute", "counts": {"$objectToArray": "$counts"}}},
+            {"$unwind": "$counts"},
+            {"$project": {"t": 1, "option": "$counts.k", "n": "$counts.v"}},
+        ]
+    pipeline = bucket_pipeline(match, unit, size, count_stages)
+    return await collection.aggregate(pipeline).to_list(length=None)
+
+
+class TimelineRecorder(WriteBehindBuffer):
+    name = "Timeline recorder"
+
+    def __init__(self, collection, flush_interval_ms: int):
+        super().__init__(collection, flush_interval_ms)
+
+    def record(self, poll_id: str, option: str, count: int = 1, at: datetime = None):
+        """Counts votes towards the minute they were cast in."""
+        minute = (at or datetime.now(timezone.utc)).replace(second=0, microsecond=0)
+        self.increment((poll_id, minute), option, count)
+
+    def build_update(self, key: tuple, options: Dict[str, int], flushed_at: datetime) -> UpdateOne:
+        """One upsert per poll and minute."""
+        poll_id, minute = key
+        return UpdateOne(
+            {"poll_id": poll_id, "minute": minute},
+            {"$inc": {**{f"counts.{option}": n for option, n in options.items()}, "total": sum(options.values())}},
+            upsert=True,
+        )
+
+
+async def rebuild_timeline(poll_id: str):
+    """Recomputes a poll's minute rollups from its ballots, on the server."""
+    await vote_timeline_collection.delete_many({"poll_id": poll_id})
+    await ballots_collection.aggregate([
+        {"$match": {"poll_id": poll_id, "voted_at": {"$type": "date"}}},
+        {"$group": {
+            "_id": {"minute": {"$dateTrunc": {"date": "$voted_at", "unit": "minute"}}, "option": "$option"},
+            "n": {"$sum": 1},
+        }},
+        {"$group": {
+            "_id": "$_id.minute",
+            "counts": {"$push": {"k": "$_id.option", "v": "$n"}},
+            "total": {"$sum": "$n"},
+        }},
+        {"$project": {"_id": 0, "poll_id": poll_id, "minute": "$_id", "counts": {"$arrayToObject": "$counts"}, "total": 1}},
+        {"$merge": {"into": "vote_timeline", "on": ["poll_id", "minute"], "whenMatched": "replace"}},
+    ]).to_list(length=None)
+
+
+async def rebuild_timelines(poll_ids: List[str] = None):
+    """Rebuilds the rollups of the given polls, or of every poll."""
+    await test_connection()
+    if not poll_ids:
+        poll_ids = [str(poll["_id"]) async for poll in polls_collection.find({}, {"_id": 1})]
+    for poll_id in poll_ids:
+        await rebuild_timeline(poll_id)
+    logging.info(f"Timeline rebuild finished: {len(poll_ids)} polls rebuilt")
+
+
+timeline_recorder = TimelineRecorder(vote_timeline_collection, TIMELINE_FLUSH_MS)
+
+
+if __name__ == "__main__":
+    asyncio.run(rebuild_timelines(sys.argv[1:]))
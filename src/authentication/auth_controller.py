@@ -3,7 +3,10 @@ from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
 from fastapi.responses import RedirectResponse
 from datetime import datetime, timezone
 from jose import JWTError, jwt
-from src.authentication.utils import create_access_token, verify_password, hash_password, initialize_firebase
+from pymongo.errors import DuplicateKeyError
+from src.authentication.utils import create_access_token, initialize_firebase
+from src.authentication.user_cache import user_cache
+from src.authentication.password_hasher import password_hasher
 from src.database import database
 import logging
 import os
@@ -39,14 +42,8 @@ async def register_user(username: str = Form(...), email: str = Form(...), passw
     logging.info(f"Attempting to register user: username={username}, email={email}")
 
     try:
-        # Check if the user already exists
-        existing_user = await users_collection.find_one({"$or": [{"username": username}, {"email": email}]})
-        if existing_user:
-            logging.warning(f"User already exists: username={username}, email={email}")
-            return RedirectResponse(url="/login?message=Already%20registered", status_code=303)
-
         # Hash the password
-        hashed_password = hash_password(password)
+        hashed_password = await password_hasher.hash(password)
         logging.debug(f"Hashed password: {hashed_password}")
 
         # Prepare user data
@@ -58,11 +55,16 @@ async def register_user(username: str = Form(...), email: str = Form(...), passw
         }
         logging.debug(f"Prepared user data for insertion: {new_user}")
 
-        # Insert the user into the database
-        result = await users_collection.insert_one(new_user)
+        # Insert the user into the database; the unique username and email indexes reject existing users
+        try:
+            result = await users_collection.insert_one(new_user)
+        except DuplicateKeyError:
+            logging.warning(f"User already exists: username={username}, email={email}")
+            return RedirectResponse(url="/login?message=Already%20registered", status_code=303)
         logging.debug(f"Insert operation result: {result.inserted_id}")
         if not result.inserted_id:
             raise ValueError("Insert operation returned no ID.")
+        user_cache.invalidate_user(username)
 
         logging.info(f"User registered successfully: username={username}")
 
@@ -77,6 +79,8 @@ async def register_user(username: str = Form(...), email: str = Form(...), passw
         )
         return response
 
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error during registration: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="An error occurred during registration")
@@ -98,10 +102,14 @@ async def login_user(form_data: OAuth2PasswordRequestForm = Depends()):
             raise HTTPException(status_code=400, detail="Invalid credentials")
 
         # Verify the password
-        if not verify_password(form_data.password, user["hashed_password"]):
+        if not await password_hasher.verify(form_data.password, user["hashed_password"]):
             logging.warning(f"Login failed: incorrect password for user {form_data.username}")
             raise HTTPException(status_code=400, detail="Invalid credentials")
 
+        # Upgrade the stored hash if BCRYPT_ROUNDS changed since it was made
+        if password_hasher.needs_rehash(user["hashed_password"]):
+            await rehash_password(user, form_data.password)
+
         # Generate and return JWT token
         token = create_access_token(data={"sub": user["username"]})
         response = RedirectResponse(url="/polls", status_code=303)
@@ -114,14 +122,34 @@ async def login_user(form_data: OAuth2PasswordRequestForm = Depends()):
         logging.info(f"User logged in successfully: {form_data.username}")
         return response
 
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error during login for user {form_data.username}: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="An error occurred during login")
 
 
+async def rehash_password(user: dict, password: str):
+    """
+    Stores a new hash of a just-verified password made with the current cost factor.
+    Failing to do so does not fail the login; the next login tries again.
+    """
+    try:
+        hashed_password = await password_hasher.hash(password)
+        await users_collection.update_one(
+            {"_id": user["_id"], "hashed_password": user["hashed_password"]},
+            {"$set": {"hashed_password": hashed_password}},
+        )
+        user_cache.invalidate_user(user["username"])
+        logging.info(f"Rehashed password of user {user['username']} with cost factor {password_hasher.rounds}")
+    except Exception as e:
+        logging.warning(f"Could not rehash password of user {user['username']}: {e}")
+
+
 async def get_current_user(request: Request):
     """
     Retrieves the authenticated user using the JWT token from the cookies.
+    Verified tokens and user documents are served from user_cache when possible.
     """
     token = request.cookies.get("Authorization")
     if not token or not token.startswith("Bearer "):
@@ -130,16 +158,23 @@ async def get_current_user(request: Request):
     try:
         # Decode and validate the token
         token = token[7:]  # Remove "Bearer " prefix
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username = payload.get("sub")
-        if not username:
-            logging.warning("Token is missing 'sub' claim.")
-            return None
-        # Retrieve the user from the database
-        user = await users_collection.find_one({"username": username})
-        if not user:
-            logging.warning("User not found in the database.")
-            return None
+        username = user_cache.get_username(token)
+        if username is None:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            username = payload.get("sub")
+            if not username:
+                logging.warning("Token is missing 'sub' claim.")
+                return None
+            user_cache.set_username(token, username, payload.get("exp"))
+
+        user = user_cache.get_user(username)
+        if user is None:
+            # Retrieve the user from the database
+            user = await users_collection.find_one({"username": username})
+            if not user:
+                logging.warning("User not found in the database.")
+                return None
+            user_cache.set_user(username, user)
         return user
 
     except JWTError as e:
@@ -147,6 +182,22 @@ async def get_current_user(request: Request):
         raise HTTPException(status_code=401, detail="Invalid token")
 
 
+@router.get("/cache/stats")
+async def user_cache_stats():
+    """
+    Reports hits and misses of this worker's token and user caches.
+    """
+    return user_cache.stats()
+
+
+@router.get("/hasher/stats")
+async def password_hasher_stats():
+    """
+    Reports this worker's password hashing pool: in-flight and queued work, and rejections.
+    """
+    return password_hasher.stats()
+
+
 @router.get("/users/me")
 async def read_users_me(current_user: dict = Depends(get_current_user)):
     """
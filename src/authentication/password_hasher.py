@@ -0,0 +1,87 @@
+# src/authentication/password_hasher.py
+"""
+Runs bcrypt off the event loop.
+
+A bcrypt hash or check takes a few hundred milliseconds of CPU at the default cost,
+which would stall every WebSocket and vote handled by the worker if run inline.
+PasswordHasher hands the work to a small dedicated thread pool (bcrypt releases the
+GIL while hashing) and caps how many requests may wait for it. Once the pool is
+saturated, new requests are turned away with 503 right away instead of queueing up
+behind minutes of hashing.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
+from src.authentication.utils import hash_password, verify_password
+from src.config import BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE
+import asyncio
+import logging
+
+# Seconds clients are asked to wait before retrying when the pool is saturated
+RETRY_AFTER_SECONDS = 1
+
+
+def hash_rounds(hashed_password: str) -> int:
+    """Reads the cost factor from a bcrypt hash such as "$2b$12$..."."""
+    try:
+        return int(hashed_password.split("$")[2])
+    except (IndexError, ValueError):
+        return 0
+
+
+class PasswordHasher:
+    def __init__(self, rounds: int, workers: int, max_queue: int):
+        """
+        :param rounds: bcrypt cost factor for new hashes.
+        :param workers: Threads hashing in parallel.
+        :param max_queue: Requests allowed to wait for a thread before others get a 503.
+        """
+        self.rounds = rounds
+        self.workers = workers
+        self.max_queue = max_queue
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password, self.rounds)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, password, hashed_password)
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """Tells whether a stored hash was made with a different cost factor than the current one."""
+        return hash_rounds(hashed_password) != self.rounds
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        return {
+            "rounds": self.rounds,
+            "workers": self.workers,
+            "in_flight": min(self.pending, self.workers),
+            "queued": max(self.pending - self.workers, 0),
+            "max_queue": self.max_queue,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    async def _run(self, function, *args):
+        if self.pending >= self.workers + self.max_queue:
+            self.rejected += 1
+            logging.warning(f"Password hashing pool saturated ({self.pending} pending), rejecting request")
+            raise HTTPException(
+                status_code=503,
+                detail="The server is busy, please try again shortly",
+                headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+            )
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+
+password_hasher = PasswordHasher(BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE)
@@ -0,0 +1,52 @@
+# src/authentication/user_cache.py
+"""
+Caches what get_current_user needs for an authenticated request.
+
+Verified token claims are kept by token, so a token's signature is checked once
+rather than on every request, and never outlive the token's own expiry. User
+documents are kept by username. Anything that changes a user document must call
+`invalidate_user` so other requests stop seeing the old copy.
+"""
+from typing import Optional
+from src.cache import TTLCache
+from src.config import USER_CACHE_MAX_ENTRIES, USER_CACHE_TTL_SECONDS
+import time
+
+
+class UserCache:
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.claims = TTLCache(max_entries, ttl_seconds)
+        self.users = TTLCache(max_entries, ttl_seconds)
+
+    def get_username(self, token: str) -> Optional[str]:
+        """Returns the username of an already verified token."""
+        return self.claims.get(token)
+
+    def set_username(self, token: str, username: str, expires_at: Optional[float]):
+        """
+        Remembers the subject of a verified token.
+        :param expires_at: The token's "exp" claim as a Unix timestamp, if any.
+        """
+        ttl = None
+        if expires_at is not None:
+            ttl = expires_at - time.time()
+            if ttl <= 0:
+                return
+        self.claims.set(token, username, ttl)
+
+    def get_user(self, username: str) -> Optional[dict]:
+        user = self.users.get(username)
+        # Callers get their own copy so they cannot change the cached document
+        return dict(user) if user is not None else None
+
+    def set_user(self, username: str, user: dict):
+        self.users.set(username, dict(user))
+
+    def invalidate_user(self, username: str):
+        self.users.invalidate(username)
+
+    def stats(self) -> dict:
+        return {"tokens": self.claims.stats(), "users": self.users.stats()}
+
+
+user_cache = UserCache(USER_CACHE_MAX_ENTRIES, USER_CACHE_TTL_SECONDS)
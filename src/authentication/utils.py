@@ -75,9 +75,10 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> str:
     return verify_token(token)
 
 # Password Functions
-def hash_password(password: str) -> str:
-    logging.debug("Hashing password")
-    salt = bcrypt.gensalt()
+# These block for the duration of the bcrypt work; async code goes through password_hasher.py
+def hash_password(password: str, rounds: int = 12) -> str:
+    logging.debug(f"Hashing password with cost factor {rounds}")
+    salt = bcrypt.gensalt(rounds=rounds)
     hashed = bcrypt.hashpw(password.encode("utf-8"), salt)
     return hashed.decode("utf-8")
 
@@ -0,0 +1,69 @@
+# src/cache.py
+"""
+Bounded in-process cache with least-recently-used eviction and per-entry expiry.
+
+Each worker keeps its own copy; entries are dropped when they expire, when the cache
+is full and they are the least recently used, or when invalidated explicitly.
+"""
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+import time
+
+
+class TTLCache:
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        """
+        :param max_entries: Entries kept before the least recently used one is evicted.
+        :param ttl_seconds: Default lifetime of an entry.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Returns the cached value, or None if it is missing or expired."""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self.entries[key]
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Returns the cached value without refreshing it or counting a lookup, even if expired."""
+        entry = self.entries.get(key)
+        return entry[1] if entry is not None else None
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: float = None):
+        """Stores a value for `ttl_seconds`, or the cache's default lifetime."""
+        if self.max_entries <= 0:
+            return
+        ttl = self.ttl if ttl_seconds is None else min(ttl_seconds, self.ttl)
+        self.entries[key] = (time.monotonic() + ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        self.entries.pop(key, None)
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0,
+        }
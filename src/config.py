@@ -41,3 +41,86 @@ if not firebase_json_path:
 elif not os.path.exists(firebase_json_path):
     logging.critical(f"Firebase Admin JSON file not found at path: {firebase_json_path}")
     raise ValueError("Firebase Admin JSON path is invalid. File does not exist.")
+
+# Write-behind vote aggregation, off unless enabled per deployment
+VOTE_BUFFER_ENABLED = os.getenv("VOTE_BUFFER_ENABLED", "false").lower() == "true"
+VOTE_BUFFER_FLUSH_MS = int(os.getenv("VOTE_BUFFER_FLUSH_MS", "200"))
+VOTE_BUFFER_MAX_PENDING = int(os.getenv("VOTE_BUFFER_MAX_PENDING", "500"))
+
+# Sharded vote counters for polls receiving more votes per second than the promotion rate
+VOTE_SHARD_COUNT = int(os.getenv("VOTE_SHARD_COUNT", "8"))
+VOTE_SHARD_PROMOTION_RATE = int(os.getenv("VOTE_SHARD_PROMOTION_RATE", "50"))
+
+# WebSocket fan-out: per-connection outbound queue size and send timeout before eviction
+WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "32"))
+WS_SEND_TIMEOUT_SECONDS = float(os.getenv("WS_SEND_TIMEOUT_SECONDS", "5"))
+# WebSocket heartbeats: ping interval, and how long a silent connection lives before it is reaped
+WS_HEARTBEAT_INTERVAL_SECONDS = float(os.getenv("WS_HEARTBEAT_INTERVAL_SECONDS", "20"))
+WS_IDLE_TIMEOUT_SECONDS = float(os.getenv("WS_IDLE_TIMEOUT_SECONDS", "60"))
+
+# Live tally delivery to WebSocket viewers: "inprocess" (published by the vote handler) or "changestream"
+TALLY_PUBLISHER = os.getenv("TALLY_PUBLISHER", "inprocess")
+# Fan-out between worker processes: "inprocess" (single worker) or "unix" (workers on one host)
+FANOUT_BUS = os.getenv("FANOUT_BUS", "inprocess")
+FANOUT_BUS_PATH = os.getenv("FANOUT_BUS_PATH", "/tmp/pickify-fanout.sock")
+# Messages the "unix" broker queues per worker before dropping a worker that does not keep up
+FANOUT_RELAY_QUEUE_SIZE = int(os.getenv("FANOUT_RELAY_QUEUE_SIZE", "1000"))
+# Minimum time between two live tally frames for the same poll
+WS_BROADCAST_INTERVAL_MS = int(os.getenv("WS_BROADCAST_INTERVAL_MS", "250"))
+
+# Per-worker cache of verified tokens and user documents used by get_current_user
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+
+# bcrypt cost factor for new password hashes; older hashes are upgraded on the next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Threads hashing passwords, and requests allowed to wait for one before getting a 503
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "16"))
+
+# Polls shown per page on the poll listings
+POLLS_PAGE_SIZE = int(os.getenv("POLLS_PAGE_SIZE", "50"))
+
+# Per-worker cache of poll metadata (title, question, options...) used by PollRepository
+POLL_CACHE_MAX_ENTRIES = int(os.getenv("POLL_CACHE_MAX_ENTRIES", "1000"))
+POLL_CACHE_TTL_SECONDS = float(os.getenv("POLL_CACHE_TTL_SECONDS", "30"))
+# Closed polls with frozen results, kept until evicted as least recently used
+CLOSED_POLL_CACHE_MAX_ENTRIES = int(os.getenv("CLOSED_POLL_CACHE_MAX_ENTRIES", "1000"))
+
+# How often each worker looks for polls about to expire, to close them at their deadline
+POLL_EXPIRY_RESCAN_SECONDS = float(os.getenv("POLL_EXPIRY_RESCAN_SECONDS", "60"))
+
+# Email outbox: sending workers per process, messages per batch and retry policy
+EMAIL_OUTBOX_WORKERS = int(os.getenv("EMAIL_OUTBOX_WORKERS", "2"))
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", "20"))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "5"))
+EMAIL_RETRY_BASE_SECONDS = float(os.getenv("EMAIL_RETRY_BASE_SECONDS", "30"))
+EMAIL_OUTBOX_POLL_SECONDS = float(os.getenv("EMAIL_OUTBOX_POLL_SECONDS", "5"))
+# Open SMTP connections reused by the outbox, and whether to upgrade them with STARTTLS
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "2"))
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
+
+# Push notifications: "firebase" or "fake", tokens per multicast request, and retry policy
+NOTIFICATION_BACKEND = os.getenv("NOTIFICATION_BACKEND", "firebase")
+FCM_BATCH_SIZE = int(os.getenv("FCM_BATCH_SIZE", "500"))
+FCM_MAX_BATCHES_PER_SECOND = float(os.getenv("FCM_MAX_BATCHES_PER_SECOND", "10"))
+FCM_MAX_ATTEMPTS = int(os.getenv("FCM_MAX_ATTEMPTS", "3"))
+FCM_RETRY_BASE_SECONDS = float(os.getenv("FCM_RETRY_BASE_SECONDS", "1"))
+
+# Processes rendering /analytics/report charts, and rendered charts kept in memory
+CHART_RENDER_WORKERS = int(os.getenv("CHART_RENDER_WORKERS", "2"))
+CHART_CACHE_MAX_ENTRIES = int(os.getenv("CHART_CACHE_MAX_ENTRIES", "256"))
+
+# Vote timeline rollups: how often they are written, and buckets returned per timeline
+TIMELINE_FLUSH_MS = int(os.getenv("TIMELINE_FLUSH_MS", "1000"))
+TIMELINE_MAX_BUCKETS = int(os.getenv("TIMELINE_MAX_BUCKETS", "1440"))
+
+# Cross-poll analytics of a creator: cached pages and how long they are reused
+CREATOR_ANALYTICS_CACHE_MAX_ENTRIES = int(os.getenv("CREATOR_ANALYTICS_CACHE_MAX_ENTRIES", "1000"))
+CREATOR_ANALYTICS_CACHE_TTL_SECONDS = float(os.getenv("CREATOR_ANALYTICS_CACHE_TTL_SECONDS", "30"))
+
+# Documents fetched per cursor batch by the CSV/NDJSON exports
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+# Accounts allowed to submit vote batches for any poll, e.g. kiosks; creators may always submit for their own polls
+KIOSK_ACCOUNTS = {name.strip() for name in os.getenv("KIOSK_ACCOUNTS", "").split(",") if name.strip()}
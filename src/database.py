@@ -14,6 +14,10 @@ users_collection = database.get_collection("users")
 polls_collection = database.get_collection("polls")
 feedback_collection = database.get_collection("feedback")
 device_tokens_collection = database.get_collection("device_tokens")
+ballots_collection = database.get_collection("ballots")
+vote_counters_collection = database.get_collection("vote_counters")
+email_outbox_collection = database.get_collection("email_outbox")
+vote_timeline_collection = database.get_collection("vote_timeline")
 
 async def test_connection():
     """Test MongoDB connection."""
@@ -2,8 +2,9 @@ from fastapi import APIRouter, Depends, HTTPException, Form, BackgroundTasks, Re
 from fastapi.responses import RedirectResponse
 from jose import JWTError, jwt
 from src.authentication.auth_controller import get_current_user
-from src.notifications.fcm_manager import send_feedback_notification
-from src.database import database
+from src.notifications.dispatcher import notification_dispatcher
+from src.database import feedback_collection
+from src.polls.repository import poll_repository
 from src.config import SECRET_KEY, ALGORITHM
 from bson import ObjectId
 from typing import List
@@ -22,11 +23,6 @@ def serialize_document(doc):
         return str(doc)
     return doc
 
-# Collections
-feedback_collection = database.get_collection("feedback")
-polls_collection = database.get_collection("polls")
-
-
 # Add Feedback
 @router.post("/add")
 async def add_feedback(
@@ -42,7 +38,7 @@ async def add_feedback(
             raise HTTPException(status_code=400, detail="Invalid poll ID format")
 
         # Retrieve the poll
-        poll = await polls_collection.find_one({"_id": ObjectId(poll_id)})
+        poll = await poll_repository.get_metadata(poll_id)
         if not poll:
             logging.error(f"Poll {poll_id} not found.")
             raise HTTPException(status_code=404, detail="Poll not found")
@@ -77,10 +73,13 @@ async def add_feedback(
             logging.error(f"Failed to insert feedback for poll {poll_id}")
             raise HTTPException(status_code=500, detail="Failed to add feedback")
 
-        # Send notification
+        # Notify the poll creator's devices once the response is sent
         background_tasks.add_task(
-            send_feedback_notification,
-            commenter, poll["activity_title"], poll_id
+            notification_dispatcher.notify_user,
+            poll["creator"],
+            f"New feedback on {poll['activity_title']}",
+            f"{commenter}: {comment[:100]}",
+            {"poll_id": poll_id},
         )
         logging.info(f"Feedback added for poll {poll_id} by {commenter}")
 
@@ -102,7 +101,7 @@ async def list_feedback(poll_id: str, request: Request):
             raise HTTPException(status_code=400, detail="Invalid poll ID format")
 
         # Retrieve the poll
-        poll = await polls_collection.find_one({"_id": ObjectId(poll_id)})
+        poll = await poll_repository.get_metadata(poll_id)
         if not poll:
             logging.error(f"Poll {poll_id} not found.")
             raise HTTPException(status_code=404, detail="Poll not found")
@@ -0,0 +1,105 @@
+# src/indexes.py
+"""
+Registry of the indexes every collection needs.
+
+`ensure_indexes` creates them at startup. It is idempotent: indexes that already exist
+with the same keys and options are left alone. Indexes keep MongoDB's default names
+(e.g. "poll_id_1") so ones created before the registry existed are recognised.
+
+Check a deployment with:
+    python -m src.indexes
+which lists, per collection, registered indexes that are missing, indexes that exist
+but are not registered, and indexes that have not served a single operation since the
+server started (from $indexStats).
+"""
+from typing import Dict, List
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+from src.database import database, test_connection
+import asyncio
+import logging
+import pprint
+
+INDEXES = {
+    "users": [
+        IndexModel([("username", ASCENDING)], unique=True),
+        IndexModel([("email", ASCENDING)], unique=True),
+    ],
+    "polls": [
+        # Listings filter on these and page by _id, newest first
+        IndexModel([("creator", ASCENDING), ("_id", DESCENDING)]),
+        IndexModel([("participants", ASCENDING), ("_id", DESCENDING)]),
+        IndexModel([("status", ASCENDING), ("expires_at", ASCENDING)]),
+    ],
+    "feedback": [
+        IndexModel([("poll_id", ASCENDING)]),
+    ],
+    "device_tokens": [
+        IndexModel([("device_token", ASCENDING)], unique=True),
+        IndexModel([("user_id", ASCENDING)]),
+    ],
+    "ballots": [
+        IndexModel([("poll_id", ASCENDING), ("voter_id", ASCENDING)], unique=True),
+        IndexModel([("poll_id", ASCENDING), ("voted_at", ASCENDING)]),
+    ],
+    "vote_timeline": [
+        IndexModel([("poll_id", ASCENDING), ("minute", ASCENDING)], unique=True),
+    ],
+    "vote_counters": [
+        IndexModel([("poll_id", ASCENDING), ("shard", ASCENDING)], unique=True),
+    ],
+    "email_outbox": [
+        IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)]),
+        # Sent messages are kept for a week
+        IndexModel([("sent_at", ASCENDING)], expireAfterSeconds=7 * 24 * 3600),
+    ],
+}
+
+
+async def ensure_indexes():
+    """
+    Creates every registered index that does not exist yet.
+    An index that cannot be built, e.g. a unique index over existing duplicates, is
+    logged and skipped so the application still starts.
+    """
+    for collection_name, models in INDEXES.items():
+        collection = database.get_collection(collection_name)
+        for model in models:
+            try:
+                await collection.create_indexes([model])
+            except OperationFailure as e:
+                logging.error(f"Could not create index {collection_name}.{model.document['name']}: {e}")
+    logging.info("Indexes ensured")
+
+
+async def index_report() -> Dict[str, Dict[str, List[str]]]:
+    """Lists missing, unregistered and unused indexes per collection."""
+    report = {}
+    for name in sorted(set(INDEXES) | set(await database.list_collection_names())):
+        collection = database.get_collection(name)
+        registered = {model.document["name"] for model in INDEXES.get(name, [])}
+        existing = set((await collection.index_information()).keys()) - {"_id_"}
+        try:
+            usage = {
+                stats["name"]: stats["accesses"]["ops"]
+                async for stats in collection.aggregate([{"$indexStats": {}}])
+            }
+            unused = sorted(index for index in existing if usage.get(index) == 0)
+        except OperationFailure as e:
+            logging.warning(f"Index usage of {name} unavailable: {e}")
+            unused = []
+        report[name] = {
+            "missing": sorted(registered - existing),
+            "unregistered": sorted(existing - registered),
+            "unused": unused,
+        }
+    return report
+
+
+async def main():
+    await test_connection()
+    pprint.pprint(await index_report())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
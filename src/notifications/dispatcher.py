@@ -0,0 +1,200 @@
+# src/notifications/dispatcher.py
+"""
+Push notifications to every device of a user.
+
+The dispatcher resolves a user's device tokens from device_tokens_collection and sends
+them multicast batches of up to FCM_BATCH_SIZE tokens (500 is the Firebase limit). The
+blocking Firebase call runs on a worker thread, batches are spaced out to at most
+FCM_MAX_BATCHES_PER_SECOND, and tokens that failed with a transient error are retried
+with exponential backoff. Tokens that Firebase reports as unregistered belong to
+uninstalled apps or expired registrations and are deleted.
+
+Backends, picked with NOTIFICATION_BACKEND:
+- "firebase": sends through the Firebase Admin SDK (fcm_manager.py).
+- "fake": records batches in memory and sends nothing, for tests and offline use.
+"""
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional
+from firebase_admin import exceptions, messaging
+from src.config import (
+    NOTIFICATION_BACKEND, FCM_BATCH_SIZE, FCM_MAX_BATCHES_PER_SECOND, FCM_MAX_ATTEMPTS, FCM_RETRY_BASE_SECONDS,
+)
+from src.database import device_tokens_collection
+import asyncio
+import logging
+import time
+
+# Errors after which the same token may succeed on a later attempt
+RETRYABLE_ERRORS = (
+    exceptions.UnavailableError,
+    exceptions.InternalError,
+    exceptions.DeadlineExceededError,
+    messaging.QuotaExceededError,
+)
+
+
+class MessagingBackend(ABC):
+    """Base class for push delivery backends."""
+
+    @abstractmethod
+    def send_multicast(self, tokens: List[str], title: str, body: str,
+                       data: Optional[Dict[str, str]] = None) -> List[Optional[Exception]]:
+        """
+        Sends one notification to a batch of devices. Called on a worker thread.
+        :return: One entry per token: None if it was accepted, otherwise the error.
+        """
+
+
+class FirebaseMessagingBackend(MessagingBackend):
+    def send_multicast(self, tokens, title, body, data=None):
+        # Imported here so that the fake backend works without Firebase credentials
+        from src.notifications.fcm_manager import send_multicast
+        return send_multicast(tokens, title, body, data)
+
+
+class FakeMessagingBackend(MessagingBackend):
+    def __init__(self, unregistered: Iterable[str] = (), failures: int = 0):
+        """
+        :param unregistered: Tokens to report as unregistered.
+        :param failures: Number of calls that fail as a whole with UnavailableError before batches go through.
+        """
+        self.unregistered = set(unregistered)
+        self.failures = failures
+        self.batches: List[List[str]] = []
+
+    def send_multicast(self, tokens, title, body, data=None):
+        if self.failures:
+            self.failures -= 1
+            raise exceptions.UnavailableError("FCM is unavailable")
+        self.batches.append(list(tokens))
+        return [
+            messaging.UnregisteredError("Requested entity was not found.") if token in self.unregistered else None
+            for token in tokens
+        ]
+
+
+class RateLimiter:
+    """Spaces calls out to at most `rate` per second."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0
+        self.next_slot = 0.0
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            now = time.monotonic()
+            if self.next_slot > now:
+                await asyncio.sleep(self.next_slot - now)
+            self.next_slot = max(now, self.next_slot) + self.interval
+
+
+class NotificationDispatcher:
+    def __init__(
+        self,
+        backend: MessagingBackend,
+        collection,
+        batch_size: int = FCM_BATCH_SIZE,
+        batches_per_second: float = FCM_MAX_BATCHES_PER_SECOND,
+        max_attempts: int = FCM_MAX_ATTEMPTS,
+        retry_base_seconds: float = FCM_RETRY_BASE_SECONDS,
+    ):
+        """
+        :param collection: The device_tokens collection, with "user_id" and "device_token" fields.
+        :param batch_size: Tokens per multicast request, at most 500.
+        :param retry_base_seconds: Delay before the first retry; doubles with every attempt.
+        """
+        self.backend = backend
+        self.collection = collection
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.limiter = RateLimiter(batches_per_second)
+        self.batches = 0
+        self.delivered = 0
+        self.failed = 0
+        self.retried = 0
+        self.pruned = 0
+
+    async def notify_user(self, user_id: str, title: str, body: str, data: Optional[Dict[str, str]] = None) -> int:
+        """
+        Notifies every registered device of a user.
+        :return: Number of devices the notification was delivered to.
+        """
+        tokens = await self.collection.distinct("device_token", {"user_id": user_id})
+        if not tokens:
+            logging.debug(f"No device tokens registered for user {user_id}")
+            return 0
+        return await self.send(tokens, title, body, data)
+
+    async def send(self, tokens: List[str], title: str, body: str, data: Optional[Dict[str, str]] = None) -> int:
+        """Sends a notification to the given device tokens; returns how many accepted it."""
+        batches = [tokens[start:start + self.batch_size] for start in range(0, len(tokens), self.batch_size)]
+        delivered = await asyncio.gather(*(self._send_batch(batch, title, body, data) for batch in batches))
+        return sum(delivered)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "retried": self.retried,
+            "pruned": self.pruned,
+        }
+
+    async def _send_batch(self, tokens: List[str], title: str, body: str, data: Optional[Dict[str, str]]) -> int:
+        pending = tokens
+        delivered = 0
+        for attempt in range(self.max_attempts):
+            if attempt:
+                self.retried += len(pending)
+                await asyncio.sleep(self.retry_base_seconds * 2 ** (attempt - 1))
+            await self.limiter.acquire()
+            self.batches += 1
+            try:
+                errors = await asyncio.to_thread(self.backend.send_multicast, pending, title, body, data)
+            except RETRYABLE_ERRORS as e:
+                logging.warning(f"Multicast to {len(pending)} devices failed, attempt {attempt + 1}: {e}")
+                continue
+            except exceptions.FirebaseError as e:
+                logging.error(f"Multicast to {len(pending)} devices failed: {e}")
+                break
+
+            retry, unregistered = [], []
+            for token, error in zip(pending, errors):
+                if error is None:
+                    delivered += 1
+                elif isinstance(error, messaging.UnregisteredError):
+                    unregistered.append(token)
+                elif isinstance(error, RETRYABLE_ERRORS):
+                    retry.append(token)
+                else:
+                    self.failed += 1
+                    logging.warning(f"Notification to device {token[:12]}... failed: {error}")
+            if unregistered:
+                await self._prune(unregistered)
+            pending = retry
+            if not pending:
+                break
+
+        if pending:
+            self.failed += len(pending)
+            logging.error(f"Giving up on notifying {len(pending)} devices")
+        self.delivered += delivered
+        return delivered
+
+    async def _prune(self, tokens: List[str]):
+        result = await self.collection.delete_many({"device_token": {"$in": tokens}})
+        self.pruned += result.deleted_count
+        logging.info(f"Removed {result.deleted_count} unregistered device tokens")
+
+
+def create_messaging_backend(name: str) -> MessagingBackend:
+    if name == "firebase":
+        return FirebaseMessagingBackend()
+    if name == "fake":
+        return FakeMessagingBackend()
+    raise ValueError(f"Unknown NOTIFICATION_BACKEND '{name}', expected 'firebase' or 'fake'")
+
+
+notification_dispatcher = NotificationDispatcher(create_messaging_backend(NOTIFICATION_BACKEND), device_tokens_collection)
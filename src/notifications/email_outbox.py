@@ -0,0 +1,202 @@
+# src/notifications/email_outbox.py
+"""
+Persistent outbox for outgoing email.
+
+Request handlers only insert messages into the email_outbox collection, which takes a
+single write. Worker tasks claim pending messages in batches, send each batch over a
+pooled SMTP connection (smtp_pool.py) and record the outcome. A failed message is
+retried with exponential backoff up to EMAIL_MAX_ATTEMPTS times and then marked
+"failed".
+
+A message is claimed by setting status "sending" together with a claim id, so
+workers in different processes never send the same message. A message left in
+"sending" by a worker that died is claimed again once its lease runs out. Sent
+messages are removed by a TTL index after a week (see src/indexes.py).
+"""
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+from typing import List, Optional
+from urllib.parse import quote
+from bson import ObjectId
+from pymongo import ASCENDING, UpdateOne
+from src.authentication.utils import SMTP_SERVER, SMTP_PORT, EMAIL_ADDRESS, EMAIL_PASSWORD
+from src.config import (
+    EMAIL_OUTBOX_WORKERS, EMAIL_BATCH_SIZE, EMAIL_MAX_ATTEMPTS, EMAIL_RETRY_BASE_SECONDS,
+    EMAIL_OUTBOX_POLL_SECONDS, SMTP_POOL_SIZE, SMTP_STARTTLS,
+)
+from src.database import email_outbox_collection
+from src.notifications.smtp_pool import SMTPConnectionPool
+import asyncio
+import logging
+
+PENDING, SENDING, SENT, FAILED = "pending", "sending", "sent", "failed"
+
+# A claimed message not settled within this time is considered abandoned
+CLAIM_LEASE_SECONDS = 300
+MAX_RETRY_DELAY_SECONDS = 3600
+
+
+class EmailOutbox:
+    def __init__(
+        self,
+        collection,
+        pool: SMTPConnectionPool,
+        sender: str,
+        workers: int = EMAIL_OUTBOX_WORKERS,
+        batch_size: int = EMAIL_BATCH_SIZE,
+        max_attempts: int = EMAIL_MAX_ATTEMPTS,
+        retry_base_seconds: float = EMAIL_RETRY_BASE_SECONDS,
+        poll_seconds: float = EMAIL_OUTBOX_POLL_SECONDS,
+    ):
+        """
+        :param pool: SMTP connections the batches are sent over.
+        :param sender: From address of every message.
+        :param workers: Batches sent concurrently by this process.
+        :param retry_base_seconds: Delay before the first retry; doubles with every attempt.
+        :param poll_seconds: How often idle workers look for messages queued by other processes.
+        """
+        self.collection = collection
+        self.pool = pool
+        self.sender = sender
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.poll_seconds = poll_seconds
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self._tasks = []
+        self._wake = asyncio.Event()
+
+    async def enqueue(self, messages: List[dict]):
+        """
+        Queues messages for delivery.
+        :param messages: Dicts with "to", "subject" and "body", plus any fields worth keeping, e.g. "poll_id".
+        """
+        if not messages:
+            return
+        now = datetime.now(timezone.utc)
+        await self.collection.insert_many([
+            {**message, "status": PENDING, "attempts": 0, "next_attempt_at": now, "created_at": now}
+            for message in messages
+        ])
+        self._wake.set()
+
+    async def enqueue_poll_invites(self, poll_id: str, participants: List[str], inviter: str,
+                                   title: str, question: str, poll_url: str):
+        """Queues one invitation per participant, each linking to the poll with their own address."""
+        subject = f"You're invited to participate in a poll: {title}"
+        await self.enqueue([
+            {
+                "poll_id": poll_id,
+                "to": email,
+                "subject": subject,
+                "body": (f"Hi {email},\n\n{inviter} has invited you to participate in a poll: {question}\n"
+                         f"Click the link below to participate:\n{poll_url}?email={quote(email)}\n\n"),
+            }
+            for email in participants
+        ])
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        logging.info(f"Email outbox started with {self.workers} workers")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.pool.close()
+
+    def stats(self) -> dict:
+        return {"sent": self.sent, "retried": self.retried, "failed": self.failed, "smtp": self.pool.stats()}
+
+    async def process_batch(self) -> int:
+        """Claims, sends and settles one batch of due messages; returns how many were claimed."""
+        messages = await self._claim()
+        if not messages:
+            return 0
+
+        errors = await self.pool.send_batch([self._build(message) for message in messages])
+
+        now = datetime.now(timezone.utc)
+        updates = []
+        for message, error in zip(messages, errors):
+            if error is None:
+                self.sent += 1
+                updates.append(UpdateOne(
+                    {"_id": message["_id"]},
+                    {"$set": {"status": SENT, "sent_at": now}, "$unset": {"claim": "", "last_error": ""}},
+                ))
+                continue
+            attempts = message["attempts"] + 1
+            if attempts >= self.max_attempts:
+                self.failed += 1
+                logging.error(f"Giving up on email to {message['to']} after {attempts} attempts: {error}")
+                update = {"status": FAILED}
+            else:
+                self.retried += 1
+                delay = min(self.retry_base_seconds * 2 ** (attempts - 1), MAX_RETRY_DELAY_SECONDS)
+                logging.warning(f"Email to {message['to']} failed, retrying in {delay:.0f}s: {error}")
+                update = {"status": PENDING, "next_attempt_at": now + timedelta(seconds=delay)}
+            updates.append(UpdateOne(
+                {"_id": message["_id"]},
+                {"$set": {**update, "attempts": attempts, "last_error": str(error)}, "$unset": {"claim": ""}},
+            ))
+        await self.collection.bulk_write(updates, ordered=False)
+        return len(messages)
+
+    async def _claim(self) -> List[dict]:
+        now = datetime.now(timezone.utc)
+        due = {
+            "$or": [
+                {"status": PENDING, "next_attempt_at": {"$lte": now}},
+                {"status": SENDING, "claimed_at": {"$lte": now - timedelta(seconds=CLAIM_LEASE_SECONDS)}},
+            ]
+        }
+        candidates = [
+            message["_id"]
+            async for message in self.collection.find(due, {"_id": 1})
+            .sort("next_attempt_at", ASCENDING)
+            .limit(self.batch_size)
+        ]
+        if not candidates:
+            return []
+        # Only the messages still due when the update runs are ours
+        claim = ObjectId()
+        await self.collection.update_many(
+            {"_id": {"$in": candidates}, **due},
+            {"$set": {"status": SENDING, "claim": claim, "claimed_at": now}},
+        )
+        return await self.collection.find({"_id": {"$in": candidates}, "claim": claim}).to_list(length=None)
+
+    def _build(self, message: dict) -> EmailMessage:
+        email = EmailMessage()
+        email["From"] = self.sender
+        email["To"] = message["to"]
+        email["Subject"] = message["subject"]
+        email.set_content(message["body"])
+        return email
+
+    async def _work(self):
+        while True:
+            try:
+                claimed = await self.process_batch()
+            except Exception as e:
+                logging.error(f"Email outbox batch failed: {e}", exc_info=True)
+                claimed = 0
+            if claimed:
+                continue
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+
+email_outbox = EmailOutbox(
+    email_outbox_collection,
+    SMTPConnectionPool(SMTP_SERVER, SMTP_PORT, EMAIL_ADDRESS, EMAIL_PASSWORD, size=SMTP_POOL_SIZE, starttls=SMTP_STARTTLS),
+    EMAIL_ADDRESS,
+)
@@ -1,6 +1,8 @@
 from fastapi import APIRouter, HTTPException
 from src.notifications.fcm_manager import send_notification, subscribe_to_topic
+from src.notifications.dispatcher import notification_dispatcher
 from src.database import device_tokens_collection
+from pymongo.errors import DuplicateKeyError
 from typing import Dict
 from datetime import datetime
 
@@ -16,17 +18,15 @@ async def save_device_token(user_id: str, token: str):
     if not token:
         raise HTTPException(status_code=400, detail="Device token is required")
 
-    # Check if the token already exists
-    existing_token = await device_tokens_collection.find_one({"device_token": token})
-    if existing_token:
+    # Save the device token to the database; the unique device_token index rejects known tokens
+    try:
+        result = await device_tokens_collection.insert_one({
+            "user_id": user_id,
+            "device_token": token,
+            "created_at": datetime.utcnow()
+        })
+    except DuplicateKeyError:
         return {"message": "Token already exists"}
-
-    # Save the device token to the database
-    result = await device_tokens_collection.insert_one({
-        "user_id": user_id,
-        "device_token": token,
-        "created_at": datetime.utcnow()
-    })
     return {"message": "Token saved successfully", "token_id": str(result.inserted_id)}
 
 @router.post("/send-notification")
@@ -67,3 +67,10 @@ async def get_device_tokens(user_id: str):
     """
     tokens = await device_tokens_collection.find({"user_id": user_id}).to_list(length=100)
     return {"tokens": tokens}
+
+@router.get("/dispatcher/stats")
+async def notification_dispatcher_stats():
+    """
+    Reports this worker's push notification batches, deliveries, retries and pruned tokens.
+    """
+    return notification_dispatcher.stats()
@@ -1,6 +1,8 @@
 import firebase_admin
 from firebase_admin import credentials, messaging
-__all__ = ["send_notification_to_device", "send_notification_to_topic", "send_feedback_notification"]
+from typing import Dict, List, Optional
+import asyncio
+__all__ = ["send_notification", "send_multicast", "subscribe_to_topic"]
 
 # Firebase Admin SDK Initialization (Singleton)
 if not firebase_admin._apps:
@@ -23,35 +25,35 @@ async def send_notification(device_token: str, title: str, body: str):
         token=device_token,
     )
     try:
-        response = messaging.send(message)
+        # messaging.send blocks on the HTTP request to Firebase
+        response = await asyncio.to_thread(messaging.send, message)
         return {"message": "Successfully sent message", "response_id": response}
     except messaging.FirebaseError as e:
         raise ValueError(f"Firebase error: {e}")
     except Exception as e:
         raise ValueError(f"An error occurred while sending the notification: {e}")
 
-def send_feedback_notification(device_token, title, body):
+def send_multicast(device_tokens: List[str], title: str, body: str, data: Optional[Dict[str, str]] = None) -> List[Optional[Exception]]:
     """
-    Sends a feedback notification to a specific device.
-    :param device_token: The FCM token of the device.
-    :param title: The title of the notification.
-    :param body: The body of the notification.
+    Sends one notification to up to 500 devices in a single request. Blocking.
+    :param device_tokens: The FCM tokens of the target devices.
+    :param title: Notification title.
+    :param body: Notification body.
+    :param data: Optional key/value payload delivered to the app.
+    :return: One entry per token: None if Firebase accepted it, otherwise the error.
+    :raises FirebaseError: If the request as a whole failed.
     """
-    from firebase_admin import messaging
-
-    message = messaging.Message(
+    message = messaging.MulticastMessage(
         notification=messaging.Notification(
             title=title,
             body=body,
         ),
-        token=device_token,
+        data=data,
+        tokens=device_tokens,
     )
-    try:
-        response = messaging.send(message)
-        print(f"Successfully sent feedback notification: {response}")
-    except Exception as e:
-        print(f"Error sending feedback notification: {e}")
-        raise e
+    # send_multicast used the legacy batch endpoint, which Firebase has shut down
+    response = messaging.send_each_for_multicast(message)
+    return [None if result.success else result.exception for result in response.responses]
 
 
 async def subscribe_to_topic(device_token: str, topic: str):
@@ -62,7 +64,7 @@ async def subscribe_to_topic(device_token: str, topic: str):
     :return: Firebase response.
     """
     try:
-        response = messaging.subscribe_to_topic([device_token], topic)
+        response = await asyncio.to_thread(messaging.subscribe_to_topic, [device_token], topic)
         return {"message": f"Successfully subscribed to topic {topic}", "response": response}
     except messaging.FirebaseError as e:
         raise ValueError(f"Firebase error: {e}")
@@ -0,0 +1,129 @@
+# src/notifications/smtp_pool.py
+"""
+Pool of authenticated SMTP connections.
+
+Opening an SMTP connection means a TCP handshake, STARTTLS and a login, which costs
+far more than sending a message. The pool keeps up to `size` connections open and
+reuses them for batch after batch. smtplib is blocking, so every exchange with the
+server runs on the pool's own threads and never on the event loop.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from email.message import EmailMessage
+from typing import List, Optional
+import asyncio
+import logging
+import smtplib
+import time
+
+# Connections idle for longer than this are checked with NOOP before reuse
+IDLE_CHECK_SECONDS = 30
+
+
+class PooledConnection:
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.last_used = time.monotonic()
+
+
+class SMTPConnectionPool:
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        size: int = 2,
+        starttls: bool = True,
+        timeout: float = 30,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.size = size
+        self.starttls = starttls
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="smtp")
+        self.idle: List[PooledConnection] = []
+        self.slots = asyncio.Semaphore(size)
+        self.connections_opened = 0
+
+    async def send_batch(self, messages: List[EmailMessage]) -> List[Optional[Exception]]:
+        """
+        Sends messages over one pooled connection.
+        :return: One entry per message: None if the server accepted it, otherwise the error.
+        """
+        async with self.slots:
+            connection = self.idle.pop() if self.idle else None
+            loop = asyncio.get_running_loop()
+            connection, results = await loop.run_in_executor(self.executor, self._send, connection, messages)
+            if connection is not None:
+                self.idle.append(connection)
+            return results
+
+    async def close(self):
+        connections, self.idle = self.idle, []
+        loop = asyncio.get_running_loop()
+        for connection in connections:
+            await loop.run_in_executor(self.executor, self._quit, connection)
+        self.executor.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        return {"size": self.size, "idle": len(self.idle), "connections_opened": self.connections_opened}
+
+    def _connect(self) -> PooledConnection:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            smtp.starttls()
+        if self.username and self.password:
+            smtp.login(self.username, self.password)
+        self.connections_opened += 1
+        logging.info(f"Opened SMTP connection to {self.host}:{self.port}")
+        return PooledConnection(smtp)
+
+    def _usable(self, connection: Optional[PooledConnection]) -> Optional[PooledConnection]:
+        if connection is None:
+            return None
+        if time.monotonic() - connection.last_used < IDLE_CHECK_SECONDS:
+            return connection
+        try:
+            if connection.smtp.noop()[0] == 250:
+                return connection
+        except smtplib.SMTPException:
+            pass
+        self._quit(connection)
+        return None
+
+    def _send(self, connection: Optional[PooledConnection], messages: List[EmailMessage]):
+        results: List[Optional[Exception]] = []
+        for index, message in enumerate(messages):
+            try:
+                connection = self._usable(connection) or self._connect()
+            except (smtplib.SMTPException, OSError) as e:
+                # The server cannot be reached; do not try again for every message
+                results.extend([e] * (len(messages) - index))
+                return None, results
+            try:
+                connection.smtp.send_message(message)
+                connection.last_used = time.monotonic()
+                results.append(None)
+            except smtplib.SMTPServerDisconnected as e:
+                # The connection is gone; the next message gets a new one
+                self._quit(connection)
+                connection = None
+                results.append(e)
+            except smtplib.SMTPException as e:
+                # Refused by the server, e.g. an unknown recipient; the connection stays usable
+                results.append(e)
+            except OSError as e:
+                # Socket failure; SMTPException derives from OSError, so this comes last
+                self._quit(connection)
+                connection = None
+                results.append(e)
+        return connection, results
+
+    def _quit(self, connection: PooledConnection):
+        try:
+            connection.smtp.quit()
+        except Exception:
+            connection.smtp.close()
@@ -0,0 +1,214 @@
+# src/polls/expiry.py
+"""
+Closes polls when they reach `expires_at` and freezes their results.
+
+Every worker runs an ExpiryScheduler: a min-heap of (deadline, poll_id) for the active
+polls expiring within the next two rescan periods, loaded through the
+(status, expires_at) index at startup and topped up by a rescan every
+POLL_EXPIRY_RESCAN_SECONDS, so polls created on other workers are picked up as well.
+New polls created on this worker are pushed directly.
+
+Closing is a conditional update, so when several workers reach the same deadline only
+one of them closes the poll. That worker then writes the compact `results` snapshot:
+the final counts, including sharded counters. With VOTE_BUFFER_ENABLED the increments
+of votes accepted just before the close may still sit in any worker's buffer, so the
+counts are also taken from the ballots, which every accepted vote has already written. The snapshot is written once and never
+changes, and a closed poll can no longer be edited, voted on or asked questions. That
+is what lets readers keep closed polls in cache indefinitely.
+
+Votes do not depend on the scheduler being on time: the vote update itself only
+matches polls whose deadline has not passed.
+"""
+from datetime import datetime, timezone
+from typing import Dict, Optional, Set, Tuple
+from bson import ObjectId
+from pymongo import ASCENDING, ReturnDocument
+from src.config import POLL_EXPIRY_RESCAN_SECONDS, VOTE_BUFFER_ENABLED
+from src.database import polls_collection, ballots_collection
+from src.voting.vote_counters import resolve_counts
+from src.polls.repository import poll_repository
+import asyncio
+import heapq
+import logging
+import time
+
+CLOSED_STATUS = "closed"
+
+
+def deadline_timestamp(expires_at: datetime) -> float:
+    """Converts a deadline to a Unix timestamp; naive datetimes from MongoDB are UTC."""
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    return expires_at.timestamp()
+
+
+def is_expired(poll: dict, now: float = None) -> bool:
+    """Tells whether a poll is closed or past its deadline."""
+    if poll.get("status") == CLOSED_STATUS:
+        return True
+    expires_at = poll.get("expires_at")
+    return expires_at is not None and deadline_timestamp(expires_at) <= (now or time.time())
+
+
+def open_poll_filter() -> dict:
+    """Query conditions matching polls that still accept votes and edits."""
+    return {
+        "status": {"$ne": CLOSED_STATUS},
+        # Also matches polls without a deadline
+        "expires_at": {"$not": {"$lte": datetime.now(timezone.utc)}},
+    }
+
+
+def build_results(poll: dict) -> dict:
+    """Builds the compact results snapshot stored on a closed poll."""
+    votes = poll.get("votes") or {}
+    results = {
+        "votes": dict(votes),
+        "voter_count": poll.get("voter_count", 0),
+        "total_votes": sum(votes.values()),
+        "closed_at": poll.get("closed_at"),
+    }
+    if poll.get("type") == "q_and_a":
+        questions = poll.get("questions") or []
+        results["total_questions"] = len(questions)
+        results["total_answers"] = sum(len(question.get("answers", [])) for question in questions)
+    return results
+
+
+async def close_poll(poll_id: str) -> bool:
+    """
+    Closes a poll and writes its results snapshot.
+    :return: True if this call closed the poll, False if it was already closed or does not exist.
+    """
+    poll = await polls_collection.find_one_and_update(
+        {"_id": ObjectId(poll_id), "status": {"$ne": CLOSED_STATUS}},
+        {"$set": {"status": CLOSED_STATUS, "closed_at": datetime.now(timezone.utc)}, "$inc": {"meta_version": 1}},
+        return_document=ReturnDocument.AFTER,
+    )
+    poll_repository.invalidate(poll_id)
+    if poll is None:
+        return False
+    logging.info(f"Poll {poll_id} closed")
+    await write_results(poll)
+    return True
+
+
+async def count_ballots(poll_id: str) -> Tuple[Dict[str, int], int]:
+    """
+    Counts a poll's ballots per option, and all of its ballots.
+    Ballots migrated from the old embedded voter lists have no option; they only count
+    towards the total.
+    """
+    votes, voters = {}, 0
+    async for option in ballots_collection.aggregate([
+        {"$match": {"poll_id": poll_id}},
+        {"$group": {"_id": "$option", "count": {"$sum": 1}}},
+    ]):
+        voters += option["count"]
+        if option["_id"] is not None:
+            votes[option["_id"]] = option["count"]
+    return votes, voters
+
+
+async def write_results(poll: dict):
+    """Freezes the final counts of a closed poll, unless another worker already did."""
+    poll_id = str(poll["_id"])
+    poll = await resolve_counts(poll)
+    if VOTE_BUFFER_ENABLED:
+        # Votes cast before the voter migration are only in the tally, buffered ones may
+        # only be in the ballots, so each option keeps the larger of the two counts
+        counted, voters = await count_ballots(poll_id)
+        tally = poll.get("votes") or {}
+        votes = {option: max(tally.get(option, 0), counted.get(option, 0)) for option in {*tally, *counted}}
+        poll = {**poll, "votes": votes, "voter_count": max(poll.get("voter_count", 0), voters)}
+    await polls_collection.update_one(
+        {"_id": poll["_id"], "results": {"$exists": False}},
+        {"$set": {"results": build_results(poll)}},
+    )
+    poll_repository.invalidate(poll_id)
+
+
+class ExpiryScheduler:
+    def __init__(self, rescan_seconds: float = POLL_EXPIRY_RESCAN_SECONDS):
+        self.rescan_seconds = rescan_seconds
+        self.heap = []
+        self.scheduled: Set[str] = set()
+        self.closed = 0
+        self._wake = asyncio.Event()
+        self._task = None
+
+    async def start(self):
+        await self._finish_interrupted_closes()
+        await self.rescan()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def schedule(self, poll_id: str, expires_at: Optional[datetime]):
+        """Queues a poll to be closed at its deadline, e.g. right after it is created."""
+        if expires_at is None or poll_id in self.scheduled:
+            return
+        deadline = deadline_timestamp(expires_at)
+        if deadline > time.time() + 2 * self.rescan_seconds:
+            return  # a later rescan picks it up
+        self.scheduled.add(poll_id)
+        heapq.heappush(self.heap, (deadline, poll_id))
+        if self.heap[0][1] == poll_id:
+            self._wake.set()
+
+    async def rescan(self):
+        """Loads the open polls expiring before the rescan after next, including overdue ones."""
+        horizon = datetime.fromtimestamp(time.time() + 2 * self.rescan_seconds, timezone.utc)
+        cursor = polls_collection.find(
+            {**open_poll_filter(), "expires_at": {"$lte": horizon}},
+            {"expires_at": 1},
+        ).sort("expires_at", ASCENDING)
+        async for poll in cursor:
+            self.schedule(str(poll["_id"]), poll["expires_at"])
+
+    def stats(self) -> dict:
+        return {"scheduled": len(self.heap), "closed": self.closed}
+
+    async def _run(self):
+        next_rescan = time.monotonic() + self.rescan_seconds
+        while True:
+            now = time.time()
+            while self.heap and self.heap[0][0] <= now:
+                _, poll_id = heapq.heappop(self.heap)
+                self.scheduled.discard(poll_id)
+                try:
+                    if await close_poll(poll_id):
+                        self.closed += 1
+                except Exception as e:
+                    logging.error(f"Closing expired poll {poll_id} failed: {e}", exc_info=True)
+
+            if time.monotonic() >= next_rescan:
+                next_rescan = time.monotonic() + self.rescan_seconds
+                try:
+                    await self.rescan()
+                except Exception as e:
+                    logging.error(f"Rescanning poll deadlines failed: {e}", exc_info=True)
+
+            delay = next_rescan - time.monotonic()
+            if self.heap:
+                delay = min(delay, self.heap[0][0] - time.time())
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=max(delay, 0))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _finish_interrupted_closes(self):
+        """Writes the snapshot of polls closed by a worker that stopped before writing it."""
+        async for poll in polls_collection.find({"status": CLOSED_STATUS, "results": {"$exists": False}}):
+            try:
+                await write_results(poll)
+            except Exception as e:
+                logging.error(f"Writing the results of closed poll {poll['_id']} failed: {e}", exc_info=True)
+
+
+expiry_scheduler = ExpiryScheduler()
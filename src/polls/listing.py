@@ -0,0 +1,94 @@
+# src/polls/listing.py
+"""
+Paged poll listings for the polls pages.
+
+Listings only fetch the fields the templates show and page by `_id`, newest first.
+Since an ObjectId starts with its creation time, this is creation order without
+needing `created_at`, which older polls may lack. A page ends with a `next` token,
+the `_id` of its last poll. The following page starts right after that token, so
+paging stays fast however deep it goes and does not skip or repeat polls when new
+ones are created in between.
+
+A PollPage is loaded before its response starts, so a database error is logged and
+answered with a 500 rather than cutting off a page that already went out as a 200.
+The page is then rendered chunk by chunk, see `stream_template`.
+"""
+from typing import Optional
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException
+from pymongo import DESCENDING
+from src.config import POLLS_PAGE_SIZE
+from src.database import polls_collection
+import logging
+
+# Fields rendered by polls.html, polls_created_by_me.html and polls_shared_with_me.html
+LISTING_PROJECTION = {
+    "activity_title": 1,
+    "type": 1,
+    "poll_question": 1,
+    "created_at": 1,
+    "expires_at": 1,
+}
+
+
+def parse_page_token(token: Optional[str]) -> Optional[ObjectId]:
+    """Turns a `next` token from a previous page back into a poll id."""
+    if not token:
+        return None
+    try:
+        return ObjectId(token)
+    except (InvalidId, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid page token")
+
+
+class PollPage:
+    def __init__(self, query: dict, after: Optional[str] = None, page_size: int = POLLS_PAGE_SIZE):
+        """
+        :param query: Filter selecting the polls to list.
+        :param after: `next` token of the previous page, None for the first page.
+        :param page_size: Polls per page.
+        """
+        self.query = dict(query)
+        after_id = parse_page_token(after)
+        if after_id is not None:
+            self.query["_id"] = {"$lt": after_id}
+        self.page_size = page_size
+        self.polls = []
+        # Token of the following page, known once the page has been loaded
+        self.next: Optional[str] = None
+        self.count = 0
+
+    async def load(self) -> "PollPage":
+        """Reads the page's polls, raising a 500 when the database cannot be read."""
+        try:
+            # One extra poll tells whether there is a following page
+            cursor = (
+                polls_collection.find(self.query, LISTING_PROJECTION)
+                .sort("_id", DESCENDING)
+                .limit(self.page_size + 1)
+            )
+            polls = await cursor.to_list(length=self.page_size + 1)
+        except Exception as e:
+            logging.error(f"Error fetching polls: {e}", exc_info=True)
+            raise HTTPException(status_code=500, detail="Unable to fetch polls at this time")
+        self.polls = polls[:self.page_size]
+        self.count = len(self.polls)
+        if len(polls) > self.page_size:
+            self.next = str(self.polls[-1]["_id"])
+        return self
+
+    def __iter__(self):
+        return iter(self.polls)
+
+
+def all_polls(after: Optional[str] = None) -> PollPage:
+    return PollPage({}, after)
+
+
+def polls_created_by(username: str, after: Optional[str] = None) -> PollPage:
+    return PollPage({"creator": username}, after)
+
+
+def polls_shared_with(email: str, after: Optional[str] = None) -> PollPage:
+    return PollPage({"participants": email}, after)
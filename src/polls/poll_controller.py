@@ -5,35 +5,29 @@ from jose import JWTError, jwt
 from src.config import SECRET_KEY, ALGORITHM
 from src.authentication.auth_controller import get_current_user
 from src.notifications.fcm_manager import send_notification
-from src.authentication.utils import send_email
 from src.websockets.connection_manager import manager
+from src.voting.vote_counters import resolve_counts
 from datetime import datetime, timedelta, timezone
-from src.database import database, device_tokens_collection, users_collection
+from src.database import polls_collection, device_tokens_collection, users_collection
 from bson import ObjectId
 from typing import List
-from src.shared import templates
+from src.shared import templates, stream_template
+from src.polls.listing import all_polls, polls_created_by, polls_shared_with
+from src.polls.repository import poll_repository
+from src.polls.expiry import expiry_scheduler, open_poll_filter
+from src.notifications.email_outbox import email_outbox
+from src.analytics.summary import initial_summary, summarize
 import logging
 
 router = APIRouter()
 
-# Polls collection from MongoDB
-polls_collection = database.get_collection("polls")
-feedback_collection = database.get_collection("feedback")
-
 logging.basicConfig(level=logging.DEBUG)
 
 @router.get("/", response_class=HTMLResponse)
-async def list_polls(request: Request, current_user: dict = Depends(get_current_user)):
-    try:
-        logging.debug("Fetching list of polls...")
-        polls_cursor = polls_collection.find({})
-        polls = await polls_cursor.to_list(length=100)
-        logging.info(f"Polls retrieved: {len(polls)}")
-    except Exception as e:
-        logging.error(f"Error fetching polls: {e}")
-        raise HTTPException(status_code=500, detail="Unable to fetch polls at this time")
-
-    return templates.TemplateResponse("polls.html", {"request": request, "polls": polls, "current_user": current_user})
+async def list_polls(request: Request, after: str = None, current_user: dict = Depends(get_current_user)):
+    logging.debug("Fetching list of polls...")
+    polls = await all_polls(after).load()
+    return stream_template("polls.html", {"request": request, "polls": polls, "current_user": current_user})
 
 @router.post("/create/type")
 async def choose_poll_type(poll_type: str = Form(...)):
@@ -90,9 +84,10 @@ async def create_poll(
             "options": options or [],
             "type": poll_type,
             "votes": {option: 0 for option in options or []},
-            "voters": [],
+            "voter_count": 0,
             "is_public" : True,
-            "questions" : [] if poll_type == "q_and_a" else None
+            "questions" : [] if poll_type == "q_and_a" else None,
+            "summary": initial_summary(participants),
         }
 
         result = await polls_collection.insert_one(poll)
@@ -100,26 +95,43 @@ async def create_poll(
             raise HTTPException(status_code=500, detail="Failed to create poll.")
 
         poll_id = str(result.inserted_id)
+        expiry_scheduler.schedule(poll_id, poll["expires_at"])
         poll_url = f"{request.base_url}polls/{poll_id}"  # Construct poll URL
 
-
-        # Email notification
-        subject = f"You're invited to participate in a poll: {activity_title}"
-        body = (f"{current_user['username']} has invited you to participate in a poll: {poll_question}"
-        f"Click the link below to participate:\n{poll_url}\n\n")
-        send_email(participants, subject, body)
+        # Email notification, delivered in the background by the outbox workers
+        try:
+            await email_outbox.enqueue_poll_invites(
+                poll_id, participants, current_user["username"], activity_title, poll_question, poll_url
+            )
+        except Exception as e:
+            logging.error(f"Failed to queue invitations for poll {poll_id}: {e}", exc_info=True)
 
         return RedirectResponse(url=f"/analytics/{result.inserted_id}", status_code=303)
     except Exception as e:
         logging.error(f"Error creating poll: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="An error occurred while creating the poll")
 
+# Declared before /{poll_id}, which would otherwise match these paths
+@router.get("/shared-with-me", response_class=HTMLResponse)
+async def polls_shared_with_me(request: Request, after: str = None, current_user: dict = Depends(get_current_user)):
+    """List polls shared with the current user, one page at a time."""
+    logging.info(f"Fetching polls shared with user {current_user['username']}")
+    polls = await polls_shared_with(current_user["email"], after).load()
+    return stream_template("polls_shared_with_me.html", {"request": request, "polls": polls})
+
+@router.get("/created-by-me", response_class=HTMLResponse)
+async def polls_created_by_me(request: Request, after: str = None, current_user: dict = Depends(get_current_user)):
+    """List polls created by the current user, one page at a time."""
+    logging.info(f"Fetching polls created by user {current_user['username']}")
+    polls = await polls_created_by(current_user["username"], after).load()
+    return stream_template("polls_created_by_me.html", {"request": request, "polls": polls})
+
 @router.get("/{poll_id}", response_class=HTMLResponse)
 async def view_poll(poll_id: str, request: Request):
     """View a specific poll."""
     try:
         # Fetch the poll from the database
-        poll = await polls_collection.find_one({"_id": ObjectId(poll_id)})
+        poll = await poll_repository.get_poll(poll_id)
         if not poll:
             raise HTTPException(status_code=404, detail="Poll not found")
 
@@ -147,10 +159,11 @@ async def poll_analytics(poll_id: str, request: Request):
         logging.debug(f"Fetching analytics for poll ID: {poll_id}")
 
         # Ensure the poll exists
-        poll = await polls_collection.find_one({"_id": ObjectId(poll_id)})
+        poll = await poll_repository.get_poll(poll_id)
         if not poll:
             logging.error(f"Poll not found for analytics: {poll_id}")
             raise HTTPException(status_code=404, detail="Poll not found")
+        poll = await resolve_counts(poll)
 
         # Ensure the current user is either the creator or a participant
         guest_email = request.query_params.get("email")
@@ -163,19 +176,19 @@ async def poll_analytics(poll_id: str, request: Request):
             logging.warning(f"Unauthorized access attempt to poll analytics: {poll_id}")
             raise HTTPException(status_code=403, detail="User not authorized to view analytics")
 
+        summary = await summarize(poll)
         if poll["type"] == "q_and_a":
             questions = poll.get("questions", [])
             analytics_data = {
                 "questions": questions,
-                "total_participants": len(poll.get("participants", [])),
+                "total_participants": summary["participant_count"],
             }
         else:
-            total_votes = sum(poll["votes"].values())
             option_votes = poll["votes"]
             analytics_data = {
-                "total_votes": total_votes,
+                "total_votes": summary["total_votes"],
                 "option_votes": option_votes,
-                "participation_rate": len(poll["participants"]),
+                "participation_rate": summary["participation_rate"],
             }
 
         logging.debug(f"Analytics data prepared for poll ID: {poll_id}")
@@ -192,7 +205,7 @@ async def edit_poll_form(poll_id: str, request: Request, current_user: dict = De
         logging.info(f"Fetching poll {poll_id} for editing")
 
         # Fetch the poll from the database
-        poll = await polls_collection.find_one({"_id": ObjectId(poll_id)})
+        poll = await poll_repository.get_poll(poll_id)
         if not poll:
             logging.error(f"Poll {poll_id} not found")
             raise HTTPException(status_code=404, detail="Poll not found")
@@ -241,7 +254,7 @@ async def edit_poll(
         logging.info(f"Editing poll {poll_id}")
 
         # Fetch the poll to verify permissions
-        poll = await polls_collection.find_one({"_id": ObjectId(poll_id)})
+        poll = await poll_repository.get_metadata(poll_id)
         if not poll:
             logging.error(f"Poll {poll_id} not found")
             raise HTTPException(status_code=404, detail="Poll not found")
@@ -260,13 +273,15 @@ async def edit_poll(
             "options": options or [],
             "type": poll_type,
             "updated_at": datetime.now(timezone.utc),
+            "summary.participant_count": len(participants),
         }
 
-        result = await polls_collection.update_one(
-            {"_id": ObjectId(poll_id)},
-            {"$set": updated_poll},
-        )
+        # Closed polls keep the results they were closed with
+        result = await poll_repository.update_metadata(poll_id, updated_poll, open_poll_filter())
 
+        if result.matched_count == 0:
+            logging.warning(f"Rejected edit of closed poll {poll_id}")
+            raise HTTPException(status_code=400, detail="This poll is closed and can no longer be edited")
         if result.modified_count == 0:
             logging.error(f"Failed to update poll {poll_id}")
             raise HTTPException(status_code=500, detail="Failed to update poll")
@@ -274,40 +289,12 @@ async def edit_poll(
         logging.info(f"Poll {poll_id} updated successfully")
 
         return RedirectResponse(url=f"/analytics/dashboard/{poll_id}", status_code=303)
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error updating poll {poll_id}: {e}")
         raise HTTPException(status_code=500, detail="An error occurred while updating the poll")
 
-@router.get("/shared-with-me", response_class=HTMLResponse)
-async def polls_shared_with_me(request: Request, current_user: dict = Depends(get_current_user)):
-    """List polls shared with the current user."""
-    try:
-        logging.info(f"Fetching polls shared with user {current_user['username']}")
-
-        polls_cursor = polls_collection.find({"participants": {"$in": [current_user["email"]]}})
-        polls = await polls_cursor.to_list(length=100)
-        logging.info(f"Polls shared with user retrieved: {len(polls)}")
-
-        return templates.TemplateResponse("shared_with_me.html", {"request": request, "polls": polls})
-    except Exception as e:
-        logging.error(f"Error fetching polls shared with user: {e}")
-        raise HTTPException(status_code=500, detail="Unable to fetch polls")
-
-@router.get("/created-by-me", response_class=HTMLResponse)
-async def polls_created_by_me(request: Request, current_user: dict = Depends(get_current_user)):
-    """List polls created by the current user."""
-    try:
-        logging.info(f"Fetching polls created by user {current_user['username']}")
-
-        polls_cursor = polls_collection.find({"creator": current_user["username"]})
-        polls = await polls_cursor.to_list(length=100)
-        logging.info(f"Polls created by user retrieved: {len(polls)}")
-
-        return templates.TemplateResponse("created_by_me.html", {"request": request, "polls": polls})
-    except Exception as e:
-        logging.error(f"Error fetching polls created by user: {e}")
-        raise HTTPException(status_code=500, detail="Unable to fetch polls")
-
 @router.post("/polls/{poll_id}/questions")
 async def submit_question(
     poll_id: str,
@@ -318,11 +305,11 @@ async def submit_question(
         if not current_user:
             raise HTTPException(status_code=401, detail="Authentication required to submit questions")
 
-        poll = await polls_collection.find_one({"_id": ObjectId(poll_id)})
+        poll = await poll_repository.get_metadata(poll_id)
         if not poll:
             raise HTTPException(status_code=404, detail="Poll not found")
 
-        if poll["poll_type"] != "q_and_a":
+        if poll["type"] != "q_and_a":
             raise HTTPException(status_code=400, detail="This poll does not accept questions")
 
         new_question = {
@@ -334,14 +321,18 @@ async def submit_question(
         }
 
         result = await polls_collection.update_one(
-            {"_id": ObjectId(poll_id)},
-            {"$push": {"questions": new_question}}
+            {"_id": ObjectId(poll_id), **open_poll_filter()},
+            {"$push": {"questions": new_question}, "$inc": {"summary.question_count": 1}}
         )
 
+        if result.matched_count == 0:
+            raise HTTPException(status_code=400, detail="This poll is closed")
         if result.modified_count == 0:
             raise HTTPException(status_code=500, detail="Failed to add question")
 
         return RedirectResponse(url=f"/analytics/dashboard/{poll_id}", status_code=303)
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error submitting question: {e}")
         raise HTTPException(status_code=500, detail="Unable to submit question")
@@ -357,11 +348,11 @@ async def submit_answer(
         if not current_user:
             raise HTTPException(status_code=401, detail="Authentication required to submit answers")
 
-        poll = await polls_collection.find_one({"_id": ObjectId(poll_id)})
+        poll = await poll_repository.get_metadata(poll_id)
         if not poll:
             raise HTTPException(status_code=404, detail="Poll not found")
 
-        if poll["poll_type"] != "q_and_a":
+        if poll["type"] != "q_and_a":
             raise HTTPException(status_code=400, detail="This poll does not accept answers")
 
         new_answer = {
@@ -374,15 +365,20 @@ async def submit_answer(
         result = await polls_collection.update_one(
             {
                 "_id": ObjectId(poll_id),
-                "questions.question_id": ObjectId(question_id)
+                "questions.question_id": ObjectId(question_id),
+                **open_poll_filter(),
             },
-            {"$push": {"questions.$.answers": new_answer}}
+            {"$push": {"questions.$.answers": new_answer}, "$inc": {"summary.answer_count": 1}}
         )
 
+        if result.matched_count == 0:
+            raise HTTPException(status_code=400, detail="This poll is closed or the question does not exist")
         if result.modified_count == 0:
             raise HTTPException(status_code=500, detail="Failed to add answer")
 
         return RedirectResponse(url=f"/analytics/dashboard/{poll_id}", status_code=303)
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error submitting answer: {e}")
         raise HTTPException(status_code=500, detail="Unable to submit answer")
@@ -0,0 +1,127 @@
+# src/polls/repository.py
+"""
+Shared access to poll documents with a per-worker cache of their metadata.
+
+Poll metadata (title, question, options, type, creator, visibility and participants)
+only changes when the creator edits the poll, yet almost every request on a poll
+reads it. PollRepository keeps it in an LRU cache and only fetches the remaining,
+frequently changing fields (votes, questions, status...) from MongoDB.
+
+Metadata writes go through `update_metadata`, which bumps the poll's `meta_version`
+and drops the local entry. Every read of the live fields returns the stored
+`meta_version`, so a worker whose copy is older than an edit made by another worker
+notices it on its next read and refreshes. Metadata-only reads (`get_metadata`) may
+serve another worker's edit up to POLL_CACHE_TTL_SECONDS late.
+
+Closed polls with a results snapshot can no longer change (see expiry.py), so
+`get_poll` keeps their whole document in a separate LRU without expiry.
+"""
+from typing import Optional
+from bson import ObjectId
+from src.cache import TTLCache
+from src.config import POLL_CACHE_MAX_ENTRIES, POLL_CACHE_TTL_SECONDS, CLOSED_POLL_CACHE_MAX_ENTRIES
+from src.database import polls_collection
+
+METADATA_FIELDS = ("activity_title", "poll_question", "options", "type", "creator", "is_public", "participants")
+
+
+class PollRepository:
+    def __init__(self, collection, cache: TTLCache, closed_cache: TTLCache = None):
+        self.collection = collection
+        self.cache = cache
+        self.closed_cache = closed_cache or TTLCache(0, 0)
+
+    async def get_poll(self, poll_id: str) -> Optional[dict]:
+        """Returns the whole poll document, with its metadata taken from the cache when current."""
+        closed = self.closed_cache.get(poll_id)
+        if closed is not None:
+            return dict(closed)
+
+        cached = self.cache.get(poll_id)
+        if cached is None:
+            poll = await self.collection.find_one({"_id": ObjectId(poll_id)})
+            if poll:
+                self._remember(poll_id, poll)
+            return poll
+
+        live = await self.collection.find_one(
+            {"_id": ObjectId(poll_id)},
+            {field: 0 for field in METADATA_FIELDS},
+        )
+        if not live:
+            self.invalidate(poll_id)
+            return None
+        if live.get("meta_version", 0) != cached.get("meta_version", 0):
+            # Edited since it was cached, possibly by another worker
+            return await self._reload(poll_id)
+        poll = {**cached, **live}
+        if "results" in poll:
+            self.closed_cache.set(poll_id, poll)
+        return poll
+
+    async def get_metadata(self, poll_id: str) -> Optional[dict]:
+        """Returns the poll's metadata fields and `_id`, reading MongoDB only on a cache miss."""
+        cached = self.cache.get(poll_id)
+        if cached is not None:
+            return dict(cached)
+        poll = await self.collection.find_one(
+            {"_id": ObjectId(poll_id)},
+            {field: 1 for field in METADATA_FIELDS + ("meta_version",)},
+        )
+        if poll:
+            self._remember(poll_id, poll)
+        return poll
+
+    def cached_metadata(self, poll_id: str) -> Optional[dict]:
+        """Returns what this worker has cached about the poll without reading MongoDB, or None."""
+        cached = self.closed_cache.get(poll_id)
+        if cached is None:
+            cached = self.cache.get(poll_id)
+        return dict(cached) if cached is not None else None
+
+    async def update_metadata(self, poll_id: str, fields: dict, condition: dict = None):
+        """
+        Writes metadata (and any other) fields and invalidates every cached copy of the poll.
+        :param condition: Extra filter the poll must match for the update to apply.
+        """
+        result = await self.collection.update_one(
+            {"_id": ObjectId(poll_id), **(condition or {})},
+            {"$set": fields, "$inc": {"meta_version": 1}},
+        )
+        self.invalidate(poll_id)
+        return result
+
+    def observe_version(self, poll_id: str, meta_version: Optional[int]):
+        """Drops a cached entry older than a `meta_version` returned by a write."""
+        cached = self.cache.peek(poll_id)
+        if cached is not None and cached.get("meta_version", 0) != (meta_version or 0):
+            self.invalidate(poll_id)
+
+    def invalidate(self, poll_id: str):
+        self.cache.invalidate(poll_id)
+        self.closed_cache.invalidate(poll_id)
+
+    def stats(self) -> dict:
+        return {"metadata": self.cache.stats(), "closed": self.closed_cache.stats()}
+
+    async def _reload(self, poll_id: str) -> Optional[dict]:
+        self.invalidate(poll_id)
+        poll = await self.collection.find_one({"_id": ObjectId(poll_id)})
+        if poll:
+            self._remember(poll_id, poll)
+        return poll
+
+    def _remember(self, poll_id: str, poll: dict):
+        if "results" in poll:
+            self.closed_cache.set(poll_id, poll)
+        metadata = {field: poll[field] for field in METADATA_FIELDS if field in poll}
+        metadata["_id"] = poll["_id"]
+        metadata["meta_version"] = poll.get("meta_version", 0)
+        self.cache.set(poll_id, metadata)
+
+
+poll_repository = PollRepository(
+    polls_collection,
+    TTLCache(POLL_CACHE_MAX_ENTRIES, POLL_CACHE_TTL_SECONDS),
+    TTLCache(CLOSED_POLL_CACHE_MAX_ENTRIES, float("inf")),
+)
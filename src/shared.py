@@ -1,5 +1,7 @@
 #shared.py
 from fastapi.templating import Jinja2Templates
+from fastapi.responses import StreamingResponse
+from jinja2 import Environment, FileSystemLoader
 from src.database import database
 from pathlib import Path
 
@@ -7,4 +9,16 @@ from pathlib import Path
 templates_path = Path(__file__).parent.parent / "templates"  # Adjust path accordingly to find templates folder
 templates = Jinja2Templates(directory=str(templates_path))
 
+# Async environment for pages rendered chunk by chunk, e.g. paged poll listings
+streaming_templates = Environment(loader=FileSystemLoader(str(templates_path)), autoescape=True, enable_async=True)
+
+
+def stream_template(name: str, context: dict) -> StreamingResponse:
+    """
+    Renders a template chunk by chunk as the response body.
+    Load the context's data first: once the first chunk is sent, an error can no longer change the status.
+    """
+    template = streaming_templates.get_template(name)
+    return StreamingResponse(template.generate_async(context), media_type="text/html")
+
 polls_collection = database.get_collection("polls")
\ No newline at end of file
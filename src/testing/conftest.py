@@ -0,0 +1,75 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import MongoClient
+from pymongo.errors import BulkWriteError, PyMongoError
+from src.config import MONGODB_URI
+from src.indexes import INDEXES
+import pytest
+
+
+class RecordingCollection:
+    """
+    Stands in for a collection's bulk_write and keeps the requests it applied.
+    :param fail_times: Calls that fail outright before any request is applied.
+    :param failing_indexes: Requests the next call skips and reports in writeErrors, like an unordered bulk write.
+    """
+
+    def __init__(self, fail_times=0, failing_indexes=()):
+        self.requests = []
+        self.fail_times = fail_times
+        self.failing_indexes = set(failing_indexes)
+
+    async def bulk_write(self, requests, ordered=True):
+        if self.fail_times:
+            self.fail_times -= 1
+            raise ConnectionError("database unavailable")
+        failing, self.failing_indexes = self.failing_indexes, set()
+        self.requests.extend(request for index, request in enumerate(requests) if index not in failing)
+        if failing:
+            raise BulkWriteError({
+                "writeErrors": [{"index": index, "code": 2, "errmsg": "update failed"} for index in sorted(failing)],
+                "writeConcernErrors": [],
+            })
+
+
+@pytest.fixture
+def recording_collection():
+    return RecordingCollection()
+
+
+@pytest.fixture(scope="session")
+def mongo_admin():
+    """Synchronous client on MONGODB_URI, checked once per session; None when no server answers."""
+    admin = MongoClient(MONGODB_URI, serverSelectionTimeoutMS=2000)
+    try:
+        admin.admin.command("ping")
+    except PyMongoError:
+        admin.close()
+        yield None
+        return
+    yield admin
+    admin.close()
+
+
+@pytest.fixture
+def mongo_database(mongo_admin):
+    """
+    A throwaway database on MONGODB_URI with the registered indexes, dropped after the
+    test; skips when no server answers.
+    """
+    if mongo_admin is None:
+        pytest.skip("MongoDB not reachable at MONGODB_URI")
+    name = f"pickify_test_{ObjectId()}"
+    for collection_name, models in INDEXES.items():
+        mongo_admin[name][collection_name].create_indexes(models)
+    # Motor binds to the test's event loop on first use
+    client = AsyncIOMotorClient(MONGODB_URI)
+    yield client.get_database(name)
+    client.close()
+    mongo_admin.drop_database(name)
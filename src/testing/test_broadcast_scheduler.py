@@ -0,0 +1,45 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+import asyncio
+import pytest
+from src.websockets.broadcast_scheduler import BroadcastScheduler
+
+
+@pytest.mark.asyncio
+async def test_burst_of_updates_collapses_to_latest_snapshot():
+    frames = []
+
+    async def send(poll_id, snapshot):
+        frames.append((poll_id, snapshot))
+
+    scheduler = BroadcastScheduler(send, interval_ms=50)
+    for count in range(1, 11):
+        scheduler.submit("poll-a", {"Apple": count})
+    await asyncio.sleep(0.01)
+    scheduler.submit("poll-a", {"Apple": 11})
+    scheduler.submit("poll-a", {"Apple": 12})
+    await asyncio.sleep(0.1)
+
+    assert frames == [("poll-a", {"Apple": 10}), ("poll-a", {"Apple": 12})]
+    assert scheduler.stats()["coalescing_ratio"] == 6
+    assert scheduler.stats()["active_polls"] == 0
+
+
+@pytest.mark.asyncio
+async def test_polls_are_throttled_independently():
+    frames = []
+
+    async def send(poll_id, snapshot):
+        frames.append(poll_id)
+
+    scheduler = BroadcastScheduler(send, interval_ms=1000)
+    scheduler.submit("poll-a", {})
+    scheduler.submit("poll-b", {})
+    await asyncio.sleep(0.01)
+
+    assert sorted(frames) == ["poll-a", "poll-b"]
+    await scheduler.stop()
@@ -0,0 +1,37 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+from src.analytics.charts import ChartRenderer, chart_version
+from src.cache import TTLCache
+import asyncio
+import pytest
+
+
+def test_version_follows_chart_contents():
+    version = chart_version("Lunch", {"Pizza": 3, "Sushi": 1})
+    assert version == chart_version("Lunch", {"Pizza": 3, "Sushi": 1})
+    assert version != chart_version("Lunch", {"Pizza": 4, "Sushi": 1})
+    assert version != chart_version("Dinner", {"Pizza": 3, "Sushi": 1})
+
+
+@pytest.mark.asyncio
+async def test_charts_render_once_per_version():
+    renderer = ChartRenderer(workers=1, cache=TTLCache(8, float("inf")))
+    try:
+        votes = {"Pizza": 3, "Sushi": 1}
+        first, second = await asyncio.gather(
+            renderer.render("poll1", "Lunch", votes),
+            renderer.render("poll1", "Lunch", votes),
+        )
+        assert first.startswith(b"\x89PNG")
+        assert first == second
+        assert await renderer.render("poll1", "Lunch", votes) == first
+        assert renderer.rendered == 1
+
+        await renderer.render("poll1", "Lunch", {"Pizza": 4, "Sushi": 1})
+        assert renderer.rendered == 2
+    finally:
+        renderer.shutdown()
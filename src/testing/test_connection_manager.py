@@ -0,0 +1,115 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+import asyncio
+import pytest
+from src.websockets.connection_manager import ConnectionManager
+
+
+class FakeWebSocket:
+    def __init__(self, stalled=False):
+        self.accepted = False
+        self.closed = False
+        self.stalled = stalled
+        self.sent = []
+
+    async def accept(self):
+        self.accepted = True
+
+    async def send_text(self, message):
+        if self.stalled:
+            await asyncio.sleep(3600)
+        self.sent.append(message)
+
+    async def close(self, code=1000):
+        self.closed = True
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_broadcast_to_poll_only_reaches_that_poll():
+    manager = ConnectionManager()
+    viewer_a, viewer_b = FakeWebSocket(), FakeWebSocket()
+    await manager.connect(viewer_a, "poll-a")
+    await manager.connect(viewer_b, "poll-b")
+
+    await manager.broadcast_to_poll("poll-a", "update")
+    await settle()
+
+    assert viewer_a.accepted and viewer_a.sent == ["update"]
+    assert viewer_b.sent == []
+    await manager.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_disconnect_removes_empty_rooms():
+    manager = ConnectionManager()
+    viewer = FakeWebSocket()
+    await manager.connect(viewer, "poll-a")
+    assert manager.connection_count("poll-a") == 1
+
+    manager.disconnect(viewer, "poll-a")
+    manager.disconnect(viewer, "poll-a")
+
+    assert manager.connection_count() == 0
+    assert "poll-a" not in manager.rooms
+
+
+@pytest.mark.asyncio
+async def test_stalled_client_is_evicted_without_blocking_others():
+    manager = ConnectionManager(queue_size=2, send_timeout=60)
+    stalled, healthy = FakeWebSocket(stalled=True), FakeWebSocket()
+    await manager.connect(stalled, "poll-a")
+    await manager.connect(healthy, "poll-a")
+
+    for number in range(4):
+        await manager.broadcast_to_poll("poll-a", f"update {number}")
+        await settle()
+
+    assert healthy.sent == ["update 0", "update 1", "update 2", "update 3"]
+    assert stalled.closed
+    assert manager.connection_count("poll-a") == 1
+    assert manager.stats()["evicted"] == 1
+    assert manager.stats()["messages_dropped"] >= 1
+    await manager.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_send_timeout_evicts_client():
+    manager = ConnectionManager(queue_size=8, send_timeout=0.01)
+    stalled = FakeWebSocket(stalled=True)
+    await manager.connect(stalled, "poll-a")
+
+    await manager.broadcast_to_poll("poll-a", "update")
+    await asyncio.sleep(0.05)
+
+    assert manager.connection_count() == 0
+    assert manager.stats()["evicted"] == 1
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_reaps_silent_clients():
+    manager = ConnectionManager(heartbeat_interval=0.02, idle_timeout=0.05)
+    silent, alive = FakeWebSocket(), FakeWebSocket()
+    await manager.connect(silent, "poll-a")
+    await manager.connect(alive, "poll-a")
+    await manager.start()
+
+    for _ in range(5):
+        await asyncio.sleep(0.02)
+        manager.touch(alive, "poll-a")
+    await settle()
+
+    assert silent.closed and not alive.closed
+    assert '{"t":"ping"}' in alive.sent
+    stats = manager.stats()
+    assert stats["connections"] == 1 and stats["reaped"] == 1
+    assert stats["memory_bytes"] > 0
+    await manager.shutdown()
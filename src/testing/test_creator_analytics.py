@@ -0,0 +1,110 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+from datetime import datetime
+from bson import ObjectId
+from src.analytics.creator import CreatorAnalytics, overview_pipeline, polls_pipeline
+from src.cache import TTLCache
+import pytest
+
+# $dateTrunc weeks start on Sunday
+FIRST_WEEK, SECOND_WEEK = datetime(2026, 1, 4), datetime(2026, 1, 11)
+
+
+def test_polls_page_is_read_from_the_index_range():
+    after = ObjectId()
+    pipeline = polls_pipeline("erin", after, page_size=20)
+    assert pipeline[0] == {"$match": {"creator": "erin", "_id": {"$lt": after}}}
+    assert pipeline[1] == {"$sort": {"_id": -1}}
+    assert pipeline[2] == {"$limit": 21}
+    assert "$facet" not in overview_pipeline("erin")[0]
+
+
+async def insert_creator_polls(database) -> list:
+    """Inserts three polls by erin, oldest first, and one by someone else; returns their ids."""
+    polls = [
+        {"_id": ObjectId.from_datetime(datetime(2026, 1, 5)), "creator": "erin", "activity_title": "Lunch",
+         "type": "multiple_choice", "status": "closed", "participants": ["a", "b", "c", "d"],
+         "votes": {"Pizza": 0}, "results": {"votes": {"Pizza": 3, "Salad": 1}, "voter_count": 4}},
+        {"_id": ObjectId.from_datetime(datetime(2026, 1, 6)), "creator": "erin", "activity_title": "Dinner",
+         "type": "multiple_choice", "status": "active", "participants": ["a", "b"],
+         "votes": {"Pizza": 1, "Soup": 0}, "voter_count": 1},
+        {"_id": ObjectId.from_datetime(datetime(2026, 1, 13)), "creator": "erin", "activity_title": "Dessert",
+         "type": "multiple_choice", "status": "active", "votes": {"Cake": 2, "Pie": 5}, "voter_count": 7},
+        {"_id": ObjectId(), "creator": "frank", "votes": {"Pizza": 100}, "voter_count": 100},
+    ]
+    await database.polls.insert_many(polls)
+    return [str(poll["_id"]) for poll in polls]
+
+
+@pytest.mark.asyncio
+async def test_creator_analytics_on_known_polls(mongo_database):
+    ids = await insert_creator_polls(mongo_database)
+    analytics = CreatorAnalytics(mongo_database.polls, TTLCache(10, 30), page_size=2)
+
+    first = await analytics.get("erin")
+    assert first["totals"] == {"polls": 3, "total_votes": 12, "voter_count": 12, "average_participation_rate": 75.0}
+    assert first["top_options"] == [
+        {"option": "Pie", "votes": 5, "polls": 1},
+        {"option": "Pizza", "votes": 4, "polls": 2},
+        {"option": "Cake", "votes": 2, "polls": 1},
+        {"option": "Salad", "votes": 1, "polls": 1},
+        {"option": "Soup", "votes": 0, "polls": 1},
+    ]
+    assert first["trend"] == [
+        {"week": FIRST_WEEK, "polls": 2, "total_votes": 5},
+        {"week": SECOND_WEEK, "polls": 1, "total_votes": 7},
+    ]
+    assert [poll["poll_id"] for poll in first["polls"]] == [ids[2], ids[1]]
+    assert first["polls"][0]["top_option"] == {"option": "Pie", "votes": 5}
+    assert first["polls"][1]["participation_rate"] == 50.0
+    assert first["next"] == ids[1]
+
+    second = await analytics.get("erin", first["next"])
+    assert [poll["poll_id"] for poll in second["polls"]] == [ids[0]]
+    assert second["polls"][0]["total_votes"] == 4
+    assert second["next"] is None
+    assert second["totals"] == first["totals"]
+
+
+class CountingCollection:
+    """Answers the overview and polls pipelines with fixed results and counts the calls."""
+
+    def __init__(self, overview, polls):
+        self.results = {True: [overview], False: polls}
+        self.pipelines = []
+
+    def aggregate(self, pipeline):
+        self.pipelines.append(pipeline)
+        result = self.results["$facet" in pipeline[-1]]
+
+        class Cursor:
+            async def to_list(self, length=None):
+                return result
+
+        return Cursor()
+
+
+@pytest.mark.asyncio
+async def test_overview_is_computed_once_per_creator_and_pages_are_cached():
+    polls = [{"poll_id": str(ObjectId()), "total_votes": n} for n in range(3)]
+    collection = CountingCollection({
+        "totals": [{"polls": 3, "total_votes": 3, "voter_count": 3, "average_participation_rate": 50.0}],
+        "top_options": [],
+        "trend": [],
+    }, polls)
+    analytics = CreatorAnalytics(collection, TTLCache(10, 30), page_size=2)
+
+    page = await analytics.get("erin")
+    assert page["polls"] == polls[:2]
+    assert page["next"] == polls[1]["poll_id"]
+    assert page["totals"]["polls"] == 3
+    assert await analytics.get("erin") == page
+    assert len(collection.pipelines) == 2
+
+    await analytics.get("erin", page["next"])
+    assert len(collection.pipelines) == 3
+    assert "$facet" not in collection.pipelines[-1][-1]
@@ -0,0 +1,75 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+from datetime import datetime, timedelta, timezone
+from smtplib import SMTPRecipientsRefused
+from src.notifications.email_outbox import CLAIM_LEASE_SECONDS, FAILED, PENDING, SENDING, SENT, EmailOutbox
+import pytest
+
+
+class FakePool:
+    """Fails every send until `failing` is cleared."""
+
+    def __init__(self, failing=False):
+        self.failing = failing
+        self.sent = []
+
+    async def send_batch(self, messages):
+        if self.failing:
+            return [SMTPRecipientsRefused({message["To"]: (550, b"No such user")}) for message in messages]
+        self.sent.extend(message["To"] for message in messages)
+        return [None] * len(messages)
+
+    async def close(self):
+        pass
+
+
+def utcnow():
+    # Motor returns naive UTC datetimes
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+@pytest.mark.asyncio
+async def test_failed_messages_are_retried_with_exponential_backoff(mongo_database):
+    outbox = EmailOutbox(mongo_database.email_outbox, FakePool(failing=True), "noreply@example.com",
+                         max_attempts=3, retry_base_seconds=10)
+    await outbox.enqueue([{"to": "a@example.com", "subject": "Hi", "body": "Hello"}])
+
+    for attempts, delay in [(1, 10), (2, 20)]:
+        assert await outbox.process_batch() == 1
+        message = await mongo_database.email_outbox.find_one()
+        assert (message["status"], message["attempts"]) == (PENDING, attempts)
+        assert "claim" not in message
+        assert abs((message["next_attempt_at"] - utcnow()).total_seconds() - delay) < 5
+        # Not due yet, so nothing is claimed until the backoff has passed
+        assert await outbox.process_batch() == 0
+        await mongo_database.email_outbox.update_one({}, {"$set": {"next_attempt_at": utcnow()}})
+
+    assert await outbox.process_batch() == 1
+    message = await mongo_database.email_outbox.find_one()
+    assert (message["status"], message["attempts"]) == (FAILED, 3)
+    assert (outbox.retried, outbox.failed) == (2, 1)
+
+
+@pytest.mark.asyncio
+async def test_messages_left_sending_are_claimed_again_once_the_lease_expires(mongo_database):
+    pool = FakePool()
+    outbox = EmailOutbox(mongo_database.email_outbox, pool, "noreply@example.com")
+    # Claimed by a worker that died before settling it
+    await mongo_database.email_outbox.insert_one({
+        "to": "a@example.com", "subject": "Hi", "body": "Hello", "status": SENDING, "attempts": 0,
+        "next_attempt_at": utcnow(), "claimed_at": utcnow() - timedelta(seconds=CLAIM_LEASE_SECONDS - 60),
+    })
+
+    assert await outbox.process_batch() == 0
+
+    await mongo_database.email_outbox.update_one(
+        {}, {"$set": {"claimed_at": utcnow() - timedelta(seconds=CLAIM_LEASE_SECONDS + 1)}}
+    )
+    assert await outbox.process_batch() == 1
+    message = await mongo_database.email_outbox.find_one()
+    assert message["status"] == SENT
+    assert pool.sent == ["a@example.com"]
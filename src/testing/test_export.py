@@ -0,0 +1,53 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+from src.analytics.export import encode_records, gzip_chunks
+import csv
+import gzip
+import io
+import json
+import pytest
+
+
+async def voter_records(count):
+    for index in range(count):
+        yield {"record": "voter", "poll_id": "poll1", "option": "Apple, sliced", "voter_id": f"voter{index}"}
+
+
+async def collect(chunks):
+    return [chunk async for chunk in chunks]
+
+
+@pytest.mark.asyncio
+async def test_csv_is_streamed_in_chunks():
+    chunks = await collect(encode_records(voter_records(5000), "csv"))
+    assert len(chunks) > 1
+    rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode())))
+    assert len(rows) == 5000
+    assert rows[0]["option"] == "Apple, sliced"
+    assert rows[-1]["voter_id"] == "voter4999"
+
+
+@pytest.mark.asyncio
+async def test_gzipped_ndjson_round_trips():
+    compressed = b"".join(await collect(gzip_chunks(encode_records(voter_records(100), "ndjson"))))
+    lines = gzip.decompress(compressed).decode().splitlines()
+    assert [json.loads(line)["voter_id"] for line in lines] == [f"voter{index}" for index in range(100)]
+
+
+@pytest.mark.asyncio
+async def test_csv_cells_that_spreadsheets_would_evaluate_are_quoted():
+    async def records():
+        yield {"record": "feedback", "poll_id": "poll1", "commenter": "@admin", "comment": "=HYPERLINK(\"http://x\")"}
+        yield {"record": "result", "poll_id": "poll1", "option": "-1", "votes": -1}
+
+    chunks = await collect(encode_records(records(), "csv"))
+    rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode())))
+    assert (rows[0]["commenter"], rows[0]["comment"]) == ("'@admin", "'=HYPERLINK(\"http://x\")")
+    assert (rows[1]["option"], rows[1]["votes"]) == ("'-1", "-1")
+
+    ndjson = b"".join(await collect(encode_records(records(), "ndjson"))).decode().splitlines()
+    assert json.loads(ndjson[0])["commenter"] == "@admin"
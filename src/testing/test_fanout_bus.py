@@ -0,0 +1,105 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+import asyncio
+import pytest
+from src.websockets.fanout_bus import UnixSocketBus
+
+
+async def wait_for(condition, timeout=2):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+def recorder():
+    received = []
+
+    async def handler(poll_id, payload):
+        received.append((poll_id, payload))
+
+    return received, handler
+
+
+@pytest.mark.asyncio
+async def test_unix_bus_reaches_every_worker_and_survives_broker_exit(tmp_path):
+    path = str(tmp_path / "fanout.sock")
+    received_a, handler_a = recorder()
+    received_b, handler_b = recorder()
+    worker_a, worker_b = UnixSocketBus(path), UnixSocketBus(path)
+    await worker_a.start(handler_a)
+    await worker_b.start(handler_b)
+
+    await worker_b.publish("poll-a", {"votes": {"Apple": 1}})
+    await wait_for(lambda: received_a and received_b)
+    assert received_a == received_b == [("poll-a", {"votes": {"Apple": 1}})]
+
+    # Worker A hosted the broker; worker B takes over once it is gone
+    await worker_a.stop()
+    await wait_for(lambda: worker_b._broker is not None and worker_b._writer is not None)
+    await worker_b.publish("poll-a", {"votes": {"Apple": 2}})
+    await wait_for(lambda: len(received_b) == 2)
+    assert received_b[-1] == ("poll-a", {"votes": {"Apple": 2}})
+    await worker_b.stop()
+
+
+@pytest.mark.asyncio
+async def test_unix_bus_skips_malformed_and_overlong_messages(tmp_path):
+    path = str(tmp_path / "fanout.sock")
+    received, handler = recorder()
+    worker = UnixSocketBus(path)
+    await worker.start(handler)
+
+    _, rogue = await asyncio.open_unix_connection(path)
+    rogue.write(b"not json\n" + b'{"p": "poll-a"}\n' + b"x" * (2 ** 17) + b"\n")
+    await rogue.drain()
+    await asyncio.sleep(0.05)
+    await worker.publish("poll-a", {"votes": {"Apple": 1}})
+
+    await wait_for(lambda: received)
+    assert received == [("poll-a", {"votes": {"Apple": 1}})]
+    assert worker._writer is not None
+    rogue.close()
+    await worker.stop()
+
+
+@pytest.mark.asyncio
+async def test_unix_bus_broker_drops_a_worker_that_stops_reading(tmp_path):
+    path = str(tmp_path / "fanout.sock")
+    received, handler = recorder()
+    worker = UnixSocketBus(path, relay_queue_size=8)
+    await worker.start(handler)
+
+    # Connected but never reads: its socket buffer fills, then its relay queue
+    stalled_reader, stalled = await asyncio.open_unix_connection(path)
+    payload = {"text": "x" * 16384}
+    for sent in range(1, 101):
+        await worker.publish("poll-a", payload)
+        await wait_for(lambda: len(received) == sent)
+    await wait_for(lambda: worker.relay_evictions == 1)
+
+    assert len(worker._clients) == 1
+    stalled.close()
+    await worker.stop()
+
+
+@pytest.mark.asyncio
+async def test_unix_bus_stop_finishes_the_broker_relays(tmp_path):
+    path = str(tmp_path / "fanout.sock")
+    received, handler = recorder()
+    worker = UnixSocketBus(path)
+    await worker.start(handler)
+    # A second connection whose relay must not outlive the broker
+    _, idle = await asyncio.open_unix_connection(path)
+    await wait_for(lambda: len(worker._relays) == 2)
+    relays = set(worker._relays)
+
+    await worker.stop()
+
+    assert all(relay.done() for relay in relays)
+    assert not worker._relays and not worker._clients
+    idle.close()
@@ -0,0 +1,58 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+import logging
+from pymongo import ASCENDING, IndexModel
+from src import indexes
+from src.indexes import ensure_indexes, index_report
+import pytest
+
+
+@pytest.fixture
+def index_database(mongo_database, mongo_admin, monkeypatch):
+    # A database of its own, without the indexes mongo_database is created with
+    database = mongo_database.client.get_database(f"{mongo_database.name}_indexes")
+    monkeypatch.setattr(indexes, "database", database)
+    monkeypatch.setattr(indexes, "INDEXES", {
+        "polls": [
+            IndexModel([("creator", ASCENDING)]),
+            IndexModel([("slug", ASCENDING)], unique=True),
+            IndexModel([("status", ASCENDING)]),
+        ],
+        "ballots": [IndexModel([("poll_id", ASCENDING), ("voter_id", ASCENDING)], unique=True)],
+    })
+    yield database
+    mongo_admin.drop_database(database.name)
+
+
+@pytest.mark.asyncio
+async def test_an_index_that_cannot_be_built_is_logged_and_skipped(index_database, caplog):
+    # Existing duplicates make the unique slug index impossible to build
+    await index_database.polls.insert_many([{"slug": "same"}, {"slug": "same"}])
+
+    with caplog.at_level(logging.ERROR):
+        await ensure_indexes()
+
+    assert set(await index_database.polls.index_information()) == {"_id_", "creator_1", "status_1"}
+    assert "ballots" in await index_database.list_collection_names()
+    assert "Could not create index polls.slug_1" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_index_report_lists_missing_unregistered_and_unused_indexes(index_database):
+    await index_database.polls.create_index([("creator", ASCENDING)])
+    await index_database.polls.create_index([("legacy", ASCENDING)])
+    await index_database.feedback.insert_one({"poll_id": "p"})
+
+    report = await index_report()
+
+    assert set(report) == {"ballots", "feedback", "polls"}
+    assert report["polls"]["missing"] == ["slug_1", "status_1"]
+    assert report["polls"]["unregistered"] == ["legacy_1"]
+    assert report["ballots"] == {"missing": ["poll_id_1_voter_id_1"], "unregistered": [], "unused": []}
+    assert report["feedback"] == {"missing": [], "unregistered": [], "unused": []}
+    # Neither index has served a query yet
+    assert report["polls"]["unused"] == ["creator_1", "legacy_1"]
@@ -0,0 +1,55 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+from types import SimpleNamespace
+from src.notifications.dispatcher import FakeMessagingBackend, NotificationDispatcher
+import pytest
+
+
+class DeviceTokens:
+    """Just enough of device_tokens_collection for the dispatcher."""
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def distinct(self, field, query):
+        return [doc[field] for doc in self.docs if doc["user_id"] == query["user_id"]]
+
+    async def delete_many(self, query):
+        doomed = set(query["device_token"]["$in"])
+        before = len(self.docs)
+        self.docs = [doc for doc in self.docs if doc["device_token"] not in doomed]
+        return SimpleNamespace(deleted_count=before - len(self.docs))
+
+
+@pytest.mark.asyncio
+async def test_tokens_are_batched_and_unregistered_ones_pruned():
+    tokens = DeviceTokens([{"user_id": "alice", "device_token": f"token-{i}"} for i in range(1200)])
+    tokens.docs.append({"user_id": "bob", "device_token": "bob-token"})
+    backend = FakeMessagingBackend(unregistered={"token-3", "token-1100"})
+    dispatcher = NotificationDispatcher(backend, tokens, batch_size=500, batches_per_second=1000)
+
+    delivered = await dispatcher.notify_user("alice", "New feedback", "Nice poll!")
+
+    assert delivered == 1198
+    assert sorted(len(batch) for batch in backend.batches) == [200, 500, 500]
+    assert dispatcher.stats()["pruned"] == 2
+    assert len(tokens.docs) == 1199
+    assert await dispatcher.notify_user("nobody", "New feedback", "Nice poll!") == 0
+
+
+@pytest.mark.asyncio
+async def test_unavailable_backend_is_retried():
+    tokens = DeviceTokens([{"user_id": "alice", "device_token": "token"}])
+    backend = FakeMessagingBackend(failures=2)
+    dispatcher = NotificationDispatcher(backend, tokens, batches_per_second=1000, max_attempts=3, retry_base_seconds=0)
+
+    assert await dispatcher.notify_user("alice", "New feedback", "Nice poll!") == 1
+    assert dispatcher.stats()["retried"] == 2
+
+    backend.failures = 3
+    assert await dispatcher.notify_user("alice", "New feedback", "Nice poll!") == 0
+    assert dispatcher.stats()["failed"] == 1
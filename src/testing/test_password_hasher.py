@@ -0,0 +1,34 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+import asyncio
+import pytest
+from fastapi import HTTPException
+from src.authentication.password_hasher import PasswordHasher, hash_rounds
+
+
+@pytest.mark.asyncio
+async def test_hash_and_verify_run_off_the_event_loop():
+    hasher = PasswordHasher(rounds=4, workers=1, max_queue=4)
+    hashed = await hasher.hash("secret")
+
+    assert hash_rounds(hashed) == 4
+    assert await hasher.verify("secret", hashed)
+    assert not await hasher.verify("wrong", hashed)
+    assert not hasher.needs_rehash(hashed)
+    assert PasswordHasher(rounds=5, workers=1, max_queue=0).needs_rehash(hashed)
+    hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_saturated_pool_fails_fast_with_503():
+    hasher = PasswordHasher(rounds=10, workers=1, max_queue=1)
+    results = await asyncio.gather(*(hasher.hash("secret") for _ in range(4)), return_exceptions=True)
+
+    rejected = [result for result in results if isinstance(result, HTTPException)]
+    assert len(rejected) == 2 and rejected[0].status_code == 503
+    assert hasher.stats()["rejected"] == 2 and hasher.stats()["completed"] == 2
+    hasher.shutdown()
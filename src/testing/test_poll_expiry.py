@@ -0,0 +1,127 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId
+from src.polls import expiry
+from src.polls.expiry import ExpiryScheduler, build_results, is_expired, write_results
+import pytest
+
+
+def test_is_expired_handles_naive_and_missing_deadlines():
+    now = datetime.now(timezone.utc)
+    assert is_expired({"expires_at": (now - timedelta(seconds=1)).replace(tzinfo=None)})
+    assert not is_expired({"expires_at": now + timedelta(minutes=5)})
+    assert not is_expired({})
+    assert is_expired({"status": "closed"})
+
+
+def test_scheduler_keeps_earliest_deadline_first():
+    scheduler = ExpiryScheduler(rescan_seconds=60)
+    now = datetime.now(timezone.utc)
+    scheduler.schedule("later", now + timedelta(seconds=30))
+    scheduler.schedule("sooner", now + timedelta(seconds=5))
+    scheduler.schedule("sooner", now + timedelta(seconds=5))
+    scheduler.schedule("next-week", now + timedelta(days=7))
+
+    assert [poll_id for _, poll_id in sorted(scheduler.heap)] == ["sooner", "later"]
+    assert scheduler.heap[0][1] == "sooner"
+
+
+def test_results_snapshot_is_compact():
+    poll = {
+        "type": "multiple_choice",
+        "votes": {"Apple": 3, "Banana": 1},
+        "voter_count": 4,
+        "participants": ["a@example.com"] * 100,
+        "closed_at": datetime.now(timezone.utc),
+    }
+    results = build_results(poll)
+
+    assert results["total_votes"] == 4 and results["votes"] == {"Apple": 3, "Banana": 1}
+    assert "participants" not in results
+
+
+@pytest.fixture
+def expiry_database(mongo_database, monkeypatch):
+    monkeypatch.setattr(expiry, "polls_collection", mongo_database.polls)
+    monkeypatch.setattr(expiry, "ballots_collection", mongo_database.ballots)
+    return mongo_database
+
+
+@pytest.mark.asyncio
+async def test_buffered_results_are_counted_from_the_ballots(expiry_database, monkeypatch):
+    monkeypatch.setattr(expiry, "VOTE_BUFFER_ENABLED", True)
+    poll_id = ObjectId()
+    # The tally still misses increments held in a vote buffer
+    poll = {"_id": poll_id, "status": "closed", "votes": {"Apple": 1, "Banana": 0, "Cherry": 0}, "voter_count": 1}
+    await expiry_database.polls.insert_one(poll)
+    await expiry_database.ballots.insert_many([
+        {"poll_id": str(poll_id), "voter_id": f"voter{i}", "option": option}
+        for i, option in enumerate(["Apple", "Apple", "Banana"])
+    ])
+
+    await write_results(poll)
+
+    results = (await expiry_database.polls.find_one({"_id": poll_id}))["results"]
+    assert results["votes"] == {"Apple": 2, "Banana": 1, "Cherry": 0}
+    assert (results["voter_count"], results["total_votes"]) == (3, 3)
+
+
+@pytest.mark.asyncio
+async def test_buffered_results_keep_votes_cast_before_the_voter_migration(expiry_database, monkeypatch):
+    monkeypatch.setattr(expiry, "VOTE_BUFFER_ENABLED", True)
+    poll_id = ObjectId()
+    # Two votes from before the migration, one buffered vote not flushed yet
+    poll = {"_id": poll_id, "status": "closed", "votes": {"Apple": 1, "Banana": 1}, "voter_count": 2}
+    await expiry_database.polls.insert_one(poll)
+    await expiry_database.ballots.insert_many([
+        {"poll_id": str(poll_id), "voter_id": "migrated1", "option": None, "voted_at": None},
+        {"poll_id": str(poll_id), "voter_id": "migrated2", "option": None, "voted_at": None},
+        {"poll_id": str(poll_id), "voter_id": "voter3", "option": "Cherry"},
+    ])
+
+    await write_results(poll)
+
+    results = (await expiry_database.polls.find_one({"_id": poll_id}))["results"]
+    assert results["votes"] == {"Apple": 1, "Banana": 1, "Cherry": 1}
+    assert results["voter_count"] == 3
+
+
+@pytest.mark.asyncio
+async def test_one_failing_interrupted_close_does_not_stop_the_others(expiry_database, monkeypatch):
+    broken, healthy = ObjectId(), ObjectId()
+    await expiry_database.polls.insert_many([{"_id": broken, "status": "closed"}, {"_id": healthy, "status": "closed"}])
+    written = []
+
+    async def write_results(poll):
+        if poll["_id"] == broken:
+            raise ValueError("cannot encode results")
+        written.append(poll["_id"])
+
+    monkeypatch.setattr(expiry, "write_results", write_results)
+    await ExpiryScheduler()._finish_interrupted_closes()
+
+    assert written == [healthy]
+
+
+@pytest.mark.asyncio
+async def test_rescan_schedules_every_open_poll_near_its_deadline(expiry_database):
+    now = datetime.now(timezone.utc)
+    polls = {
+        "active": {"status": "active", "expires_at": now + timedelta(seconds=30)},
+        "no-status": {"expires_at": now + timedelta(seconds=30)},
+        "overdue": {"status": "active", "expires_at": now - timedelta(seconds=30)},
+        "closed": {"status": "closed", "expires_at": now + timedelta(seconds=30)},
+        "next-week": {"status": "active", "expires_at": now + timedelta(days=7)},
+    }
+    ids = {name: ObjectId() for name in polls}
+    await expiry_database.polls.insert_many([{"_id": ids[name], **poll} for name, poll in polls.items()])
+
+    scheduler = ExpiryScheduler(rescan_seconds=60)
+    await scheduler.rescan()
+
+    assert scheduler.scheduled == {str(ids[name]) for name in ("active", "no-status", "overdue")}
@@ -0,0 +1,65 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+from fastapi import HTTPException
+from src.polls import listing
+from src.polls.listing import PollPage
+import pytest
+
+
+class UnreachableCollection:
+    def find(self, *args, **kwargs):
+        raise ConnectionError("database unavailable")
+
+
+@pytest.fixture
+def listing_database(mongo_database, monkeypatch):
+    monkeypatch.setattr(listing, "polls_collection", mongo_database.polls)
+    return mongo_database
+
+
+@pytest.mark.asyncio
+async def test_pages_follow_the_next_token_newest_first(listing_database):
+    result = await listing_database.polls.insert_many([
+        {"activity_title": f"Poll {number}", "creator": "alice", "voters": ["x"] * 50} for number in range(5)
+    ])
+    newest_first = [str(poll_id) for poll_id in reversed(result.inserted_ids)]
+
+    first = await PollPage({"creator": "alice"}, page_size=2).load()
+    second = await PollPage({"creator": "alice"}, after=first.next, page_size=2).load()
+    last = await PollPage({"creator": "alice"}, after=second.next, page_size=2).load()
+
+    assert [str(poll["_id"]) for poll in first] == newest_first[:2]
+    assert first.next == newest_first[1]
+    assert [str(poll["_id"]) for poll in second] == newest_first[2:4]
+    assert [str(poll["_id"]) for poll in last] == newest_first[4:]
+    assert (last.count, last.next) == (1, None)
+    # Only the listed fields are read
+    assert "voters" not in first.polls[0]
+
+
+@pytest.mark.asyncio
+async def test_a_full_last_page_has_no_next_token(listing_database):
+    await listing_database.polls.insert_many([{"activity_title": "Poll"} for _ in range(2)])
+
+    page = await PollPage({}, page_size=2).load()
+
+    assert (page.count, page.next) == (2, None)
+
+
+def test_an_invalid_after_token_is_a_bad_request():
+    with pytest.raises(HTTPException) as error:
+        PollPage({}, after="not-a-token")
+    assert error.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_a_failed_read_is_an_error_before_anything_renders(monkeypatch):
+    monkeypatch.setattr(listing, "polls_collection", UnreachableCollection())
+
+    with pytest.raises(HTTPException) as error:
+        await PollPage({}).load()
+    assert error.value.status_code == 500
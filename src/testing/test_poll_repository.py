@@ -0,0 +1,64 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+import pytest
+from bson import ObjectId
+from src.cache import TTLCache
+from src.polls.repository import PollRepository
+
+
+class FakePollsCollection:
+    """Stores polls in memory and records every find_one."""
+
+    def __init__(self, poll: dict):
+        self.poll = poll
+        self.finds = []
+
+    async def find_one(self, query, projection=None):
+        self.finds.append(projection)
+        if query["_id"] != self.poll["_id"]:
+            return None
+        if projection is None:
+            return dict(self.poll)
+        if all(value == 0 for value in projection.values()):
+            return {key: value for key, value in self.poll.items() if key not in projection}
+        return {key: value for key, value in self.poll.items() if key in projection or key == "_id"}
+
+    async def update_one(self, query, update):
+        self.poll.update(update["$set"])
+        self.poll["meta_version"] = self.poll.get("meta_version", 0) + update["$inc"]["meta_version"]
+
+
+@pytest.mark.asyncio
+async def test_cached_metadata_is_merged_with_live_fields():
+    poll_id = ObjectId()
+    collection = FakePollsCollection({"_id": poll_id, "activity_title": "Lunch", "options": ["a", "b"], "votes": {"a": 1}})
+    repository = PollRepository(collection, TTLCache(10, 60))
+
+    await repository.get_poll(str(poll_id))
+    collection.poll["votes"] = {"a": 2}
+    poll = await repository.get_poll(str(poll_id))
+
+    assert poll["activity_title"] == "Lunch" and poll["votes"] == {"a": 2}
+    assert "activity_title" in collection.finds[1] and collection.finds[1]["activity_title"] == 0
+    assert (await repository.get_metadata(str(poll_id)))["options"] == ["a", "b"]
+    assert len(collection.finds) == 2
+
+
+@pytest.mark.asyncio
+async def test_edits_invalidate_by_version():
+    poll_id = ObjectId()
+    collection = FakePollsCollection({"_id": poll_id, "activity_title": "Lunch", "votes": {}})
+    editor = PollRepository(collection, TTLCache(10, 60))
+    other_worker = PollRepository(collection, TTLCache(10, 60))
+    await other_worker.get_poll(str(poll_id))
+
+    await editor.update_metadata(str(poll_id), {"activity_title": "Dinner"})
+
+    assert (await editor.get_metadata(str(poll_id)))["activity_title"] == "Dinner"
+    assert (await other_worker.get_poll(str(poll_id)))["activity_title"] == "Dinner"
+    other_worker.observe_version(str(poll_id), 5)
+    assert other_worker.cache.peek(str(poll_id)) is None
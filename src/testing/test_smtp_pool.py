@@ -0,0 +1,64 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+from email.message import EmailMessage
+from aiosmtpd.controller import Controller
+from src.notifications.smtp_pool import SMTPConnectionPool
+import pytest
+import socket
+
+
+class RecordingHandler:
+    """Accepts every message except those addressed to rejected@example.com."""
+
+    def __init__(self):
+        self.received = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address == "rejected@example.com":
+            return "550 No such user"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received.append(envelope.rcpt_tos)
+        return "250 Message accepted for delivery"
+
+
+def free_port() -> int:
+    # aiosmtpd's Controller connects to its own port on start, so it cannot be given port 0
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def invite(to: str) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = "noreply@example.com"
+    message["To"] = to
+    message["Subject"] = "You're invited to participate in a poll"
+    message.set_content(f"Hi {to}")
+    return message
+
+
+@pytest.mark.asyncio
+async def test_batches_reuse_one_connection_and_report_rejections():
+    handler = RecordingHandler()
+    port = free_port()
+    controller = Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    pool = SMTPConnectionPool("127.0.0.1", port, size=1, starttls=False)
+    try:
+        first = await pool.send_batch([invite(f"user{i}@example.com") for i in range(3)])
+        second = await pool.send_batch([invite("rejected@example.com"), invite("user3@example.com")])
+
+        assert first == [None, None, None]
+        assert second[0] is not None and second[1] is None
+        assert len(handler.received) == 4
+        assert pool.stats()["connections_opened"] == 1
+    finally:
+        await pool.close()
+        controller.stop()
@@ -0,0 +1,108 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+from datetime import datetime, timedelta
+from bson import ObjectId
+from src.analytics import summary as summary_module
+from src.analytics.summary import add_shard_counts, get_summary, rebuild_summary, summarize
+import pytest
+
+BUILT_AT = datetime(2026, 1, 1, 12, 0)
+
+
+@pytest.fixture
+def summary_database(mongo_database, monkeypatch):
+    monkeypatch.setattr(summary_module, "polls_collection", mongo_database.polls)
+    monkeypatch.setattr(summary_module, "ballots_collection", mongo_database.ballots)
+    monkeypatch.setattr(summary_module, "vote_counters_collection", mongo_database.vote_counters)
+    return mongo_database
+
+
+def stored_summary(**fields):
+    return {"total_votes": 0, "voter_count": 0, "participant_count": 0, "question_count": 0,
+            "answer_count": 0, "built_at": BUILT_AT, **fields}
+
+
+@pytest.mark.asyncio
+async def test_summarize_reads_the_loaded_summary():
+    poll = {"_id": ObjectId(), "summary": stored_summary(total_votes=3, voter_count=3, participant_count=4)}
+
+    assert await summarize(poll) == {
+        "total_votes": 3, "voter_count": 3, "participant_count": 4, "question_count": 0,
+        "answer_count": 0, "last_vote_at": None, "participation_rate": 75.0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_summarize_takes_sharded_totals_from_the_resolved_tally():
+    poll = {
+        "_id": ObjectId(),
+        "counter_layout": "sharded",
+        "votes": {"Apple": 5, "Banana": 3},
+        "voter_count": 8,
+        "summary": stored_summary(total_votes=2, voter_count=2, participant_count=10),
+    }
+
+    summary = await summarize(poll)
+    assert (summary["total_votes"], summary["voter_count"], summary["participation_rate"]) == (8, 8, 80.0)
+
+
+@pytest.mark.asyncio
+async def test_legacy_poll_gets_a_summary_built_on_first_read(summary_database):
+    poll_id = ObjectId()
+    await summary_database.polls.insert_one({
+        "_id": poll_id,
+        "votes": {"Apple": 2, "Banana": 1},
+        "voter_count": 3,
+        "participants": ["a@example.com", "b@example.com", "c@example.com", "d@example.com"],
+        "questions": [{"answers": [{}, {}]}, {"answers": []}],
+    })
+    await summary_database.ballots.insert_many([
+        {"poll_id": str(poll_id), "voter_id": f"voter{i}", "option": "Apple", "voted_at": BUILT_AT + timedelta(minutes=i)}
+        for i in range(3)
+    ])
+
+    summary = await get_summary(str(poll_id))
+    assert summary == {
+        "total_votes": 3, "voter_count": 3, "participant_count": 4, "question_count": 2,
+        "answer_count": 2, "last_vote_at": BUILT_AT + timedelta(minutes=2), "participation_rate": 75.0,
+    }
+    stored = (await summary_database.polls.find_one({"_id": poll_id}))["summary"]
+    assert "built_at" in stored and stored["voter_count"] == 3
+
+
+@pytest.mark.asyncio
+async def test_rebuild_summary_replaces_a_drifted_summary(summary_database):
+    poll_id = ObjectId()
+    await summary_database.polls.insert_one({
+        "_id": poll_id, "votes": {"Apple": 4}, "voter_count": 4, "participants": [],
+        "summary": stored_summary(total_votes=9, voter_count=9),
+    })
+
+    rebuilt = await rebuild_summary(str(poll_id))
+    assert (rebuilt["total_votes"], rebuilt["voter_count"]) == (4, 4)
+    assert "last_vote_at" not in rebuilt
+    assert await rebuild_summary(str(ObjectId())) is None
+
+
+@pytest.mark.asyncio
+async def test_sharded_votes_are_added_from_the_counter_shards(summary_database):
+    poll_id = ObjectId()
+    await summary_database.polls.insert_one({
+        "_id": poll_id, "counter_layout": "sharded",
+        "summary": stored_summary(total_votes=2, voter_count=2, participant_count=10, last_vote_at=BUILT_AT),
+    })
+    await summary_database.vote_counters.insert_many([
+        {"poll_id": str(poll_id), "shard": 0, "votes": {"Apple": 3}, "voter_count": 3, "last_vote_at": BUILT_AT + timedelta(minutes=5)},
+        {"poll_id": str(poll_id), "shard": 1, "votes": {"Banana": 1}, "voter_count": 1, "last_vote_at": BUILT_AT - timedelta(minutes=5)},
+    ])
+
+    summary = await get_summary(str(poll_id))
+    assert (summary["total_votes"], summary["voter_count"], summary["participation_rate"]) == (6, 6, 60.0)
+    assert summary["last_vote_at"] == BUILT_AT + timedelta(minutes=5)
+
+    added = await add_shard_counts(str(ObjectId()), stored_summary(voter_count=1))
+    assert added["voter_count"] == 1
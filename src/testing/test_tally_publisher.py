@@ -0,0 +1,81 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+import asyncio
+import json
+import msgpack
+import pytest
+from src.websockets.connection_manager import ConnectionManager
+from src.websockets.tally_frames import TallyFrames, is_pong, is_resync_request, message_type, negotiate_encoding
+from src.websockets.tally_publisher import create_tally_publisher
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message):
+        self.sent.append(json.loads(message))
+
+    async def send_bytes(self, message):
+        self.sent.append(msgpack.unpackb(message))
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_in_process_publisher_pushes_snapshot_then_deltas_to_poll_viewers():
+    manager = ConnectionManager()
+    viewer, binary_viewer, other_viewer = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+    await manager.connect(viewer, "poll-a")
+    await manager.connect(binary_viewer, "poll-a", negotiate_encoding("msgpack"))
+    await manager.connect(other_viewer, "poll-b")
+    publisher = create_tally_publisher("inprocess", manager)
+    publisher.scheduler.interval = 0
+
+    await publisher.publish("poll-a", {"Apple": 3, "Banana": 1})
+    await settle()
+    await publisher.publish("poll-a", {"Apple": 4, "Banana": 1})
+    await settle()
+
+    expected = [
+        {"t": "s", "v": 1, "c": {"Apple": 3, "Banana": 1}},
+        {"t": "d", "v": 2, "c": {"Apple": 4}},
+    ]
+    assert viewer.sent == expected
+    assert binary_viewer.sent == expected
+    assert other_viewer.sent == []
+    await publisher.stop()
+    await manager.shutdown()
+
+
+def test_tally_frames_report_removed_options_and_skip_unchanged_tallies():
+    frames = TallyFrames()
+    frames.seed("poll-a", {"Apple": 1, "Banana": 2})
+
+    assert frames.update("poll-a", {"Apple": 1, "Banana": 2}) is None
+    assert frames.update("poll-a", {"Apple": 2}) == {"t": "d", "v": 2, "c": {"Apple": 2, "Banana": None}}
+    assert frames.snapshot("poll-a") == {"t": "s", "v": 2, "c": {"Apple": 2}}
+
+
+def test_client_messages_are_read_from_text_and_binary_frames():
+    assert is_pong('{"t":"pong"}')
+    assert is_pong(msgpack.packb({"t": "pong"}))
+    assert is_resync_request(b'{"t":"resync"}')
+    assert message_type(b"\xc1") is None
+    assert message_type(msgpack.packb([1, 2])) is None
+    assert message_type("hello") is None
+
+
+def test_unknown_publisher_is_rejected():
+    with pytest.raises(ValueError):
+        create_tally_publisher("carrier-pigeon", ConnectionManager())
@@ -0,0 +1,95 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+from datetime import datetime, timedelta, timezone
+from pymongo import UpdateOne
+from src.analytics import timeline
+from src.analytics.timeline import TimelineRecorder, get_timeline, rebuild_timeline
+import pytest
+
+MINUTE = datetime(2026, 1, 1, 12, 0)
+
+
+@pytest.fixture
+def timeline_database(mongo_database, monkeypatch):
+    monkeypatch.setattr(timeline, "ballots_collection", mongo_database.ballots)
+    monkeypatch.setattr(timeline, "vote_timeline_collection", mongo_database.vote_timeline)
+    return mongo_database
+
+
+async def insert_ballots(database, poll_id, votes):
+    await database.ballots.insert_many([
+        {"poll_id": poll_id, "voter_id": f"voter{i}", "option": option, "voted_at": MINUTE + timedelta(seconds=second)}
+        for i, (option, second) in enumerate(votes)
+    ])
+
+
+@pytest.mark.asyncio
+async def test_recorder_writes_one_rollup_per_poll_and_minute(recording_collection):
+    recording_collection.fail_times = 1
+    recorder = TimelineRecorder(recording_collection, flush_interval_ms=1000)
+    minute = MINUTE.replace(tzinfo=timezone.utc)
+    recorder.record("poll1", "Apple", at=minute + timedelta(seconds=5))
+    recorder.record("poll1", "Apple", at=minute + timedelta(seconds=50))
+    recorder.record("poll1", "Banana", 3, at=minute + timedelta(seconds=59))
+    recorder.record("poll1", "Apple", at=minute + timedelta(seconds=61))
+
+    await recorder.flush()
+    assert recording_collection.requests == []
+
+    await recorder.flush()
+    assert recording_collection.requests == [
+        UpdateOne({"poll_id": "poll1", "minute": minute},
+                  {"$inc": {"counts.Apple": 2, "counts.Banana": 3, "total": 5}}, upsert=True),
+        UpdateOne({"poll_id": "poll1", "minute": minute + timedelta(minutes=1)},
+                  {"$inc": {"counts.Apple": 1, "total": 1}}, upsert=True),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_second_timeline_buckets_the_ballots(timeline_database):
+    await insert_ballots(timeline_database, "poll1", [("Apple", 5), ("Apple", 7), ("Banana", 8), ("Apple", 15), ("Banana", 61)])
+    await insert_ballots(timeline_database, "poll2", [("Apple", 5)])
+
+    assert await get_timeline("poll1", "second", 10) == [
+        {"t": MINUTE, "counts": {"Apple": 2, "Banana": 1}, "total": 3},
+        {"t": MINUTE + timedelta(seconds=10), "counts": {"Apple": 1}, "total": 1},
+        {"t": MINUTE + timedelta(seconds=60), "counts": {"Banana": 1}, "total": 1},
+    ]
+    assert await get_timeline("poll1", "second", 10, start=MINUTE + timedelta(seconds=10), end=MINUTE + timedelta(seconds=60)) == [
+        {"t": MINUTE + timedelta(seconds=10), "counts": {"Apple": 1}, "total": 1},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_hour_timeline_sums_the_minute_rollups(timeline_database):
+    recorder = TimelineRecorder(timeline_database.vote_timeline, flush_interval_ms=1000)
+    minute = MINUTE.replace(tzinfo=timezone.utc)
+    recorder.record("poll1", "Apple", at=minute + timedelta(seconds=5))
+    recorder.record("poll1", "Banana", 3, at=minute + timedelta(seconds=59))
+    recorder.record("poll1", "Apple", at=minute + timedelta(seconds=61))
+    recorder.record("poll1", "Apple", at=minute + timedelta(hours=1, seconds=10))
+    await recorder.flush()
+    recorder.record("poll1", "Banana", at=minute + timedelta(seconds=30))
+    await recorder.flush()
+
+    assert await get_timeline("poll1", "hour") == [
+        {"t": MINUTE, "counts": {"Apple": 2, "Banana": 4}, "total": 6},
+        {"t": MINUTE + timedelta(hours=1), "counts": {"Apple": 1}, "total": 1},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_rebuild_recounts_the_rollups_from_the_ballots(timeline_database):
+    await insert_ballots(timeline_database, "poll1", [("Apple", 5), ("Apple", 7), ("Banana", 8), ("Apple", 15), ("Banana", 61)])
+    await timeline_database.vote_timeline.insert_one({"poll_id": "poll1", "minute": MINUTE, "counts": {"Apple": 99}, "total": 99})
+
+    await rebuild_timeline("poll1")
+
+    assert await get_timeline("poll1", "minute") == [
+        {"t": MINUTE, "counts": {"Apple": 3, "Banana": 1}, "total": 4},
+        {"t": MINUTE + timedelta(minutes=1), "counts": {"Banana": 1}, "total": 1},
+    ]
@@ -0,0 +1,36 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+import time
+from src.cache import TTLCache
+from src.authentication.user_cache import UserCache
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["hits"] == 3 and cache.stats()["misses"] == 1
+
+
+def test_user_cache_respects_token_expiry_and_invalidation():
+    cache = UserCache(max_entries=10, ttl_seconds=60)
+    cache.set_username("expired-token", "alice", time.time() - 1)
+    cache.set_username("token", "alice", time.time() + 600)
+    cache.set_user("alice", {"username": "alice", "email": "alice@example.com"})
+
+    assert cache.get_username("expired-token") is None
+    assert cache.get_username("token") == "alice"
+    cache.get_user("alice")["email"] = "changed@example.com"
+    assert cache.get_user("alice")["email"] == "alice@example.com"
+
+    cache.invalidate_user("alice")
+    assert cache.get_user("alice") is None
@@ -0,0 +1,72 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+import pytest
+from unittest.mock import ANY
+from bson import ObjectId
+from pymongo import UpdateOne
+from src.voting.vote_buffer import VoteBuffer
+
+
+def poll_update(poll_id, votes):
+    total = sum(votes.values())
+    return UpdateOne({"_id": ObjectId(poll_id)}, {
+        "$inc": {**{f"votes.{option}": n for option, n in votes.items()},
+                 "voter_count": total, "summary.total_votes": total, "summary.voter_count": total},
+        "$max": {"summary.last_vote_at": ANY},
+    })
+
+
+@pytest.mark.asyncio
+async def test_vote_buffer_coalesces_increments_per_poll(recording_collection):
+    buffer = VoteBuffer(recording_collection, flush_interval_ms=1000, max_pending=100)
+    poll_id = str(ObjectId())
+    for option in ["Apple", "Apple", "Banana"]:
+        buffer.add(poll_id, option)
+
+    assert buffer.pending_for(poll_id) == {"Apple": 2, "Banana": 1}
+    await buffer.flush()
+
+    assert recording_collection.requests == [poll_update(poll_id, {"Apple": 2, "Banana": 1})]
+    assert buffer.pending_votes == 0
+
+
+@pytest.mark.asyncio
+async def test_vote_buffer_keeps_votes_when_flush_fails_and_flushes_on_stop(recording_collection):
+    recording_collection.fail_times = 1
+    buffer = VoteBuffer(recording_collection, flush_interval_ms=1000, max_pending=100)
+    buffer.start()
+    poll_id = str(ObjectId())
+    buffer.add(poll_id, "Apple")
+
+    await buffer.flush()
+    assert buffer.pending_votes == 1
+
+    await buffer.stop()
+    assert buffer.pending_votes == 0
+    assert buffer.flushed_votes == 1
+    assert recording_collection.requests == [poll_update(poll_id, {"Apple": 1})]
+
+
+@pytest.mark.asyncio
+async def test_vote_buffer_requeues_only_the_failed_updates_of_a_bulk_write(recording_collection):
+    recording_collection.failing_indexes = {1}
+    buffer = VoteBuffer(recording_collection, flush_interval_ms=1000, max_pending=100)
+    first, second, third = str(ObjectId()), str(ObjectId()), str(ObjectId())
+    buffer.add(first, "Apple")
+    buffer.add(second, "Banana", 2)
+    buffer.add(third, "Cherry")
+
+    await buffer.flush()
+    assert recording_collection.requests == [poll_update(first, {"Apple": 1}), poll_update(third, {"Cherry": 1})]
+    assert buffer.pending_for(second) == {"Banana": 2}
+    assert buffer.pending_votes == 2
+    assert buffer.flushed_votes == 2
+
+    await buffer.flush()
+    assert recording_collection.requests[2:] == [poll_update(second, {"Banana": 2})]
+    assert buffer.pending_votes == 0
+    assert buffer.flushed_votes == 4
@@ -0,0 +1,72 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+from bson import ObjectId
+from src.voting import vote_counters
+from src.voting.vote_counters import SHARDED_LAYOUT, VoteRateTracker, promote_poll, resolve_counts, sharded_polls
+import pytest
+
+
+@pytest.fixture
+def counters_database(mongo_database, monkeypatch):
+    monkeypatch.setattr(vote_counters, "polls_collection", mongo_database.polls)
+    monkeypatch.setattr(vote_counters, "vote_counters_collection", mongo_database.vote_counters)
+    sharded_polls.clear()
+    yield mongo_database
+    sharded_polls.clear()
+
+
+def test_rate_tracker_fires_once_per_window_and_drops_idle_polls(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(vote_counters.time, "monotonic", lambda: clock[0])
+    tracker = VoteRateTracker(threshold=3)
+
+    assert [tracker.record("hot") for _ in range(4)] == [False, False, True, False]
+    tracker.record("idle")
+    clock[0] = 101.5
+    tracker.record("hot")
+
+    assert tracker.windows == {"hot": (101, 1)}
+
+
+@pytest.mark.asyncio
+async def test_promotion_switches_the_poll_to_sharded_counters(counters_database, monkeypatch):
+    monkeypatch.setattr(vote_counters, "VOTE_SHARD_COUNT", 4)
+    poll_id = (await counters_database.polls.insert_one({"votes": {"Apple": 2}, "voter_count": 2})).inserted_id
+
+    await promote_poll(str(poll_id))
+    await promote_poll(str(poll_id))
+
+    poll = await counters_database.polls.find_one({"_id": poll_id})
+    assert (poll["counter_layout"], poll["counter_shards"]) == (SHARDED_LAYOUT, 4)
+    assert sharded_polls == {str(poll_id): 4}
+
+
+@pytest.mark.asyncio
+async def test_resolve_counts_adds_the_shards_to_the_embedded_tally(counters_database):
+    poll_id = ObjectId()
+    poll = {"_id": poll_id, "votes": {"Apple": 2, "Banana": 0}, "voter_count": 2,
+            "counter_layout": SHARDED_LAYOUT, "counter_shards": 2}
+    await counters_database.vote_counters.insert_many([
+        {"poll_id": str(poll_id), "shard": 0, "votes": {"Apple": 1}, "voter_count": 1},
+        {"poll_id": str(poll_id), "shard": 1, "votes": {"Banana": 3}, "voter_count": 3},
+    ])
+
+    resolved = await resolve_counts(poll)
+
+    assert (resolved["votes"], resolved["voter_count"]) == ({"Apple": 3, "Banana": 3}, 6)
+    assert sharded_polls == {str(poll_id): 2}
+
+
+@pytest.mark.asyncio
+async def test_resolve_counts_prefers_frozen_results_and_skips_embedded_polls(counters_database):
+    closed = {"_id": ObjectId(), "votes": {"Apple": 1}, "voter_count": 1, "counter_layout": SHARDED_LAYOUT,
+              "results": {"votes": {"Apple": 5}, "voter_count": 5}}
+    embedded = {"_id": ObjectId(), "votes": {"Apple": 1}, "voter_count": 1}
+
+    assert (await resolve_counts(closed))["votes"] == {"Apple": 5}
+    assert await resolve_counts(embedded) is embedded
+    assert sharded_polls == {}
@@ -0,0 +1,200 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId
+from fastapi import HTTPException
+from src.cache import TTLCache
+from src.polls.repository import PollRepository
+from src.voting import vote_engine
+from src.voting.models import BatchVote
+from src.voting.vote_buffer import VoteBuffer
+from src.voting.vote_counters import SHARDED_LAYOUT
+from src.voting.vote_engine import apply_batch_tally, cast_buffered_vote, cast_sharded_vote, cast_vote, cast_vote_batch
+import pytest
+
+
+class FailingTallyCollection:
+    """Polls collection whose tally updates fail as if the connection dropped."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def find_one_and_update(self, *args, **kwargs):
+        raise ConnectionError("database unavailable")
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+
+class UnreachableCollection:
+    def __getattr__(self, name):
+        raise AssertionError(f"unexpected database call: {name}")
+
+
+@pytest.fixture
+def engine_database(mongo_database, monkeypatch):
+    monkeypatch.setattr(vote_engine, "polls_collection", mongo_database.polls)
+    monkeypatch.setattr(vote_engine, "ballots_collection", mongo_database.ballots)
+    monkeypatch.setattr(vote_engine, "VOTE_BUFFER_ENABLED", False)
+    monkeypatch.setattr(vote_engine, "KIOSK_ACCOUNTS", {"kiosk"})
+    return mongo_database
+
+
+async def insert_poll(database, **fields) -> str:
+    poll = {"creator": "alice", "status": "active", "options": ["Apple", "Banana"], "votes": {"Apple": 0, "Banana": 0},
+            "voter_count": 0, **fields}
+    result = await database.polls.insert_one(poll)
+    return str(result.inserted_id)
+
+
+@pytest.mark.asyncio
+async def test_vote_counts_and_keeps_its_ballot(engine_database):
+    poll_id = await insert_poll(engine_database)
+
+    tally = await cast_vote(poll_id, "Banana", "v1")
+
+    assert tally == {"Apple": 0, "Banana": 1}
+    assert await engine_database.ballots.count_documents({"poll_id": poll_id, "voter_id": "v1"}) == 1
+
+
+@pytest.mark.asyncio
+async def test_a_vote_that_failed_to_count_gives_the_ballot_back(engine_database, monkeypatch):
+    poll_id = await insert_poll(engine_database)
+    monkeypatch.setattr(vote_engine, "polls_collection", FailingTallyCollection(engine_database.polls))
+
+    with pytest.raises(ConnectionError):
+        await cast_vote(poll_id, "Apple", "v1")
+
+    assert await engine_database.ballots.count_documents({"poll_id": poll_id}) == 0
+
+
+@pytest.mark.asyncio
+async def test_votes_the_cached_metadata_rules_out_never_reach_the_database(engine_database, monkeypatch):
+    repository = PollRepository(engine_database.polls, TTLCache(10, 60), TTLCache(10, float("inf")))
+    monkeypatch.setattr(vote_engine, "poll_repository", repository)
+    open_id = await insert_poll(engine_database)
+    closed_id = await insert_poll(engine_database, status="closed", results={"votes": {"Apple": 1}, "voter_count": 1})
+    await repository.get_metadata(open_id)
+    await repository.get_poll(closed_id)
+    monkeypatch.setattr(vote_engine, "polls_collection", UnreachableCollection())
+    monkeypatch.setattr(vote_engine, "ballots_collection", UnreachableCollection())
+
+    with pytest.raises(HTTPException) as invalid:
+        await cast_vote(open_id, "Cherry", "v1")
+    with pytest.raises(HTTPException) as closed:
+        await cast_vote(closed_id, "Apple", "v1")
+
+    assert invalid.value.detail == "Invalid option selected"
+    assert closed.value.detail == "This poll is closed"
+
+
+@pytest.mark.asyncio
+async def test_a_rejected_vote_gives_the_ballot_back(engine_database):
+    poll_id = await insert_poll(engine_database, status="closed")
+
+    with pytest.raises(HTTPException) as closed:
+        await cast_vote(poll_id, "Apple", "v1")
+
+    assert closed.value.detail == "This poll is closed"
+    assert await engine_database.ballots.count_documents({"poll_id": poll_id}) == 0
+
+
+@pytest.mark.asyncio
+async def test_batch_rejects_invalid_votes_one_by_one(engine_database):
+    poll_id = await insert_poll(engine_database)
+    closed_id = await insert_poll(engine_database, expires_at=datetime.now(timezone.utc) - timedelta(minutes=1))
+    votes = [
+        BatchVote(poll_id=poll_id, option="Apple", voter="v1"),
+        BatchVote(poll_id="not-an-id", option="Apple", voter="v2"),
+        BatchVote(poll_id=str(ObjectId()), option="Apple", voter="v3"),
+        BatchVote(poll_id=closed_id, option="Apple", voter="v4"),
+        BatchVote(poll_id=poll_id, option="Cherry", voter="v5"),
+        BatchVote(poll_id=poll_id, option="Banana", voter="v1"),
+    ]
+
+    results = await cast_vote_batch(votes, "alice")
+
+    assert [result.get("detail") for result in results] == [
+        None, "Invalid poll ID format", "Poll not found", "This poll is closed", "Invalid option selected",
+        "Duplicate vote in batch",
+    ]
+    poll = await engine_database.polls.find_one({"_id": ObjectId(poll_id)})
+    assert poll["votes"] == {"Apple": 1, "Banana": 0}
+    assert poll["voter_count"] == 1
+    assert await engine_database.ballots.count_documents({"poll_id": poll_id}) == 1
+
+
+@pytest.mark.asyncio
+async def test_batch_maps_stored_ballots_to_already_voted(engine_database):
+    poll_id = await insert_poll(engine_database)
+    await engine_database.ballots.insert_one({"poll_id": poll_id, "voter_id": "v1", "option": "Apple"})
+    votes = [BatchVote(poll_id=poll_id, option="Banana", voter="v1"), BatchVote(poll_id=poll_id, option="Banana", voter="v2")]
+
+    results = await cast_vote_batch(votes, "alice")
+
+    assert [result["status"] for result in results] == ["rejected", "accepted"]
+    assert results[0]["detail"] == "You have already voted"
+    poll = await engine_database.polls.find_one({"_id": ObjectId(poll_id)})
+    assert poll["votes"] == {"Apple": 0, "Banana": 1}
+
+
+@pytest.mark.asyncio
+async def test_batch_only_accepts_the_creator_or_a_kiosk_account(engine_database):
+    poll_id = await insert_poll(engine_database)
+
+    mallory = await cast_vote_batch([BatchVote(poll_id=poll_id, option="Apple", voter="v1")], "mallory")
+    kiosk = await cast_vote_batch([BatchVote(poll_id=poll_id, option="Apple", voter="v2")], "kiosk")
+
+    assert mallory[0]["detail"] == "Not authorized to vote on this poll"
+    assert kiosk[0]["status"] == "accepted"
+    assert await engine_database.ballots.count_documents({"poll_id": poll_id}) == 1
+
+
+@pytest.mark.asyncio
+async def test_batch_tally_hands_ballots_back_when_the_poll_closed(engine_database):
+    # The poll was open when the batch was validated and closed before its tally update
+    poll_id = await insert_poll(engine_database, status="closed")
+    votes = [BatchVote(poll_id=poll_id, option="Apple", voter="v1"), BatchVote(poll_id=poll_id, option="Banana", voter="v2")]
+    await engine_database.ballots.insert_many([{"poll_id": poll_id, "voter_id": vote.voter, "option": vote.option} for vote in votes])
+    rejected = {}
+
+    await apply_batch_tally(poll_id, {"status": "active"}, [0, 1], votes, rejected.__setitem__)
+
+    assert rejected == {0: "This poll is closed", 1: "This poll is closed"}
+    assert await engine_database.ballots.count_documents({"poll_id": poll_id}) == 0
+    poll = await engine_database.polls.find_one({"_id": ObjectId(poll_id)})
+    assert poll["voter_count"] == 0
+
+
+@pytest.mark.asyncio
+async def test_sharded_vote_remembers_the_poll_is_sharded(engine_database, monkeypatch):
+    monkeypatch.setattr(vote_engine, "sharded_polls", {})
+    increments = []
+
+    async def increment_shard(poll_id, votes, shards):
+        increments.append((poll_id, votes, shards))
+
+    monkeypatch.setattr(vote_engine, "increment_shard", increment_shard)
+    poll_id = await insert_poll(engine_database, counter_layout=SHARDED_LAYOUT, counter_shards=3)
+
+    await cast_sharded_vote(poll_id, "Apple", "v1")
+
+    assert vote_engine.sharded_polls == {poll_id: 3}
+    assert increments == [(poll_id, {"Apple": 1}, 3)]
+
+
+@pytest.mark.asyncio
+async def test_buffered_vote_returns_the_tally_with_pending_votes(engine_database, recording_collection, monkeypatch):
+    monkeypatch.setattr(vote_engine, "vote_buffer", VoteBuffer(recording_collection, flush_interval_ms=1000, max_pending=100))
+    poll_id = await insert_poll(engine_database, votes={"Apple": 2, "Banana": 0}, voter_count=2)
+    sharded_id = await insert_poll(engine_database, counter_layout=SHARDED_LAYOUT, counter_shards=3)
+
+    await cast_buffered_vote(poll_id, "Banana", "v1")
+    tally = await cast_buffered_vote(poll_id, "Apple", "v2")
+
+    assert tally == {"Apple": 3, "Banana": 1}
+    assert await cast_buffered_vote(sharded_id, "Apple", "v1") is None
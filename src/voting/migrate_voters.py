@@ -0,0 +1,61 @@
+# src/voting/migrate_voters.py
+"""
+Moves the voter lists embedded in poll documents into the ballots collection.
+
+Run once per deployment with:
+    python -m src.voting.migrate_voters
+
+The migration is idempotent: ballots that already exist are skipped by the unique
+(poll_id, voter_id) index, and each poll gets its `voter_count` recomputed from the
+ballots before the `voters` array is removed. Run it while voting is paused, since a
+vote landing between the count and the update would not be reflected in `voter_count`.
+"""
+from pymongo.errors import BulkWriteError
+from src.database import polls_collection, ballots_collection, test_connection
+import asyncio
+import logging
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+async def migrate_poll(poll: dict) -> int:
+    """Copies one poll's voters into ballots and returns its voter count."""
+    poll_id = str(poll["_id"])
+    voters = poll.get("voters") or []
+    if voters:
+        ballots = [
+            {"poll_id": poll_id, "voter_id": voter_id, "option": None, "voted_at": None}
+            for voter_id in voters
+        ]
+        try:
+            await ballots_collection.insert_many(ballots, ordered=False)
+        except BulkWriteError as e:
+            # Ballots left over from an earlier run are expected, anything else is not
+            errors = [err for err in e.details.get("writeErrors", []) if err.get("code") != DUPLICATE_KEY_ERROR]
+            if errors:
+                raise
+
+    voter_count = await ballots_collection.count_documents({"poll_id": poll_id})
+    await polls_collection.update_one(
+        {"_id": poll["_id"]},
+        {"$set": {"voter_count": voter_count}, "$unset": {"voters": ""}},
+    )
+    return voter_count
+
+
+async def migrate_voters():
+    """Migrates every poll that still has an embedded `voters` array."""
+    await test_connection()
+    await ballots_collection.create_index([("poll_id", 1), ("voter_id", 1)], unique=True)
+
+    migrated = 0
+    async for poll in polls_collection.find({"voters": {"$exists": True}}, {"voters": 1}):
+        voter_count = await migrate_poll(poll)
+        migrated += 1
+        logging.info(f"Migrated poll {poll['_id']}: {voter_count} voters")
+
+    logging.info(f"Voter migration finished: {migrated} polls migrated")
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate_voters())
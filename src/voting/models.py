@@ -0,0 +1,13 @@
+# src/voting/models.py
+
+from pydantic import BaseModel, conlist
+
+MAX_BATCH_VOTES = 5000
+
+class BatchVote(BaseModel):
+    poll_id: str
+    option: str
+    voter: str
+
+class BatchVoteRequest(BaseModel):
+    votes: conlist(BatchVote, min_items=1, max_items=MAX_BATCH_VOTES)
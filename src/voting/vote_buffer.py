@@ -0,0 +1,53 @@
+# src/voting/vote_buffer.py
+"""
+Write-behind aggregation of vote tallies.
+
+Ballots are still inserted one by one, so duplicate voters are rejected immediately,
+but the `$inc` on the poll document is deferred: increments are coalesced per
+(poll_id, option) and flushed as one update per poll every `flush_interval_ms`
+milliseconds, or as soon as `max_pending` votes are waiting.
+
+Loss is bounded: if the process dies, at most the increments collected since the last
+flush (one interval, never more than `max_pending` votes) are missing from the poll
+tallies. The ballots for those votes are already stored, so the tallies can be
+recounted from the ballots collection. `stop()` flushes whatever is pending, so a
+normal shutdown loses nothing. Polls whose update fails are retried on the next flush;
+see src/write_behind.py.
+"""
+from datetime import datetime
+from typing import Dict, Tuple
+from pymongo import UpdateOne
+from bson import ObjectId
+from src.config import VOTE_BUFFER_FLUSH_MS, VOTE_BUFFER_MAX_PENDING
+from src.database import polls_collection
+from src.analytics.summary import vote_increments, last_vote
+from src.write_behind import WriteBehindBuffer
+
+
+class VoteBuffer(WriteBehindBuffer):
+    name = "Vote buffer"
+
+    def __init__(self, collection, flush_interval_ms: int, max_pending: int):
+        super().__init__(collection, flush_interval_ms, max_pending)
+
+    def add(self, poll_id: str, option: str, count: int = 1):
+        """Queues votes for the next flush."""
+        self.increment(poll_id, option, count)
+
+    def pending_for(self, poll_id: str) -> Dict[str, int]:
+        """Returns the increments not yet written for a poll."""
+        return dict(self.pending.get(poll_id, {}))
+
+    def build_update(self, poll_id: str, options: Dict[str, int], flushed_at: datetime) -> UpdateOne:
+        """One `$inc` per poll covering all of its options."""
+        return UpdateOne(*self.update_for(poll_id, options, flushed_at))
+
+    def update_for(self, poll_id: str, options: Dict[str, int], flushed_at: datetime) -> Tuple[dict, dict]:
+        """Returns the filter and update document writing a poll's coalesced votes."""
+        increments = {f"votes.{option}": count for option, count in options.items()}
+        increments["voter_count"] = sum(options.values())
+        increments.update(vote_increments(increments["voter_count"]))
+        return {"_id": ObjectId(poll_id)}, {"$inc": increments, "$max": last_vote(flushed_at)}
+
+
+vote_buffer = VoteBuffer(polls_collection, VOTE_BUFFER_FLUSH_MS, VOTE_BUFFER_MAX_PENDING)
@@ -0,0 +1,116 @@
+# src/voting/vote_counters.py
+"""
+Sharded vote counters for very hot polls.
+
+By default a poll keeps its tally in the embedded `votes` map. Once a poll receives
+more than VOTE_SHARD_PROMOTION_RATE votes per second it is promoted: the poll gets
+`counter_layout: "sharded"` and from then on each vote increments one of
+`counter_shards` documents in the vote_counters collection, picked at random, so
+concurrent votes no longer contend on the poll document.
+
+The embedded counts are left in place at promotion, so a poll's tally is always the
+embedded `votes`/`voter_count` plus the sum over its shards. Readers go through
+`resolve_counts` to get that total.
+"""
+from typing import Dict
+from bson import ObjectId
+from datetime import datetime, timezone
+from src.config import VOTE_SHARD_COUNT, VOTE_SHARD_PROMOTION_RATE
+from src.database import polls_collection, vote_counters_collection
+import logging
+import random
+import time
+
+SHARDED_LAYOUT = "sharded"
+
+
+class VoteRateTracker:
+    """
+    Counts votes per poll in one-second windows to spot polls worth sharding.
+    Windows of polls that stopped receiving votes are dropped once a second, so only
+    the polls voted on in the current second are kept.
+    """
+
+    def __init__(self, threshold: int):
+        self.threshold = threshold
+        self.windows: Dict[str, tuple] = {}
+        self.swept_at = 0
+
+    def record(self, poll_id: str) -> bool:
+        """Records a vote and returns True when the poll crossed the threshold."""
+        now = int(time.monotonic())
+        if now != self.swept_at:
+            self.windows = {key: value for key, value in self.windows.items() if value[0] == now}
+            self.swept_at = now
+        window, count = self.windows.get(poll_id, (now, 0))
+        if window != now:
+            window, count = now, 0
+        count += 1
+        self.windows[poll_id] = (window, count)
+        return count == self.threshold
+
+    def forget(self, poll_id: str):
+        self.windows.pop(poll_id, None)
+
+
+vote_rate_tracker = VoteRateTracker(VOTE_SHARD_PROMOTION_RATE)
+
+# Polls this process already knows to be sharded, with their shard count
+sharded_polls: Dict[str, int] = {}
+
+
+def is_sharded(poll: dict) -> bool:
+    return poll.get("counter_layout") == SHARDED_LAYOUT
+
+
+async def promote_poll(poll_id: str):
+    """Switches a poll to sharded counters."""
+    result = await polls_collection.update_one(
+        {"_id": ObjectId(poll_id), "counter_layout": {"$ne": SHARDED_LAYOUT}},
+        {"$set": {"counter_layout": SHARDED_LAYOUT, "counter_shards": VOTE_SHARD_COUNT}},
+    )
+    sharded_polls.setdefault(poll_id, VOTE_SHARD_COUNT)
+    vote_rate_tracker.forget(poll_id)
+    if result.modified_count:
+        logging.info(f"Promoted poll {poll_id} to {VOTE_SHARD_COUNT} sharded vote counters")
+
+
+async def increment_shard(poll_id: str, increments: Dict[str, int], shards: int):
+    """
+    Adds vote increments to a randomly chosen counter shard of the poll.
+    :param increments: Votes to add per option.
+    :param shards: Number of shards the poll's counters are spread across.
+    """
+    await vote_counters_collection.update_one(
+        {"poll_id": poll_id, "shard": random.randrange(shards)},
+        {
+            "$inc": {
+                **{f"votes.{option}": count for option, count in increments.items()},
+                "voter_count": sum(increments.values()),
+            },
+            "$max": {"last_vote_at": datetime.now(timezone.utc)},
+        },
+        upsert=True,
+    )
+
+
+async def resolve_counts(poll: dict) -> dict:
+    """
+    Returns the poll with `votes` and `voter_count` holding its full tally.
+    Closed polls use their frozen results; polls with embedded counters are returned unchanged.
+    """
+    results = poll.get("results")
+    if results is not None:
+        return {**poll, "votes": results["votes"], "voter_count": results["voter_count"]}
+    if not is_sharded(poll):
+        return poll
+
+    poll_id = str(poll["_id"])
+    sharded_polls.setdefault(poll_id, poll.get("counter_shards", VOTE_SHARD_COUNT))
+    votes = dict(poll.get("votes", {}))
+    voter_count = poll.get("voter_count", 0)
+    async for shard in vote_counters_collection.find({"poll_id": poll_id}, {"votes": 1, "voter_count": 1}):
+        for option, count in shard.get("votes", {}).items():
+            votes[option] = votes.get(option, 0) + count
+        voter_count += shard.get("voter_count", 0)
+    return {**poll, "votes": votes, "voter_count": voter_count}
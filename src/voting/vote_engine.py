@@ -0,0 +1,305 @@
+# src/voting/vote_engine.py
+from fastapi import HTTPException
+from starlette.status import HTTP_404_NOT_FOUND, HTTP_400_BAD_REQUEST
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, BulkWriteError
+from bson import ObjectId
+from datetime import datetime, timezone
+from collections import defaultdict
+from typing import List
+from src.database import polls_collection, ballots_collection
+from src.config import VOTE_BUFFER_ENABLED, VOTE_SHARD_COUNT, KIOSK_ACCOUNTS
+from src.voting.vote_buffer import vote_buffer
+from src.voting.models import BatchVote
+from src.polls.repository import poll_repository
+from src.polls.expiry import is_expired, open_poll_filter
+from src.analytics.summary import vote_increments, last_vote
+from src.analytics.timeline import timeline_recorder
+from src.voting.vote_counters import (
+    SHARDED_LAYOUT, sharded_polls, vote_rate_tracker, promote_poll, increment_shard, is_sharded,
+)
+import asyncio
+import logging
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+async def cast_vote(poll_id: str, option: str, voter_id: str) -> dict:
+    """
+    Records a vote.
+    The ballot insert is de-duplicated by the unique (poll_id, voter_id) index, and
+    the tally update only matches an open poll that offers the option, so both
+    checks happen on the server without reading the poll first.
+    :param poll_id: The poll identifier.
+    :param option: The selected option.
+    :param voter_id: Username, guest email or "Anonymous".
+    :return: The updated vote tally of the poll, or None for a poll with sharded counters.
+    """
+    reject_from_cache(poll_id, option)
+    if VOTE_BUFFER_ENABLED:
+        return await cast_buffered_vote(poll_id, option, voter_id)
+
+    await insert_ballot(poll_id, option, voter_id)
+
+    try:
+        if poll_id in sharded_polls:
+            return await cast_sharded_vote(poll_id, option, voter_id)
+
+        poll = await polls_collection.find_one_and_update(
+            {
+                "_id": ObjectId(poll_id),
+                **open_poll_filter(),
+                "options": option,
+                "counter_layout": {"$ne": SHARDED_LAYOUT},
+            },
+            {
+                "$inc": {f"votes.{option}": 1, "voter_count": 1, **vote_increments(1)},
+                "$max": last_vote(datetime.now(timezone.utc)),
+            },
+            projection={"_id": 0, "votes": 1, "meta_version": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        if poll is None:
+            # Either the vote is invalid or another worker promoted the poll to sharded counters
+            return await cast_sharded_vote(poll_id, option, voter_id)
+    except HTTPException:
+        raise
+    except Exception:
+        # The vote was not counted, so its ballot must not turn a retry into "already voted"
+        await release_ballot(poll_id, voter_id)
+        raise
+    poll_repository.observe_version(poll_id, poll.get("meta_version"))
+    timeline_recorder.record(poll_id, option)
+
+    if vote_rate_tracker.record(poll_id):
+        await promote_poll(poll_id)
+    return poll.get("votes", {})
+
+
+async def cast_sharded_vote(poll_id: str, option: str, voter_id: str) -> None:
+    """
+    Records an already balloted vote on a poll with sharded counters.
+    The poll is read to validate the vote, since the shard update cannot check it.
+    Summing the shards is left to readers: doing it here would read every shard on
+    every vote of the very polls sharding is meant to relieve.
+    """
+    poll = await polls_collection.find_one(
+        {"_id": ObjectId(poll_id)},
+        {"status": 1, "expires_at": 1, "options": 1, "counter_layout": 1, "counter_shards": 1},
+    )
+    if not poll or not is_sharded(poll) or is_expired(poll) or option not in poll.get("options", []):
+        # Give the voter their ballot back before explaining the rejection
+        await release_ballot(poll_id, voter_id)
+        await raise_vote_rejection(poll_id, option, poll)
+
+    sharded_polls.setdefault(poll_id, poll.get("counter_shards", VOTE_SHARD_COUNT))
+    await increment_shard(poll_id, {option: 1}, poll.get("counter_shards", VOTE_SHARD_COUNT))
+    timeline_recorder.record(poll_id, option)
+
+
+async def cast_buffered_vote(poll_id: str, option: str, voter_id: str) -> dict:
+    """
+    Records a vote through the write-behind buffer.
+    The poll is validated up front because the deferred `$inc` cannot act as the
+    check; the returned tally includes increments that are still pending. Polls with
+    sharded counters return None, as in `cast_sharded_vote`.
+    """
+    poll = await polls_collection.find_one(
+        {"_id": ObjectId(poll_id)},
+        {"status": 1, "expires_at": 1, "options": 1, "votes": 1, "voter_count": 1, "counter_layout": 1, "counter_shards": 1},
+    )
+    if not poll or is_expired(poll) or option not in poll.get("options", []):
+        await raise_vote_rejection(poll_id, option, poll)
+
+    await insert_ballot(poll_id, option, voter_id)
+    vote_buffer.add(poll_id, option)
+    timeline_recorder.record(poll_id, option)
+
+    if is_sharded(poll):
+        return None
+    tally = dict(poll.get("votes", {}))
+    for pending_option, count in vote_buffer.pending_for(poll_id).items():
+        tally[pending_option] = tally.get(pending_option, 0) + count
+    return tally
+
+
+async def insert_ballot(poll_id: str, option: str, voter_id: str):
+    """Stores the voter's ballot, rejecting a second vote on the same poll."""
+    try:
+        await ballots_collection.insert_one({
+            "poll_id": poll_id,
+            "voter_id": voter_id,
+            "option": option,
+            "voted_at": datetime.now(timezone.utc),
+        })
+    except DuplicateKeyError:
+        logging.warning(f"Voter {voter_id} has already voted for poll ID: {poll_id}")
+        raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail="You have already voted")
+
+
+async def release_ballot(poll_id: str, voter_id: str):
+    """Deletes the ballot of a vote that was not counted."""
+    try:
+        await ballots_collection.delete_one({"poll_id": poll_id, "voter_id": voter_id})
+    except Exception as e:
+        logging.error(f"Failed to release the ballot of voter {voter_id} for poll ID {poll_id}: {e}")
+
+
+async def cast_vote_batch(votes: List[BatchVote], submitter: str) -> List[dict]:
+    """
+    Records a batch of votes, typically replayed by a kiosk or offline client.
+    Every poll in the batch is read once, votes are de-duplicated within the batch
+    and against stored ballots by one unordered ballot insert, and each poll's
+    tally is updated with a single `$inc`.
+    :param submitter: Username sending the batch; only votes on polls they created are
+        accepted, unless they are one of the KIOSK_ACCOUNTS.
+    :return: One result per submitted vote, in submission order.
+    """
+    results = [{"index": index, "poll_id": vote.poll_id, "status": "accepted"} for index, vote in enumerate(votes)]
+
+    def reject(index: int, detail: str):
+        results[index].update(status="rejected", detail=detail)
+
+    poll_ids = {vote.poll_id for vote in votes if ObjectId.is_valid(vote.poll_id)}
+    polls = {}
+    async for poll in polls_collection.find(
+        {"_id": {"$in": [ObjectId(poll_id) for poll_id in poll_ids]}},
+        {"status": 1, "expires_at": 1, "options": 1, "counter_layout": 1, "counter_shards": 1, "creator": 1},
+    ):
+        polls[str(poll["_id"])] = poll
+
+    # Validate each vote against its poll and drop repeats inside the batch
+    seen = set()
+    candidates = []
+    for index, vote in enumerate(votes):
+        poll = polls.get(vote.poll_id)
+        if not ObjectId.is_valid(vote.poll_id):
+            reject(index, "Invalid poll ID format")
+        elif not poll:
+            reject(index, "Poll not found")
+        elif submitter != poll.get("creator") and submitter not in KIOSK_ACCOUNTS:
+            reject(index, "Not authorized to vote on this poll")
+        elif is_expired(poll):
+            reject(index, "This poll is closed")
+        elif vote.option not in poll.get("options", []):
+            reject(index, "Invalid option selected")
+        elif (vote.poll_id, vote.voter) in seen:
+            reject(index, "Duplicate vote in batch")
+        else:
+            seen.add((vote.poll_id, vote.voter))
+            candidates.append(index)
+
+    if not candidates:
+        return results
+
+    # One unordered insert; duplicate key errors mark voters who already voted
+    now = datetime.now(timezone.utc)
+    ballots = [
+        {"poll_id": votes[index].poll_id, "voter_id": votes[index].voter, "option": votes[index].option, "voted_at": now}
+        for index in candidates
+    ]
+    try:
+        await ballots_collection.insert_many(ballots, ordered=False)
+    except BulkWriteError as e:
+        for error in e.details.get("writeErrors", []):
+            index = candidates[error["index"]]
+            reject(index, "You have already voted" if error.get("code") == DUPLICATE_KEY_ERROR else "Failed to record vote")
+
+    accepted = defaultdict(list)
+    for index in candidates:
+        if results[index]["status"] == "accepted":
+            accepted[votes[index].poll_id].append(index)
+
+    await asyncio.gather(*(apply_batch_tally(poll_id, polls[poll_id], indices, votes, reject)
+                           for poll_id, indices in accepted.items()))
+    logging.info(f"Batch vote processed: {sum(r['status'] == 'accepted' for r in results)} of {len(votes)} accepted")
+    return results
+
+
+async def apply_batch_tally(poll_id: str, poll: dict, indices: List[int], votes: List[BatchVote], reject):
+    """Adds the accepted batch votes of one poll to its tally in one update."""
+    increments = defaultdict(int)
+    for index in indices:
+        increments[votes[index].option] += 1
+
+    if VOTE_BUFFER_ENABLED:
+        for option, count in increments.items():
+            vote_buffer.add(poll_id, option, count)
+        record_timeline(poll_id, increments)
+        return
+    if is_sharded(poll):
+        await increment_shard(poll_id, increments, poll.get("counter_shards", VOTE_SHARD_COUNT))
+        record_timeline(poll_id, increments)
+        return
+
+    update = {f"votes.{option}": count for option, count in increments.items()}
+    update["voter_count"] = len(indices)
+    update.update(vote_increments(len(indices)))
+    result = await polls_collection.update_one(
+        {"_id": ObjectId(poll_id), **open_poll_filter()},
+        {"$inc": update, "$max": last_vote(datetime.now(timezone.utc))},
+    )
+    if result.matched_count == 0:
+        # The poll closed after it was validated, so hand the ballots back
+        await ballots_collection.delete_many({
+            "poll_id": poll_id,
+            "voter_id": {"$in": [votes[index].voter for index in indices]},
+        })
+        for index in indices:
+            reject(index, "This poll is closed")
+        return
+    record_timeline(poll_id, increments)
+
+
+def record_timeline(poll_id: str, increments: dict):
+    """Counts accepted votes per option towards the poll's vote timeline."""
+    for option, count in increments.items():
+        timeline_recorder.record(poll_id, option, count)
+
+
+async def has_voted(poll_id: str, voter_id: str) -> bool:
+    """Checks the ballots collection for a vote by the given voter."""
+    ballot = await ballots_collection.find_one({"poll_id": poll_id, "voter_id": voter_id}, {"_id": 1})
+    return ballot is not None
+
+
+def reject_from_cache(poll_id: str, option: str):
+    """
+    Rejects a vote that this worker's cached poll metadata already rules out, i.e. an
+    option the poll does not offer or a poll that closed with results, before any
+    database round trip. Anything the cache cannot tell is left to the server-side checks.
+    As with `get_metadata`, an edit made on another worker may take up to
+    POLL_CACHE_TTL_SECONDS to show here.
+    """
+    poll = poll_repository.cached_metadata(poll_id)
+    if poll is None:
+        return
+    if is_expired(poll):
+        logging.warning(f"Vote rejected, poll {poll_id} is closed")
+        raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail="This poll is closed")
+    if option not in poll.get("options", []):
+        logging.error(f"Invalid option selected: {option}")
+        raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail="Invalid option selected")
+
+
+async def raise_vote_rejection(poll_id: str, option: str, poll: dict = None):
+    """
+    Explains why a vote did not pass the poll checks.
+    Only runs on the failure path, and only fetches the fields needed to tell
+    the cases apart.
+    :param poll: The poll as already read by the caller, with its status, deadline and options.
+    """
+    if poll is None:
+        poll = await polls_collection.find_one({"_id": ObjectId(poll_id)}, {"status": 1, "expires_at": 1, "options": 1})
+    if not poll:
+        logging.error(f"Poll not found: {poll_id}")
+        raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail="Poll not found")
+    if is_expired(poll):
+        logging.warning(f"Vote rejected, poll {poll_id} is closed")
+        raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail="This poll is closed")
+    if option not in poll.get("options", []):
+        logging.error(f"Invalid option selected: {option}")
+        raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail="Invalid option selected")
+
+    logging.error(f"Failed to update poll with vote for poll ID: {poll_id}")
+    raise HTTPException(status_code=500, detail="Failed to record vote")
@@ -1,16 +1,28 @@
 from fastapi import APIRouter, HTTPException, Form, Request
 from fastapi.responses import RedirectResponse
-from starlette.status import HTTP_404_NOT_FOUND, HTTP_400_BAD_REQUEST
-from src.database import database
+from starlette.status import HTTP_400_BAD_REQUEST
 from bson import ObjectId
 from jose import jwt, JWTError
 from src.config import SECRET_KEY, ALGORITHM
 from src.authentication.auth_controller import get_current_user
+from src.voting.vote_engine import cast_vote, cast_vote_batch
+from src.voting.models import BatchVoteRequest
+from src.websockets.tally_publisher import tally_publisher
 import logging
 
 router = APIRouter()
 
-polls_collection = database.get_collection("polls")
+
+async def publish_tally(poll_id: str, tally: dict = None):
+    """
+    Pushes a new tally to live dashboards; a failed push never fails the vote.
+    Without a tally, subscribers get the stored one, read when the throttled frame goes out.
+    """
+    try:
+        await tally_publisher.publish(poll_id, tally)
+    except Exception as e:
+        logging.error(f"Failed to publish tally for poll ID {poll_id}: {e}", exc_info=True)
+
 
 @router.post("/vote")
 async def vote(
@@ -22,46 +34,22 @@ async def vote(
     try:
         logging.info(f"Processing vote for poll ID: {poll_id}")
 
-        # Validate and retrieve the poll
+        # Validate the poll ID
         if not ObjectId.is_valid(poll_id):
             logging.error(f"Invalid poll ID format: {poll_id}")
             raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail="Invalid poll ID format")
         
-        poll = await polls_collection.find_one({"_id": ObjectId(poll_id)})
-        if not poll:
-            logging.error(f"Poll not found: {poll_id}")
-            raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail="Poll not found")
-
         # Retrieve the current user (authenticated or guest)
         current_user = await get_current_user(request)
         # Determine voter ID
         voter_id = current_user["username"] if current_user else guest_email or "Anonymous"
 
-        # Validate the selected option
-        if option not in poll.get("options", []):
-            logging.error(f"Invalid option selected: {option}")
-            raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail="Invalid option selected")
-
-        # Check if the voter has already voted
-        if voter_id in poll.get("voters", []):
-            logging.warning(f"Voter {voter_id} has already voted for poll ID: {poll_id}")
-            raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail="You have already voted")
-
-        # Update the vote count and register the voter
-        update_result = await polls_collection.update_one(
-            {"_id": ObjectId(poll_id)},
-            {
-                "$inc": {f"votes.{option}": 1},  # Increment the vote count
-                "$addToSet": {"voters": voter_id},  # Add voter to the list
-            }
-        )
-
-        # Check if the update was successful
-        if update_result.modified_count != 1:
-            logging.error(f"Failed to update poll with vote for poll ID: {poll_id}")
-            raise HTTPException(status_code=500, detail="Failed to record vote")
+        # Validate the option, reject duplicates and increment the tally in one update
+        tally = await cast_vote(poll_id, option, voter_id)
 
         logging.info(f"Vote recorded successfully for poll ID: {poll_id} by voter: {voter_id}")
+        logging.debug(f"Updated tally for poll ID {poll_id}: {tally}")
+        await publish_tally(poll_id, tally)
 
         # Redirect to the analytics dashboard
         dashboard_url = f"/analytics/dashboard/{poll_id}"
@@ -73,3 +61,27 @@ async def vote(
     except Exception as e:
         logging.error(f"Unexpected error during voting: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="An internal server error occurred")
+
+
+@router.post("/vote/batch")
+async def vote_batch(request: Request, batch: BatchVoteRequest):
+    """
+    Records votes collected offline, e.g. by a kiosk.
+    Requires an authenticated user; each vote names its own voter, and votes on polls
+    the user did not create are rejected unless the user is a kiosk account.
+    :return: Counts of accepted and rejected votes plus one result per vote.
+    """
+    current_user = await get_current_user(request)
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Authentication required to submit vote batches")
+
+    try:
+        logging.info(f"Processing batch of {len(batch.votes)} votes from {current_user['username']}")
+        results = await cast_vote_batch(batch.votes, current_user["username"])
+        accepted = sum(result["status"] == "accepted" for result in results)
+        for poll_id in {result["poll_id"] for result in results if result["status"] == "accepted"}:
+            await publish_tally(poll_id)
+        return {"accepted": accepted, "rejected": len(results) - accepted, "results": results}
+    except Exception as e:
+        logging.error(f"Unexpected error during batch voting: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="An internal server error occurred")
@@ -0,0 +1,64 @@
+# src/websockets/broadcast_scheduler.py
+"""
+Per-poll throttling of live broadcasts.
+
+Updates submitted for a poll are collapsed so that its subscribers receive at most
+one frame per interval. The first update goes out right away; anything submitted
+while the poll is cooling down replaces the pending snapshot, so the next frame
+always carries the latest state. A poll only holds a task while it is active.
+"""
+from typing import Any, Awaitable, Callable, Dict
+import asyncio
+import logging
+
+
+class BroadcastScheduler:
+    def __init__(self, send: Callable[[str, Any], Awaitable[None]], interval_ms: int):
+        """
+        :param send: Coroutine called with (poll_id, snapshot) for every frame sent.
+        :param interval_ms: Minimum time between two frames for the same poll.
+        """
+        self.send = send
+        self.interval = interval_ms / 1000
+        self.latest: Dict[str, Any] = {}
+        self.active: Dict[str, asyncio.Task] = {}
+        self.submitted = 0
+        self.sent = 0
+
+    def submit(self, poll_id: str, snapshot: Any):
+        """Schedules a snapshot for broadcast, replacing any that is still pending."""
+        self.submitted += 1
+        self.latest[poll_id] = snapshot
+        if poll_id not in self.active:
+            self.active[poll_id] = asyncio.create_task(self._run(poll_id))
+
+    async def stop(self):
+        """Cancels pending broadcasts."""
+        tasks = list(self.active.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.active.clear()
+        self.latest.clear()
+
+    def stats(self) -> dict:
+        return {
+            "interval_ms": self.interval * 1000,
+            "submitted": self.submitted,
+            "sent": self.sent,
+            "coalescing_ratio": self.submitted / self.sent if self.sent else 0,
+            "active_polls": len(self.active),
+        }
+
+    async def _run(self, poll_id: str):
+        try:
+            while poll_id in self.latest:
+                snapshot = self.latest.pop(poll_id)
+                self.sent += 1
+                try:
+                    await self.send(poll_id, snapshot)
+                except Exception as e:
+                    logging.error(f"Broadcast for poll {poll_id} failed: {e}", exc_info=True)
+                await asyncio.sleep(self.interval)
+        finally:
+            self.active.pop(poll_id, None)
@@ -1,19 +1,240 @@
-from typing import List
+from typing import Awaitable, Callable, Dict, List, Optional
 from fastapi import WebSocket
+from src.config import (
+    WS_SEND_QUEUE_SIZE, WS_SEND_TIMEOUT_SECONDS, WS_HEARTBEAT_INTERVAL_SECONDS, WS_IDLE_TIMEOUT_SECONDS,
+    FANOUT_BUS, FANOUT_BUS_PATH, FANOUT_RELAY_QUEUE_SIZE,
+)
+from src.websockets.tally_frames import JSON_ENCODING, PING_FRAME, encode_frame
+from src.websockets.fanout_bus import FanoutBus, InProcessBus, create_fanout_bus
+import asyncio
+import logging
+import sys
+import time
+
+# Close code sent to clients that cannot keep up ("Try Again Later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+# Close code sent to clients reaped for not answering heartbeats ("Going Away")
+IDLE_CLOSE_CODE = 1001
+
+
+class Subscriber:
+    """A connected socket with its own bounded outbound queue and sender task."""
+
+    def __init__(self, websocket: WebSocket, poll_id: str, queue_size: int, encoding: str):
+        self.websocket = websocket
+        self.poll_id = poll_id
+        self.encoding = encoding
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.task = None
+        # Refreshed by every message received from the client
+        self.last_seen = time.monotonic()
+        # Size of the frames waiting in the queue
+        self.queued_bytes = 0
+
+    def memory_bytes(self) -> int:
+        """Approximates the memory held for this connection by the manager."""
+        return sys.getsizeof(self) + sys.getsizeof(self.__dict__) + sys.getsizeof(self.queue) + self.queued_bytes
+
 
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+    def __init__(
+        self,
+        queue_size: int = WS_SEND_QUEUE_SIZE,
+        send_timeout: float = WS_SEND_TIMEOUT_SECONDS,
+        bus: FanoutBus = None,
+        heartbeat_interval: float = WS_HEARTBEAT_INTERVAL_SECONDS,
+        idle_timeout: float = WS_IDLE_TIMEOUT_SECONDS,
+    ):
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.heartbeat_interval = heartbeat_interval
+        self.idle_timeout = idle_timeout
+        self.heartbeat_task = None
+        # Carries published messages to the managers of the other worker processes
+        self.bus = bus or InProcessBus()
+        self.bus_started = False
+        # Receives messages published by any worker; defaults to broadcasting them as frames
+        self.publish_handler: Optional[Callable[[str, dict], Awaitable[None]]] = None
+        # Subscribers grouped into one room per poll
+        self.rooms: Dict[str, Dict[WebSocket, Subscriber]] = {}
+        self.messages_sent = 0
+        self.messages_dropped = 0
+        self.evicted = 0
+        self.reaped = 0
 
-    async def connect(self, websocket: WebSocket):
+    async def start(self):
+        """Joins the fan-out bus and starts sending heartbeats."""
+        if self.heartbeat_task is None and self.heartbeat_interval > 0:
+            self.heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+        if not self.bus_started:
+            self.bus_started = True
+            await self.bus.start(self._on_published)
+
+    async def publish(self, poll_id: str, payload: dict):
+        """Delivers a payload to the subscribers of a poll on every worker."""
+        await self.start()
+        await self.bus.publish(poll_id, payload)
+
+    async def connect(self, websocket: WebSocket, poll_id: str, encoding: str = JSON_ENCODING):
         await websocket.accept()
-        self.active_connections.append(websocket)
+        subscriber = Subscriber(websocket, poll_id, self.queue_size, encoding)
+        subscriber.task = asyncio.create_task(self._send_loop(subscriber))
+        self.rooms.setdefault(poll_id, {})[websocket] = subscriber
+
+    def disconnect(self, websocket: WebSocket, poll_id: str):
+        room = self.rooms.get(poll_id)
+        if room is None:
+            return
+        subscriber = room.pop(websocket, None)
+        if not room:
+            del self.rooms[poll_id]
+        if subscriber and subscriber.task is not asyncio.current_task():
+            subscriber.task.cancel()
+
+    def touch(self, websocket: WebSocket, poll_id: str):
+        """Records that a client is still alive, e.g. because it sent a message or a pong."""
+        subscriber = self.rooms.get(poll_id, {}).get(websocket)
+        if subscriber is not None:
+            subscriber.last_seen = time.monotonic()
+
+    def connection_count(self, poll_id: str = None) -> int:
+        if poll_id is not None:
+            return len(self.rooms.get(poll_id, ()))
+        return sum(len(room) for room in self.rooms.values())
+
+    async def broadcast_to_poll(self, poll_id: str, message: str):
+        """
+        Queues a message for the subscribers of one poll only.
+        Never waits on a socket: each subscriber's sender task delivers it, and a
+        subscriber whose queue is full is evicted instead of slowing the others down.
+        """
+        for subscriber in list(self.rooms.get(poll_id, {}).values()):
+            self._enqueue(subscriber, message)
 
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+    async def broadcast_frame(self, poll_id: str, frame: dict):
+        """Queues a frame for the subscribers of a poll, encoded once per encoding in use."""
+        encoded = {}
+        for subscriber in list(self.rooms.get(poll_id, {}).values()):
+            if subscriber.encoding not in encoded:
+                encoded[subscriber.encoding] = encode_frame(frame, subscriber.encoding)
+            self._enqueue(subscriber, encoded[subscriber.encoding])
+
+    def send_frame(self, websocket: WebSocket, poll_id: str, frame: dict):
+        """Queues a frame for a single subscriber, e.g. a snapshot after it (re)subscribes."""
+        subscriber = self.rooms.get(poll_id, {}).get(websocket)
+        if subscriber is not None:
+            self._enqueue(subscriber, encode_frame(frame, subscriber.encoding))
 
     async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            await connection.send_text(message)
+        """Queues a message for every connected socket, whatever poll it follows."""
+        for poll_id in list(self.rooms):
+            await self.broadcast_to_poll(poll_id, message)
+
+    def evict(self, subscriber: Subscriber, reason: str):
+        """Disconnects a subscriber that cannot keep up and closes its socket."""
+        self.evicted += 1
+        self.messages_dropped += subscriber.queue.qsize()
+        logging.warning(f"Evicting WebSocket client from poll {subscriber.poll_id}: {reason}")
+        self.disconnect(subscriber.websocket, subscriber.poll_id)
+        asyncio.create_task(self._close(subscriber.websocket))
+
+    def reap_idle(self) -> int:
+        """
+        Closes and removes connections that have not sent anything for longer than the
+        idle timeout, such as half-open sockets of clients that went away without closing.
+        :return: Number of connections reaped.
+        """
+        deadline = time.monotonic() - self.idle_timeout
+        idle = [subscriber for subscriber in self._subscribers() if subscriber.last_seen < deadline]
+        for subscriber in idle:
+            self.reaped += 1
+            self.messages_dropped += subscriber.queue.qsize()
+            logging.info(f"Reaping idle WebSocket client of poll {subscriber.poll_id}")
+            self.disconnect(subscriber.websocket, subscriber.poll_id)
+            asyncio.create_task(self._close(subscriber.websocket, IDLE_CLOSE_CODE))
+        return len(idle)
+
+    async def shutdown(self):
+        """Leaves the fan-out bus and stops every sender task, e.g. when the application shuts down."""
+        if self.heartbeat_task is not None:
+            self.heartbeat_task.cancel()
+            await asyncio.gather(self.heartbeat_task, return_exceptions=True)
+            self.heartbeat_task = None
+        if self.bus_started:
+            await self.bus.stop()
+            self.bus_started = False
+        subscribers = self._subscribers()
+        self.rooms.clear()
+        for subscriber in subscribers:
+            subscriber.task.cancel()
+        await asyncio.gather(*(subscriber.task for subscriber in subscribers), return_exceptions=True)
+
+    async def _on_published(self, poll_id: str, payload: dict):
+        if self.publish_handler is not None:
+            await self.publish_handler(poll_id, payload)
+        else:
+            await self.broadcast_frame(poll_id, payload)
+
+    def _subscribers(self) -> List[Subscriber]:
+        return [subscriber for room in self.rooms.values() for subscriber in room.values()]
+
+    def _enqueue(self, subscriber: Subscriber, payload):
+        try:
+            subscriber.queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            self.messages_dropped += 1
+            self.evict(subscriber, "outbound queue full")
+            return
+        subscriber.queued_bytes += len(payload)
+
+    def stats(self) -> dict:
+        subscribers = self._subscribers()
+        memory = [subscriber.memory_bytes() for subscriber in subscribers]
+        return {
+            "connections": len(subscribers),
+            "rooms": len(self.rooms),
+            "messages_sent": self.messages_sent,
+            "messages_dropped": self.messages_dropped,
+            "evicted": self.evicted,
+            "reaped": self.reaped,
+            "memory_bytes": sum(memory),
+            "max_connection_memory_bytes": max(memory, default=0),
+        }
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            self.reap_idle()
+            encoded = {}
+            for subscriber in self._subscribers():
+                if subscriber.encoding not in encoded:
+                    encoded[subscriber.encoding] = encode_frame(PING_FRAME, subscriber.encoding)
+                self._enqueue(subscriber, encoded[subscriber.encoding])
+
+    async def _send_loop(self, subscriber: Subscriber):
+        while True:
+            payload = await subscriber.queue.get()
+            subscriber.queued_bytes -= len(payload)
+            websocket = subscriber.websocket
+            send = websocket.send_bytes(payload) if isinstance(payload, bytes) else websocket.send_text(payload)
+            try:
+                await asyncio.wait_for(send, timeout=self.send_timeout)
+            except asyncio.TimeoutError:
+                self.messages_dropped += 1
+                self.evict(subscriber, f"send timed out after {self.send_timeout}s")
+                return
+            except Exception as e:
+                # The socket is gone; the endpoint's receive loop cleans up as well
+                logging.debug(f"Send to WebSocket client of poll {subscriber.poll_id} failed: {e}")
+                self.messages_dropped += 1
+                self.disconnect(subscriber.websocket, subscriber.poll_id)
+                return
+            self.messages_sent += 1
+
+    async def _close(self, websocket: WebSocket, code: int = SLOW_CONSUMER_CLOSE_CODE):
+        try:
+            await asyncio.wait_for(websocket.close(code=code), timeout=self.send_timeout)
+        except Exception as e:
+            logging.debug(f"Closing WebSocket client failed: {e}")
 
-manager = ConnectionManager()
\ No newline at end of file
+manager = ConnectionManager(bus=create_fanout_bus(FANOUT_BUS, FANOUT_BUS_PATH, FANOUT_RELAY_QUEUE_SIZE))
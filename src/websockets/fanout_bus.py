@@ -0,0 +1,208 @@
+# src/websockets/fanout_bus.py
+"""
+Fan-out buses that carry poll broadcasts to every worker process.
+
+A ConnectionManager only knows the sockets of its own process. Publishing through a
+bus delivers the message to the handler of every worker subscribed to the bus, which
+then broadcasts to its local sockets. Backends, picked with FANOUT_BUS:
+- "inprocess": delivers straight to this process. Right for a single worker.
+- "unix": workers on one host exchange newline-delimited JSON over a Unix socket. The
+  first worker to take the lock file next to the socket becomes the broker and relays
+  every message to all connected workers, itself included. If the broker's worker
+  exits, the others reconnect and one of them takes over. Each worker gets its own
+  bounded relay queue; a worker that falls `relay_queue_size` messages behind is
+  disconnected rather than stalling the others, and reconnects to the broker.
+"""
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, Optional, Set, Tuple
+import asyncio
+import fcntl
+import json
+import logging
+import os
+
+BusHandler = Callable[[str, dict], Awaitable[None]]
+
+RECONNECT_DELAY_SECONDS = 0.2
+
+
+class FanoutBus(ABC):
+    """Base class for fan-out bus backends."""
+
+    @abstractmethod
+    async def start(self, handler: BusHandler):
+        """Starts delivering messages published by any worker to `handler`."""
+
+    async def stop(self):
+        pass
+
+    @abstractmethod
+    async def publish(self, poll_id: str, payload: dict):
+        """Delivers a payload to the handlers of every worker, this one included."""
+
+
+class InProcessBus(FanoutBus):
+    def __init__(self):
+        self.handler: Optional[BusHandler] = None
+
+    async def start(self, handler: BusHandler):
+        self.handler = handler
+
+    async def publish(self, poll_id: str, payload: dict):
+        await self.handler(poll_id, payload)
+
+
+class UnixSocketBus(FanoutBus):
+    def __init__(self, path: str, relay_queue_size: int = 1000):
+        self.path = path
+        self.relay_queue_size = relay_queue_size
+        self.lock_path = f"{path}.lock"
+        self.handler: Optional[BusHandler] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._connected = asyncio.Event()
+        self._task = None
+        # Set only in the worker acting as broker
+        self._broker = None
+        self._lock_file = None
+        # Connected worker -> its relay queue and the task writing it out
+        self._clients: Dict[asyncio.StreamWriter, Tuple[asyncio.Queue, asyncio.Task]] = {}
+        # Connection handlers the broker's server started, one per connected worker
+        self._relays: Set[asyncio.Task] = set()
+        self.relay_evictions = 0
+
+    async def start(self, handler: BusHandler):
+        self.handler = handler
+        self._task = asyncio.create_task(self._run())
+        await self._connected.wait()
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._broker is not None:
+            self._broker.close()
+            # The server does not cancel its connection handlers, so stop them here
+            relays = list(self._relays)
+            for relay in relays:
+                relay.cancel()
+            await asyncio.gather(*relays, return_exceptions=True)
+            senders = [sender for _, sender in self._clients.values()]
+            for client in list(self._clients):
+                self._drop_client(client)
+            await asyncio.gather(*senders, return_exceptions=True)
+            await self._broker.wait_closed()
+            self._broker = None
+            self._lock_file.close()
+            self._lock_file = None
+
+    async def publish(self, poll_id: str, payload: dict):
+        if self._writer is None:
+            # Between brokers: keep this worker's viewers up to date at least
+            logging.warning(f"Fan-out bus not connected, delivering poll {poll_id} update locally only")
+            await self.handler(poll_id, payload)
+            return
+        self._writer.write(json.dumps({"p": poll_id, "m": payload}, separators=(",", ":")).encode() + b"\n")
+        await self._writer.drain()
+
+    async def _run(self):
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.path)
+            except (FileNotFoundError, ConnectionRefusedError):
+                if not await self._become_broker():
+                    await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+                continue
+
+            self._writer = writer
+            self._connected.set()
+            try:
+                async for line in reader:
+                    try:
+                        message = json.loads(line)
+                        poll_id, payload = message["p"], message["m"]
+                    except (ValueError, KeyError, TypeError) as e:
+                        logging.error(f"Fan-out bus skipped a malformed message: {e}: {line[:200]!r}")
+                        continue
+                    try:
+                        await self.handler(poll_id, payload)
+                    except Exception as e:
+                        logging.error(f"Fan-out bus handler failed: {e}", exc_info=True)
+            except ConnectionError as e:
+                logging.warning(f"Fan-out bus connection lost: {e}")
+            except ValueError as e:
+                # A line longer than the stream limit; the rest of the stream cannot be framed reliably
+                logging.error(f"Fan-out bus message too long, reconnecting: {e}")
+            finally:
+                self._writer = None
+                self._connected.clear()
+                writer.close()
+            logging.info("Fan-out bus connection closed, reconnecting")
+
+    async def _become_broker(self) -> bool:
+        """Starts the broker in this worker if no other worker holds the lock."""
+        if self._broker is not None:
+            return False
+        lock_file = open(self.lock_path, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return False
+
+        self._lock_file = lock_file
+        if os.path.exists(self.path):
+            os.unlink(self.path)  # left behind by a broker that died
+        self._broker = await asyncio.start_unix_server(self._relay, path=self.path)
+        logging.info(f"Fan-out bus broker listening on {self.path} (pid {os.getpid()})")
+        return True
+
+    async def _relay(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        relay = asyncio.current_task()
+        self._relays.add(relay)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.relay_queue_size)
+        self._clients[writer] = (queue, asyncio.create_task(self._relay_send(writer, queue)))
+        try:
+            async for line in reader:
+                for client, (client_queue, _) in list(self._clients.items()):
+                    try:
+                        client_queue.put_nowait(line)
+                    except asyncio.QueueFull:
+                        self._evict_client(client)
+        except ConnectionError:
+            pass
+        except ValueError as e:
+            logging.error(f"Fan-out bus dropped a worker that sent an overlong message: {e}")
+        finally:
+            # Also runs when cancelled on shutdown, which then propagates
+            self._drop_client(writer)
+            self._relays.discard(relay)
+
+    async def _relay_send(self, writer: asyncio.StreamWriter, queue: asyncio.Queue):
+        try:
+            while True:
+                writer.write(await queue.get())
+                await writer.drain()
+        except ConnectionError:
+            # The worker's relay sees the closed socket and cleans up
+            writer.close()
+
+    def _evict_client(self, writer: asyncio.StreamWriter):
+        """Disconnects a worker whose relay queue is full; it reconnects and carries on with new messages."""
+        self.relay_evictions += 1
+        logging.warning(f"Fan-out bus dropping a worker {self.relay_queue_size} messages behind")
+        self._drop_client(writer)
+
+    def _drop_client(self, writer: asyncio.StreamWriter):
+        client = self._clients.pop(writer, None)
+        if client is not None:
+            client[1].cancel()
+        writer.close()
+
+
+def create_fanout_bus(name: str, path: str, relay_queue_size: int = 1000) -> FanoutBus:
+    if name == "inprocess":
+        return InProcessBus()
+    if name == "unix":
+        return UnixSocketBus(path, relay_queue_size)
+    raise ValueError(f"Unknown FANOUT_BUS '{name}', expected 'inprocess' or 'unix'")
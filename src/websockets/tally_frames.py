@@ -0,0 +1,120 @@
+# src/websockets/tally_frames.py
+"""
+Versioned live-tally protocol for /ws/polls/{poll_id}.
+
+Frames are small dicts:
+- snapshot: {"t": "s", "v": 7, "c": {"Apple": 12, "Banana": 4}}
+- delta:    {"t": "d", "v": 8, "c": {"Apple": 13}}
+A delta only carries the option counts that changed since the previous version; an
+option that disappeared (e.g. after an edit) is sent with a null count. A client that
+sees a version other than the one after its own asks for a new snapshot by sending
+{"t": "resync"}.
+
+The server also sends {"t": "ping"} heartbeats; clients answer with {"t": "pong"}. Any
+message from a client counts as a sign of life, and connections that stay silent past
+the idle timeout are closed by the ConnectionManager's reaper.
+
+Frames are encoded as compact JSON text by default. Clients that connect with
+?encoding=msgpack receive binary MessagePack frames instead, provided the optional
+msgpack package is installed; otherwise they fall back to JSON. Whatever they receive,
+clients may send their own messages as JSON text, or as binary frames holding
+MessagePack or JSON.
+"""
+from typing import Dict, Optional, Union
+import json
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional, JSON is always available
+    msgpack = None
+
+JSON_ENCODING = "json"
+MSGPACK_ENCODING = "msgpack"
+
+PING_FRAME = {"t": "ping"}
+
+
+def negotiate_encoding(requested: Optional[str]) -> str:
+    """Picks the frame encoding for a new connection."""
+    if requested == MSGPACK_ENCODING and msgpack is not None:
+        return MSGPACK_ENCODING
+    return JSON_ENCODING
+
+
+def encode_frame(frame: dict, encoding: str):
+    """Encodes a frame as compact JSON text or as MessagePack bytes."""
+    if encoding == MSGPACK_ENCODING:
+        return msgpack.packb(frame)
+    return json.dumps(frame, separators=(",", ":"))
+
+
+def message_type(message: Union[str, bytes]) -> Optional[str]:
+    """Returns the "t" field of a client text or binary message, or None if it is not a frame."""
+    decoders = [json.loads]
+    if isinstance(message, bytes) and msgpack is not None:
+        decoders.insert(0, msgpack.unpackb)
+    for decode in decoders:
+        try:
+            frame = decode(message)
+        except (ValueError, TypeError):
+            continue
+        return frame.get("t") if isinstance(frame, dict) else None
+    return None
+
+
+def is_resync_request(message: Union[str, bytes]) -> bool:
+    """Tells whether a client message asks for a fresh snapshot."""
+    return message_type(message) == "resync"
+
+
+def is_pong(message: Union[str, bytes]) -> bool:
+    """Tells whether a client message answers a heartbeat ping."""
+    return message_type(message) == "pong"
+
+
+class TallyState:
+    def __init__(self, votes: Dict[str, int]):
+        self.version = 1
+        self.votes = dict(votes)
+
+
+class TallyFrames:
+    """Tracks the last tally sent for each poll and turns new tallies into frames."""
+
+    def __init__(self):
+        self.polls: Dict[str, TallyState] = {}
+
+    def update(self, poll_id: str, votes: Dict[str, int]) -> Optional[dict]:
+        """
+        Records a new tally and returns the frame to broadcast.
+        Returns a snapshot for a poll without history, a delta otherwise, and None
+        when nothing changed.
+        """
+        state = self.polls.get(poll_id)
+        if state is None:
+            self.polls[poll_id] = TallyState(votes)
+            return self.snapshot(poll_id)
+
+        changes = {option: count for option, count in votes.items() if state.votes.get(option) != count}
+        changes.update({option: None for option in state.votes if option not in votes})
+        if not changes:
+            return None
+        state.version += 1
+        state.votes = dict(votes)
+        return {"t": "d", "v": state.version, "c": changes}
+
+    def snapshot(self, poll_id: str) -> Optional[dict]:
+        """Returns the full tally frame of a poll, or None if it has no history."""
+        state = self.polls.get(poll_id)
+        if state is None:
+            return None
+        return {"t": "s", "v": state.version, "c": dict(state.votes)}
+
+    def seed(self, poll_id: str, votes: Dict[str, int]) -> dict:
+        """Starts the history of a poll from a stored tally unless newer state exists."""
+        if poll_id not in self.polls:
+            self.polls[poll_id] = TallyState(votes)
+        return self.snapshot(poll_id)
+
+    def forget(self, poll_id: str):
+        self.polls.pop(poll_id, None)
@@ -0,0 +1,161 @@
+# src/websockets/tally_publisher.py
+"""
+Pushes updated vote tallies to the WebSocket subscribers of a poll.
+
+Two delivery backends are available, picked with TALLY_PUBLISHER:
+- "inprocess": the vote handler publishes the tally through the ConnectionManager's
+  fan-out bus (see fanout_bus.py), which hands it to every worker's subscribers. With
+  FANOUT_BUS=inprocess this stays inside one worker, which is what the tests use as a
+  local stand-in.
+- "changestream": the vote handler publishes nothing; every worker watches the polls
+  and vote_counters change streams and pushes tallies to its own subscribers, so a
+  vote recorded by one worker reaches viewers connected to any other. Requires MongoDB
+  running as a replica set.
+"""
+from abc import ABC, abstractmethod
+from typing import Optional
+from bson import ObjectId
+from fastapi import WebSocket
+from src.config import TALLY_PUBLISHER, WS_BROADCAST_INTERVAL_MS
+from src.database import polls_collection, vote_counters_collection
+from src.voting.vote_counters import resolve_counts
+from src.websockets.connection_manager import ConnectionManager, manager
+from src.websockets.broadcast_scheduler import BroadcastScheduler
+from src.websockets.tally_frames import TallyFrames
+import asyncio
+import logging
+
+
+async def load_tally(poll_id: str) -> dict:
+    """Reads the current tally of a poll, summing sharded counters if needed."""
+    poll = await polls_collection.find_one(
+        {"_id": ObjectId(poll_id)},
+        {"votes": 1, "voter_count": 1, "counter_layout": 1, "counter_shards": 1},
+    )
+    if not poll:
+        return {}
+    poll = await resolve_counts(poll)
+    return poll.get("votes", {})
+
+
+class TallyPublisher(ABC):
+    """Base class for tally delivery backends."""
+
+    def __init__(self, connection_manager: ConnectionManager, interval_ms: int = WS_BROADCAST_INTERVAL_MS):
+        self.connection_manager = connection_manager
+        self.connection_manager.publish_handler = self._on_published
+        self.scheduler = BroadcastScheduler(self._broadcast, interval_ms)
+        self.frames = TallyFrames()
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        await self.scheduler.stop()
+
+    @abstractmethod
+    async def publish(self, poll_id: str, votes: Optional[dict]):
+        """
+        Called by the vote path with the poll's new tally. Writers that do not get the
+        tally back from their update pass None; it is then read from the database once
+        per broadcast interval, and only by workers with subscribers to the poll.
+        """
+
+    async def deliver(self, poll_id: str, votes: dict):
+        """
+        Schedules a tally for this worker's subscribers of the poll, throttled per poll.
+        A tally of None is read from the database when the frame is sent.
+        """
+        if self.connection_manager.connection_count(poll_id):
+            self.scheduler.submit(poll_id, votes)
+
+    async def send_snapshot(self, websocket: WebSocket, poll_id: str):
+        """Sends the full tally to one subscriber, on subscribe or when it asks to resync."""
+        frame = self.frames.snapshot(poll_id)
+        if frame is None:
+            frame = self.frames.seed(poll_id, await load_tally(poll_id))
+        self.connection_manager.send_frame(websocket, poll_id, frame)
+
+    def release(self, poll_id: str):
+        """Drops a poll's frame history once its last subscriber has left."""
+        if not self.connection_manager.connection_count(poll_id):
+            self.frames.forget(poll_id)
+
+    async def _on_published(self, poll_id: str, payload: dict):
+        await self.deliver(poll_id, payload["votes"])
+
+    async def _broadcast(self, poll_id: str, votes: dict):
+        if votes is None:
+            votes = await load_tally(poll_id)
+        frame = self.frames.update(poll_id, votes)
+        if frame is not None:
+            await self.connection_manager.broadcast_frame(poll_id, frame)
+
+
+class InProcessTallyPublisher(TallyPublisher):
+    async def publish(self, poll_id: str, votes: dict):
+        await self.connection_manager.publish(poll_id, {"votes": votes})
+
+
+class ChangeStreamTallyPublisher(TallyPublisher):
+    def __init__(self, connection_manager: ConnectionManager, interval_ms: int = WS_BROADCAST_INTERVAL_MS):
+        super().__init__(connection_manager, interval_ms)
+        self._tasks = []
+
+    async def start(self):
+        self._tasks = [
+            asyncio.create_task(self._watch_polls()),
+            asyncio.create_task(self._watch_counters()),
+        ]
+        logging.info("Watching vote change streams for live tallies")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await super().stop()
+
+    async def publish(self, poll_id: str, votes: dict):
+        # The vote write itself is the event; every worker picks it up from the change stream
+        pass
+
+    async def _watch_polls(self):
+        pipeline = [
+            {"$match": {"operationType": "update"}},
+            {"$project": {"documentKey": 1, "updateDescription.updatedFields": 1}},
+        ]
+        async with polls_collection.watch(pipeline) as stream:
+            async for change in stream:
+                updated = change["updateDescription"]["updatedFields"]
+                if not any(field == "votes" or field.startswith("votes.") for field in updated):
+                    continue
+                await self._deliver_current(str(change["documentKey"]["_id"]))
+
+    async def _watch_counters(self):
+        pipeline = [
+            {"$match": {"operationType": {"$in": ["insert", "update"]}}},
+            {"$project": {"fullDocument.poll_id": 1}},
+        ]
+        async with vote_counters_collection.watch(pipeline, full_document="updateLookup") as stream:
+            async for change in stream:
+                await self._deliver_current(change["fullDocument"]["poll_id"])
+
+    async def _deliver_current(self, poll_id: str):
+        # The tally is read when the throttled frame goes out, not once per change event
+        await self.deliver(poll_id, None)
+
+
+TALLY_PUBLISHERS = {
+    "inprocess": InProcessTallyPublisher,
+    "changestream": ChangeStreamTallyPublisher,
+}
+
+
+def create_tally_publisher(name: str, connection_manager: ConnectionManager) -> TallyPublisher:
+    if name not in TALLY_PUBLISHERS:
+        raise ValueError(f"Unknown TALLY_PUBLISHER '{name}', expected one of {', '.join(TALLY_PUBLISHERS)}")
+    return TALLY_PUBLISHERS[name](connection_manager)
+
+
+tally_publisher = create_tally_publisher(TALLY_PUBLISHER, manager)
@@ -0,0 +1,120 @@
+# src/write_behind.py
+"""
+Write-behind buffer for counter increments.
+
+Increments are coalesced in memory per key and field and written every
+`flush_interval_ms` milliseconds, or as soon as `max_pending` are waiting, as one
+update per key in a single unordered bulk write. Subclasses decide what the update
+for a key looks like.
+
+An unordered bulk write applies every update it can, so a `BulkWriteError` only puts
+back the keys listed in its `writeErrors`; requeueing the rest would count them twice.
+Any other error puts the whole batch back for the next flush.
+"""
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Hashable, Optional
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+import asyncio
+import logging
+
+
+class WriteBehindBuffer(ABC):
+    name = "Write-behind buffer"
+
+    def __init__(self, collection, flush_interval_ms: int, max_pending: Optional[int] = None):
+        """
+        :param flush_interval_ms: Longest time an increment waits before it is written.
+        :param max_pending: Increments that trigger an early flush, or None to only flush on the interval.
+        """
+        self.collection = collection
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_pending = max_pending
+        self.pending: Dict[Hashable, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.pending_votes = 0
+        self.flushed_votes = 0
+        self.flushed_updates = 0
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._stopping = False
+
+    @abstractmethod
+    def build_update(self, key: Hashable, counts: Dict[str, int], flushed_at: datetime) -> UpdateOne:
+        """Returns the update writing one key's coalesced increments."""
+
+    def start(self):
+        """Starts the periodic flush task."""
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+            logging.info(f"{self.name} started (flush every {self.flush_interval * 1000:.0f} ms)")
+
+    async def stop(self):
+        """Stops the flush task and writes out everything still pending."""
+        if self._task is not None:
+            # Let an in-flight flush finish instead of cancelling it halfway
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+        logging.info(f"{self.name} stopped")
+
+    def increment(self, key: Hashable, field: str, count: int = 1):
+        """Queues an increment for the next flush."""
+        self.pending[key][field] += count
+        self.pending_votes += count
+        if self.max_pending is not None and self.pending_votes >= self.max_pending:
+            self._wakeup.set()
+
+    def requeue(self, key: Hashable, counts: Dict[str, int]):
+        for field, count in counts.items():
+            self.pending[key][field] += count
+        self.pending_votes += sum(counts.values())
+
+    async def flush(self):
+        """Writes the pending increments as one update per key in a single bulk write."""
+        async with self._flush_lock:
+            if not self.pending_votes:
+                return
+            batch, self.pending = self.pending, defaultdict(lambda: defaultdict(int))
+            batch_votes, self.pending_votes = self.pending_votes, 0
+
+            keys = list(batch)
+            flushed_at = datetime.now(timezone.utc)
+            requests = [self.build_update(key, batch[key], flushed_at) for key in keys]
+
+            try:
+                await self.collection.bulk_write(requests, ordered=False)
+            except BulkWriteError as e:
+                failed = {error["index"] for error in e.details.get("writeErrors", [])}
+                for index in failed:
+                    self.requeue(keys[index], batch[keys[index]])
+                logging.error(f"{self.name} flush failed for {len(failed)} of {len(requests)} updates, "
+                              f"retrying them later: {e.details.get('writeErrors', [])[:1]}")
+                failed_votes = sum(sum(batch[keys[index]].values()) for index in failed)
+                self.flushed_votes += batch_votes - failed_votes
+                self.flushed_updates += len(requests) - len(failed)
+                return
+            except Exception as e:
+                # No per-update outcome to go by, so the next flush retries all of it
+                logging.error(f"{self.name} flush failed, retrying {batch_votes} increments later: {e}")
+                for key in keys:
+                    self.requeue(key, batch[key])
+                return
+
+            self.flushed_votes += batch_votes
+            self.flushed_updates += len(requests)
+            logging.debug(f"{self.name} flushed {batch_votes} increments in {len(requests)} updates")
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()